@@ -9,7 +9,7 @@ from typing import Annotated, AsyncGenerator
 from fastapi import Depends
 
 from app.services.chatbot.agent import ChatAgent
-from app.services.chatbot.memory import ConversationMemory
+from app.services.chatbot.memory_factory import ConversationMemoryProtocol, get_memory
 
 
 async def get_chat_agent() -> AsyncGenerator[ChatAgent, None]:
@@ -18,12 +18,12 @@ async def get_chat_agent() -> AsyncGenerator[ChatAgent, None]:
     yield agent
 
 
-async def get_conversation_memory() -> AsyncGenerator[ConversationMemory, None]:
-    """Get ConversationMemory instance."""
-    memory = ConversationMemory()
+async def get_conversation_memory() -> AsyncGenerator[ConversationMemoryProtocol, None]:
+    """Get the shared conversation memory instance."""
+    memory = await get_memory()
     yield memory
 
 
 # Type aliases for cleaner dependency injection
 ChatAgentDep = Annotated[ChatAgent, Depends(get_chat_agent)]
-MemoryDep = Annotated[ConversationMemory, Depends(get_conversation_memory)]
+MemoryDep = Annotated[ConversationMemoryProtocol, Depends(get_conversation_memory)]
@@ -0,0 +1,51 @@
+"""
+Admin Endpoints
+
+Operational controls for deploys. Disabled unless ADMIN_TOKEN is set;
+requests must send it in the X-Admin-Token header.
+"""
+
+import secrets
+
+from fastapi import APIRouter, Header, HTTPException
+from pydantic import BaseModel
+
+from app.api.v1.endpoints import chat
+from app.core.config import settings
+from app.core.logging import get_logger
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+
+class DrainResponse(BaseModel):
+    """Drain status of this worker."""
+
+    draining: bool
+    connections: int
+
+
+def _check_token(token: str | None) -> None:
+    """Reject the request unless it carries the admin token."""
+    if not settings.ADMIN_TOKEN:
+        # Hide the endpoints entirely when no token is configured
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token is None or not secrets.compare_digest(token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@router.post("/drain", response_model=DrainResponse)
+async def drain(x_admin_token: str | None = Header(default=None)) -> DrainResponse:
+    """
+    Put this worker into drain mode.
+
+    New connections and turns are refused, in-flight answers finish and
+    clients are told to reconnect. The process keeps running until it is
+    stopped (SIGTERM then shuts down without waiting again).
+    """
+    _check_token(x_admin_token)
+    mgr = chat.get_manager()
+    mgr.begin_drain()
+    logger.info("admin_drain_requested", connections=mgr.get_connection_count())
+
+    return DrainResponse(draining=True, connections=mgr.get_connection_count())
@@ -4,21 +4,33 @@ Chat WebSocket Endpoint
 Real-time chat with AI chatbot via WebSocket.
 """
 
-import json
-from typing import Optional
+import asyncio
+import time
+from functools import lru_cache, partial
+from typing import AsyncIterator, Callable, Optional
 from uuid import uuid4
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from app.core.frames import FrameDecodeError
 from app.core.logging import get_logger
 from app.core.websocket import ConnectionManager
-from app.services.chatbot.agent import ChatAgent
+from app.services.chatbot.agent import OBJECT_CHANNEL_PREFIX, PERSONA_CHANNEL, ChatAgent
+from app.services.chatbot.object_persona_loader import list_available_objects, validate_object_id
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 # Security: Maximum message length to prevent DoS attacks
 MAX_MESSAGE_LENGTH = 10000  # 10K characters
+MAX_OBJECT_CHANNELS = 8  # Object channels open at once per connection
+MAX_OBJECT_ID_LENGTH = 128
+MAX_MESSAGE_ID_LENGTH = 64
+PREFETCH_INTERVAL_SECONDS = 4.0  # Repeated prefetches of an object within this are dropped
+MAX_PREFETCH_TASKS = 2  # Prefetches running at once per connection
+
+# Turns and prefetches still running (they are not tied to the socket that started them)
+_background_tasks: set[asyncio.Task] = set()
 
 # Global connection manager instance
 # Will be initialized in app startup
@@ -46,6 +58,8 @@ async def websocket_chat(
     session_id: Optional[str] = None,
     object_id: Optional[str] = None,
     object_title: Optional[str] = None,
+    coalesce_ms: Optional[int] = None,
+    last_seq: Optional[int] = None,
 ) -> None:
     """
     WebSocket endpoint for real-time chat with multi-persona or object persona support.
@@ -54,9 +68,12 @@ async def websocket_chat(
     - session_id: Optional session identifier
     - object_id: If provided, chat with a specific Career Game object (e.g., 'project_apa_citation')
     - object_title: Display title for the object (used in fallback responses)
+    - coalesce_ms: Window (0-200 ms) for merging stream chunks into fewer frames; 0 disables
+    - last_seq: Sequence number of the last frame received, to resume after a reconnect
 
     Message format (multi-persona mode - default):
-    - Incoming: {"content": "user message", "persona": "engineer" (optional)}
+    - Incoming: {"content": "user message", "persona": "engineer" (optional),
+      "id": "client message id" (optional)}
     - Outgoing: {"type": "typing", "persona": "engineer", "content": ""}
     - Outgoing: {"type": "stream", "persona": "engineer", "content": "partial response"}
     - Outgoing: {"type": "done", "persona": "engineer", "content": ""}
@@ -67,8 +84,58 @@ async def websocket_chat(
     - Outgoing: {"type": "stream", "object_id": "project_apa_citation", "content": "partial response"}
     - Outgoing: {"type": "done", "object_id": "project_apa_citation", "content": ""}
 
+    Channels (multi-persona mode): one connection can carry the persona group
+    chat plus any number of object chats instead of a socket per object.
+    - Incoming: {"type": "open", "channel": "object:<object_id>", "title": "Display title"}
+      -> Outgoing: {"type": "system", "channel": "object:<object_id>", ...} welcome
+    - Incoming: {"type": "close", "channel": "object:<object_id>"}
+    - Incoming: {"content": "user message", "channel": "object:<object_id>"} or
+      "channel": "persona-group" (the default when "channel" is omitted)
+    - Every frame of a turn sent with "channel" carries it, so answers on
+      several channels can stream at the same time
+    - At most MAX_OBJECT_CHANNELS object channels are open per connection
+
+    Prefetch (Career Game): sent when the player walks near an object, so the
+    first answer after a click starts sooner. No reply is sent.
+    - Incoming: {"type": "prefetch", "object_id": "project_apa_citation", "title": "Display title"}
+    - Loads the object's persona and its channel history, and opens a
+      connection to the LLM endpoint; repeats within PREFETCH_INTERVAL_SECONDS
+      are dropped
+    - Counts against the message rate limits; only objects with a persona
+      file are prefetched, at most MAX_PREFETCH_TASKS at once
+
     Error format:
     - Outgoing: {"type": "error", "content": "error message"}
+    - Messages over the rate limit are delayed briefly, or rejected with
+      {"type": "error", "content": "...", "retry_after": seconds}
+
+    Load:
+    - Outgoing: {"type": "queued", "content": "", "position": int, "eta_seconds": int}
+      while a message waits for LLM capacity (repeated every few seconds);
+      the response follows as usual once admitted
+
+    Heartbeat:
+    - Outgoing: {"type": "ping"} every HEARTBEAT_INTERVAL_SECONDS
+    - Incoming: {"type": "pong"}, required within HEARTBEAT_TIMEOUT_SECONDS or
+      the connection is closed with code 1002
+
+    Several sockets (e.g. browser tabs) may share a session_id; every frame
+    of the session is sent to all of them. A session runs one response at a
+    time per conversation: messages sent meanwhile wait their turn. A
+    message may carry a client-chosen "id"; one resent with the id of a
+    message still being answered is ignored (its answer reaches every tab).
+
+    Resumption:
+    - Every outgoing frame carries a "seq" number, increasing per session
+    - Reconnecting with session_id and last_seq first yields
+      {"type": "replay", "from_seq": int, "to_seq": int, "complete": bool}
+      followed by the missed frames (the welcome message is not repeated)
+
+    Subprotocols (Sec-WebSocket-Protocol):
+    - metchain.json.v1 (default): the JSON frames above
+    - metchain.msgpack.v1: binary MessagePack frames (see app.core.frames)
+    permessage-deflate is negotiated by the ASGI server when the client offers
+    it (uvicorn --ws-per-message-deflate, enabled by default).
     """
     # Determine chat mode
     is_object_mode = object_id is not None
@@ -80,17 +147,28 @@ async def websocket_chat(
     mgr = get_manager()
 
     # Try to connect (may be rejected if limits exceeded)
-    connected = await mgr.connect(websocket, session_id)
-    if not connected:
+    connection_id = await mgr.connect(
+        websocket, session_id, coalesce_ms=coalesce_ms, last_seq=last_seq
+    )
+    if connection_id is None:
         logger.warning("connection_rejected", session_id=session_id)
         return
 
     # Initialize chat agent (memory will be injected automatically)
     agent = ChatAgent()
+    # Object channels opened on this connection: channel -> object title
+    object_channels: dict[str, str] = {}
+    # Objects prefetched on this connection: object_id -> monotonic time
+    # (bounded by the number of objects with a persona file)
+    prefetched: dict[str, float] = {}
+    # Prefetches of this connection still running
+    prefetch_tasks: set[asyncio.Task] = set()
 
     try:
-        # Send appropriate welcome message based on mode
-        if is_object_mode:
+        # Send appropriate welcome message based on mode (not when resuming)
+        if last_seq is not None:
+            logger.info("chat_resumed", session_id=session_id, last_seq=last_seq)
+        elif is_object_mode:
             display_title = object_title or object_id
             await mgr.send_message(
                 session_id,
@@ -118,17 +196,59 @@ async def websocket_chat(
             )
 
         while True:
-            # Receive message from client
-            data = await websocket.receive_text()
-
             try:
-                message = json.loads(data)
+                # Receive message from client
+                message = await mgr.receive_message(connection_id)
+                message_type = message.get("type")
+
+                if message_type == "prefetch":
+                    await _start_prefetch(
+                        mgr, agent, connection_id, session_id, prefetched, prefetch_tasks, message
+                    )
+                    continue
+
+                # Channel control messages (multi-persona mode only)
+                if message_type == "open" and not is_object_mode:
+                    await _open_object_channel(mgr, session_id, object_channels, message)
+                    continue
+                if message_type == "close" and not is_object_mode:
+                    channel = message.get("channel")
+                    if isinstance(channel, str) and object_channels.pop(channel, None) is not None:
+                        logger.info("object_channel_closed", session_id=session_id, channel=channel)
+                    continue
+
                 user_content = message.get("content", "")
 
                 # Validate message content
                 if not user_content:
                     continue
 
+                # Security: Limit message rate per connection, session and IP
+                retry_after = await mgr.acquire_message(connection_id)
+                if retry_after is not None:
+                    await mgr.send_message(
+                        session_id,
+                        {
+                            "type": "error",
+                            "content": f"You're sending messages too quickly. Please wait {retry_after:.0f} seconds.",
+                            "retry_after": retry_after,
+                        },
+                    )
+                    continue
+
+                message_id = message.get("id")
+                selected_persona = message.get("persona")
+                if (
+                    not isinstance(user_content, str)
+                    or not isinstance(selected_persona, (str, type(None)))
+                    or not isinstance(message_id, (str, type(None)))
+                    or (message_id is not None and len(message_id) > MAX_MESSAGE_ID_LENGTH)
+                ):
+                    await mgr.send_message(
+                        session_id, {"type": "error", "content": "Invalid message format"}
+                    )
+                    continue
+
                 # Security: Reject oversized messages to prevent DoS
                 if len(user_content) > MAX_MESSAGE_LENGTH:
                     logger.warning(
@@ -146,28 +266,44 @@ async def websocket_chat(
                     )
                     continue
 
-                if is_object_mode:
-                    # Object persona mode
+                channel = None if is_object_mode else message.get("channel")
+                if channel is not None and not isinstance(channel, str):
+                    await mgr.send_message(
+                        session_id, {"type": "error", "content": "Invalid channel"}
+                    )
+                    continue
+
+                if is_object_mode or channel in object_channels:
+                    # Object persona mode, or an object channel of this connection
+                    if is_object_mode:
+                        turn_object_id, turn_object_title = object_id, object_title or object_id
+                    else:
+                        turn_object_id = channel[len(OBJECT_CHANNEL_PREFIX):]
+                        turn_object_title = object_channels[channel]
                     logger.info(
                         "object_chat_message_received",
                         session_id=session_id,
-                        object_id=object_id,
+                        object_id=turn_object_id,
                         content_length=len(user_content),
                     )
 
-                    # Stream object persona response
-                    async for response_chunk in agent.stream_object_response(
-                        user_content,
+                    # Stream object persona response to every tab of the session
+                    # response_chunk format: {"type": "typing"|"stream"|"done", "object_id": str, "content": str}
+                    _start_turn(
+                        mgr,
                         session_id,
-                        object_id,
-                        object_title or object_id,
-                    ):
-                        # response_chunk format: {"type": "typing"|"stream"|"done", "object_id": str, "content": str}
-                        await mgr.send_message(session_id, response_chunk)
-                else:
+                        channel,
+                        message_id,
+                        partial(
+                            agent.stream_object_response,
+                            user_content,
+                            session_id,
+                            turn_object_id,
+                            turn_object_title,
+                        ),
+                    )
+                elif channel in (None, PERSONA_CHANNEL):
                     # Multi-persona mode (default)
-                    selected_persona = message.get("persona", None)
-
                     logger.info(
                         "chat_message_received",
                         session_id=session_id,
@@ -175,14 +311,29 @@ async def websocket_chat(
                         selected_persona=selected_persona,
                     )
 
-                    # Stream multi-persona response from agent
-                    async for response_chunk in agent.stream_multi_persona_response(
-                        user_content, session_id, selected_persona
-                    ):
-                        # response_chunk format: {"type": "typing"|"stream"|"done", "persona": str, "content": str}
-                        await mgr.send_message(session_id, response_chunk)
+                    # Stream multi-persona response to every tab of the session
+                    # response_chunk format: {"type": "typing"|"stream"|"done", "persona": str, "content": str}
+                    _start_turn(
+                        mgr,
+                        session_id,
+                        channel,
+                        message_id,
+                        partial(
+                            agent.stream_multi_persona_response,
+                            user_content,
+                            session_id,
+                            selected_persona,
+                        ),
+                        # Omitting the channel writes the same history as naming it
+                        conversation=PERSONA_CHANNEL,
+                    )
+                else:
+                    await mgr.send_message(
+                        session_id,
+                        {"type": "error", "content": "Channel is not open", "channel": channel},
+                    )
 
-            except json.JSONDecodeError:
+            except FrameDecodeError:
                 await mgr.send_message(
                     session_id,
                     {
@@ -192,7 +343,7 @@ async def websocket_chat(
                 )
 
     except WebSocketDisconnect:
-        await mgr.disconnect(session_id)
+        await mgr.disconnect(connection_id)
         logger.info("client_disconnected", session_id=session_id, mode="object" if is_object_mode else "multi_persona")
     except Exception as e:
         logger.error("websocket_error", session_id=session_id, error=str(e), mode="object" if is_object_mode else "multi_persona")
@@ -203,4 +354,138 @@ async def websocket_chat(
                 "content": "An error occurred. Please try again.",
             },
         )
-        await mgr.disconnect(session_id)
+        await mgr.disconnect(connection_id)
+
+
+async def _open_object_channel(
+    mgr: ConnectionManager,
+    session_id: str,
+    object_channels: dict[str, str],
+    message: dict,
+) -> None:
+    """Open an object channel on a multiplexed connection and welcome the visitor."""
+    channel = message.get("channel")
+    if (
+        not isinstance(channel, str)
+        or not channel.startswith(OBJECT_CHANNEL_PREFIX)
+        or len(channel) - len(OBJECT_CHANNEL_PREFIX) > MAX_OBJECT_ID_LENGTH
+        or not validate_object_id(channel[len(OBJECT_CHANNEL_PREFIX):])
+    ):
+        await mgr.send_message(
+            session_id,
+            {
+                "type": "error",
+                "content": "Invalid channel",
+                "channel": channel if isinstance(channel, str) else None,
+            },
+        )
+        return
+
+    if channel not in object_channels and len(object_channels) >= MAX_OBJECT_CHANNELS:
+        await mgr.send_message(
+            session_id,
+            {"type": "error", "content": "Too many open channels", "channel": channel},
+        )
+        return
+
+    object_id = channel[len(OBJECT_CHANNEL_PREFIX):]
+    title = str(message.get("title") or object_id)[:MAX_OBJECT_ID_LENGTH]
+    object_channels[channel] = title
+
+    await mgr.send_message(
+        session_id,
+        {
+            "type": "system",
+            "content": f"You're now chatting with {title}!",
+            "session_id": session_id,
+            "object_id": object_id,
+            "channel": channel,
+        },
+    )
+    logger.info(
+        "object_channel_opened",
+        session_id=session_id,
+        object_id=object_id,
+        open_channels=len(object_channels),
+    )
+
+
+def _start_turn(
+    mgr: ConnectionManager,
+    session_id: str,
+    channel: Optional[str],
+    key: Optional[str],
+    stream: Callable[[], AsyncIterator[dict]],
+    conversation: Optional[str] = None,
+) -> None:
+    """
+    Run a turn in the background so the receive loop keeps reading.
+
+    Pongs, close frames and messages for other channels are handled while
+    an answer streams. A turn outlives its socket: its frames still reach
+    the session's other tabs and the replay buffer.
+    """
+
+    async def run() -> None:
+        try:
+            await mgr.run_generation(
+                session_id, key, stream, channel=channel, conversation=conversation
+            )
+        except Exception as e:
+            logger.error(
+                "chat_turn_failed", session_id=session_id, channel=channel, error=str(e)
+            )
+            frame = {"type": "error", "content": "An error occurred. Please try again."}
+            if channel is not None:
+                frame["channel"] = channel
+            await mgr.send_message(session_id, frame)
+
+    task = asyncio.create_task(run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+@lru_cache(maxsize=1)
+def _prefetchable_objects() -> frozenset[str]:
+    """Object ids with a persona file (the files ship with the app)."""
+    return frozenset(list_available_objects())
+
+
+async def _start_prefetch(
+    mgr: ConnectionManager,
+    agent: ChatAgent,
+    connection_id: str,
+    session_id: str,
+    prefetched: dict[str, float],
+    prefetch_tasks: set[asyncio.Task],
+    message: dict,
+) -> None:
+    """
+    Warm up an object chat in the background (see ChatAgent.prefetch_object).
+
+    Prefetches are hints: ones for objects without a persona file, repeats
+    within PREFETCH_INTERVAL_SECONDS, ones beyond MAX_PREFETCH_TASKS running
+    or over the message rate limits, and any sent to a draining worker are
+    dropped without a reply. Each prefetch that runs counts as a message.
+    """
+    object_id = message.get("object_id")
+    if (
+        mgr.draining
+        or not isinstance(object_id, str)
+        or object_id not in _prefetchable_objects()
+        or len(prefetch_tasks) >= MAX_PREFETCH_TASKS
+    ):
+        return
+
+    now = time.monotonic()
+    if object_id in prefetched and now - prefetched[object_id] < PREFETCH_INTERVAL_SECONDS:
+        return
+    if await mgr.acquire_message(connection_id) is not None:
+        return
+    prefetched[object_id] = now
+
+    title = str(message.get("title") or object_id)[:MAX_OBJECT_ID_LENGTH]
+    task = asyncio.create_task(agent.prefetch_object(session_id, object_id, title))
+    for tasks in (_background_tasks, prefetch_tasks):
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
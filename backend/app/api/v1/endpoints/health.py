@@ -1,12 +1,17 @@
 """
 Health Check Endpoint
 
-Simple health check for monitoring and load balancers.
+Simple health check for monitoring and load balancers, plus WebSocket
+connection and latency figures for dashboards.
 """
 
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Response
 from pydantic import BaseModel
 
+from app.api.v1.endpoints import chat
+
 router = APIRouter()
 
 
@@ -17,7 +22,38 @@ class HealthResponse(BaseModel):
     version: str
 
 
+class WebSocketHealthResponse(BaseModel):
+    """WebSocket connection, ping round-trip time and LLM load figures (this worker)."""
+
+    connections: int
+    measured: int
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    max_ms: Optional[float] = None
+    active_turns: int = 0
+    queued_turns: int = 0
+    loop_lag_ms: float = 0.0
+
+
 @router.get("/health", response_model=HealthResponse)
-async def health_check() -> HealthResponse:
-    """Check if the API is healthy."""
+async def health_check(response: Response) -> HealthResponse:
+    """Check if the API is healthy (503 while draining, so load balancers move on)."""
+    if chat.manager is not None and chat.manager.draining:
+        response.status_code = 503
+        return HealthResponse(status="draining", version="0.1.0")
     return HealthResponse(status="healthy", version="0.1.0")
+
+
+@router.get("/health/websocket", response_model=WebSocketHealthResponse)
+async def websocket_health() -> WebSocketHealthResponse:
+    """Get open WebSocket connections, their ping round-trip times and LLM load."""
+    if chat.manager is None:
+        return WebSocketHealthResponse(connections=0, measured=0)
+
+    admission = chat.manager.admission.get_stats()
+    return WebSocketHealthResponse(
+        **chat.manager.get_rtt_stats(),
+        active_turns=admission["active_turns"],
+        queued_turns=admission["queued_turns"],
+        loop_lag_ms=admission["loop_lag_ms"],
+    )
@@ -6,7 +6,7 @@ Aggregates all v1 API endpoints.
 
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import chat, contact, health
+from app.api.v1.endpoints import admin, chat, contact, health
 
 api_router = APIRouter()
 
@@ -29,3 +29,11 @@ api_router.include_router(
     prefix="/contact",
     tags=["Contact"],
 )
+
+# Operational controls (disabled unless ADMIN_TOKEN is set)
+api_router.include_router(
+    admin.router,
+    prefix="/admin",
+    tags=["Admin"],
+    include_in_schema=False,
+)
@@ -0,0 +1,157 @@
+"""
+LLM Turn Admission Control
+
+Caps the LLM turns a worker runs at once. Idle sockets are cheap; what
+saturates a worker is concurrent generations (each multi-persona turn
+streams up to four LLM responses) and the event-loop lag they cause.
+
+- A turn starts right away while fewer than MAX_ACTIVE_TURNS are running
+  and the event loop keeps up (lag below MAX_EVENT_LOOP_LAG_MS)
+- Otherwise it waits in a FIFO queue; the caller is told its position and
+  an ETA when it is queued and every QUEUE_UPDATE_INTERVAL_SECONDS after
+- Beyond MAX_QUEUED_TURNS waiting turns, new turns are rejected
+- Event-loop lag is sampled by a background task; it rises immediately
+  and decays over a few samples so admission does not flap
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Configuration
+MAX_ACTIVE_TURNS = 64  # LLM turns running at once per worker
+MAX_QUEUED_TURNS = 500  # Turns waiting per worker before new ones are rejected
+MAX_EVENT_LOOP_LAG_MS = 200  # Stop starting turns while the loop lags more than this
+LAG_SAMPLE_INTERVAL_SECONDS = 0.5
+QUEUE_UPDATE_INTERVAL_SECONDS = 2.0  # How often waiting callers get a fresh position/ETA
+DEFAULT_TURN_SECONDS = 15.0  # Turn duration assumed for ETAs before any turn finished
+
+# Called with (queue position, ETA in seconds) while a turn waits
+QueuedCallback = Callable[[int, float], Awaitable[None]]
+
+
+class AdmissionController:
+    """FIFO admission of LLM turns based on active turns and event-loop lag."""
+
+    def __init__(self) -> None:
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._monitor_task: Optional[asyncio.Task] = None
+        self.loop_lag = 0.0  # Seconds (smoothed)
+        self.avg_turn_seconds = DEFAULT_TURN_SECONDS
+        self.queued = 0
+        self.rejected = 0
+
+    async def start(self) -> None:
+        """Start the event-loop lag monitor."""
+        if self._monitor_task is None:
+            self._monitor_task = asyncio.create_task(self._monitor_lag())
+
+    async def stop(self) -> None:
+        """Stop the lag monitor."""
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            try:
+                await self._monitor_task
+            except asyncio.CancelledError:
+                pass
+            self._monitor_task = None
+
+    async def acquire(self, on_queued: QueuedCallback) -> bool:
+        """
+        Wait for a turn slot.
+
+        Args:
+            on_queued: Awaited with the queue position and ETA while waiting
+
+        Returns:
+            bool: True once a slot is held (call ``release``), False if the
+            queue is full
+        """
+        if not self._waiters and self._has_capacity():
+            self.active += 1
+            return True
+
+        if len(self._waiters) >= MAX_QUEUED_TURNS:
+            self.rejected += 1
+            logger.warning(
+                "turn_rejected", queued_turns=len(self._waiters), active_turns=self.active
+            )
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            while not waiter.done():
+                position = self._waiters.index(waiter) + 1
+                await on_queued(position, self.estimate_wait(position))
+                try:
+                    # A granted slot is already counted in self.active
+                    await asyncio.wait_for(asyncio.shield(waiter), QUEUE_UPDATE_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+            return True
+        except BaseException:
+            if waiter.done():
+                # Granted while we were being cancelled: hand the slot on
+                self.release(None)
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, duration: Optional[float]) -> None:
+        """
+        Free a turn slot and start waiting turns.
+
+        Args:
+            duration: How long the turn ran (seconds), for ETAs; None if it never ran
+        """
+        self.active -= 1
+        if duration is not None:
+            self.avg_turn_seconds = self.avg_turn_seconds * 0.9 + duration * 0.1
+        self._admit_waiters()
+
+    def estimate_wait(self, position: int) -> float:
+        """Estimate the seconds until the turn at ``position`` in the queue starts."""
+        return math.ceil(position / MAX_ACTIVE_TURNS) * self.avg_turn_seconds
+
+    def get_stats(self) -> dict[str, int | float]:
+        """Get admission counters."""
+        return {
+            "active_turns": self.active,
+            "queued_turns": len(self._waiters),
+            "loop_lag_ms": round(self.loop_lag * 1000, 1),
+            "avg_turn_seconds": round(self.avg_turn_seconds, 1),
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+
+    def _has_capacity(self) -> bool:
+        """Whether another turn may start now."""
+        return self.active < MAX_ACTIVE_TURNS and self.loop_lag * 1000 < MAX_EVENT_LOOP_LAG_MS
+
+    def _admit_waiters(self) -> None:
+        """Grant slots to waiting turns, oldest first, while capacity allows."""
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            self.active += 1
+            waiter.set_result(None)
+
+    async def _monitor_lag(self) -> None:
+        """Sample how late the event loop wakes a sleeping task."""
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL_SECONDS)
+            lag = max(0.0, time.monotonic() - started - LAG_SAMPLE_INTERVAL_SECONDS)
+            # Rise at once, decay gradually
+            self.loop_lag = lag if lag > self.loop_lag else (self.loop_lag + lag) / 2
+            # Lag may have been the only thing holding turns back
+            self._admit_waiters()
@@ -28,6 +28,7 @@ class Settings(BaseSettings):
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
     API_V1_PREFIX: str = "/api/v1"
+    ADMIN_TOKEN: str = ""  # Enables /admin endpoints (sent as X-Admin-Token); empty disables them
 
     # CORS - stored as comma-separated string
     ALLOWED_ORIGINS: str = "http://localhost:5173,http://localhost:3000"
@@ -37,12 +38,33 @@ class Settings(BaseSettings):
         """Get ALLOWED_ORIGINS as a list."""
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
 
+    # Reverse proxies / load balancers whose X-Forwarded-For is trusted, as a
+    # comma-separated string of IPs or CIDRs (empty = use the socket peer address)
+    TRUSTED_PROXIES: str = ""
+
+    @property
+    def trusted_proxies_list(self) -> List[str]:
+        """Get TRUSTED_PROXIES as a list."""
+        return [proxy.strip() for proxy in self.TRUSTED_PROXIES.split(",") if proxy.strip()]
+
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./data/app.db"
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    MEMORY_BACKEND: str = "redis"  # Conversation storage: "redis", "sqlite" (DATABASE_URL) or "memory"
     REDIS_USE_FOR_MEMORY: bool = True  # Use Redis for conversation storage (fallback to in-memory if False)
+    REDIS_MEMORY_STORAGE_MODE: str = "list"  # "list" (RPUSH/LRANGE) or "string" (legacy JSON blob)
+    MEMORY_STORAGE_CODEC: str = "compact"  # Stored message encoding: "compact" (MessagePack/zlib) or "json"
+    REDIS_MEMORY_CACHE_SIZE: int = 1000  # Sessions cached per worker in front of Redis (0 disables)
+    MEMORY_WRITE_BEHIND: bool = False  # Commit finished turns from a background flusher
+    MEMORY_CROSS_CHANNEL_CONTEXT: bool = False  # Show object chats the latest main-chat messages
+    MEMORY_SUMMARY_ENABLED: bool = True  # Fold older turns of long conversations into a running summary
+    MEMORY_SUMMARY_TRIGGER_TOKENS: int = 1500  # Estimated history tokens before summarizing
+    MEMORY_SUMMARY_DEPLOYMENT_NAME: str = ""  # Cheap model for summaries (empty = DEEPSEEK_DEPLOYMENT_NAME)
+    WS_REPLAY_USE_REDIS: bool = False  # Mirror WebSocket replay buffers to Redis streams (cross-worker resume)
+    WS_RATE_LIMIT_USE_REDIS: bool = False  # Share WebSocket rate-limit buckets across workers via Redis
+    WS_FANOUT_USE_REDIS: bool = False  # Deliver session frames to sockets on other workers via Redis pub/sub
 
     # LLM - Azure AI Foundry / DeepSeek
     AZURE_AI_ENDPOINT: str = ""
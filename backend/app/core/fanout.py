@@ -0,0 +1,199 @@
+"""
+Cross-Worker Session Fan-Out
+
+Publishes outgoing session frames on a per-session Redis pub/sub channel,
+so a frame produced on one worker reaches sockets of that session held by
+any other worker (several uvicorn workers or nodes behind a load balancer,
+no sticky sessions).
+
+- A worker subscribes to ``ws:session:<id>`` only while it holds a socket
+  of that session, so each frame is received by the workers that need it
+- Publishes are pipelined by a background flusher: frames queued while a
+  flush is in flight go out together, keeping Redis off the per-token path
+- Frames carry the publishing worker's id so a worker skips its own frames
+  (it already delivered them locally)
+- Pub/sub is fire-and-forget; frames published while a subscription is
+  down are recovered through replay (``last_seq``) on reconnect
+"""
+
+import asyncio
+from typing import Callable, Optional
+from uuid import uuid4
+
+import orjson
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Configuration
+CHANNEL_PREFIX = "ws:session:"
+RESUBSCRIBE_DELAY_SECONDS = 1.0  # Wait before re-subscribing after a dropped connection
+
+# Called with (session_id, frame) for frames published by other workers
+FrameHandler = Callable[[str, dict], None]
+
+
+class RedisFanout:
+    """Per-session Redis pub/sub channels shared by all workers."""
+
+    def __init__(self, redis_url: Optional[str] = None) -> None:
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.worker_id = uuid4().hex
+        self._redis: Optional[aioredis.Redis] = None
+        self._pubsub = None
+        self._handler: Optional[FrameHandler] = None
+        # Sessions this worker holds sockets for
+        self._sessions: set[str] = set()
+        self._pending: list[tuple[str, bytes]] = []
+        self._wakeup = asyncio.Event()
+        self._flusher_task: Optional[asyncio.Task] = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.received = 0
+
+    def _get_channel(self, session_id: str) -> str:
+        """Get the pub/sub channel of a session."""
+        return f"{CHANNEL_PREFIX}{session_id}"
+
+    async def start(self, handler: FrameHandler) -> None:
+        """
+        Connect to Redis and start the publisher and the subscription listener.
+
+        Args:
+            handler: Called for every frame another worker published for a
+                subscribed session
+        """
+        if self._redis is not None:
+            return
+
+        self._handler = handler
+        self._redis = aioredis.from_url(self.redis_url, socket_connect_timeout=5)
+        self._flusher_task = asyncio.create_task(self._flush_loop())
+        self._listener_task = asyncio.create_task(self._listen())
+        logger.info("redis_fanout_started", url=self.redis_url, worker_id=self.worker_id)
+
+    async def stop(self) -> None:
+        """Publish pending frames, stop listening and close the connection."""
+        for task in (self._flusher_task, self._listener_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._flusher_task = self._listener_task = None
+
+        await self._flush()
+
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+            logger.info("redis_fanout_stopped")
+
+    def publish(self, session_id: str, frame: dict) -> None:
+        """Queue a frame for the other workers holding sockets of its session."""
+        payload = orjson.dumps({"w": self.worker_id, "f": frame})
+        self._pending.append((self._get_channel(session_id), payload))
+        self._wakeup.set()
+
+    async def subscribe(self, session_id: str) -> None:
+        """Start receiving a session's frames (first local socket of the session)."""
+        self._sessions.add(session_id)
+        if self._pubsub is None:
+            return
+        try:
+            await self._pubsub.subscribe(self._get_channel(session_id))
+        except Exception as e:
+            logger.warning("redis_fanout_subscribe_failed", session_id=session_id, error=str(e))
+
+    async def unsubscribe(self, session_id: str) -> None:
+        """Stop receiving a session's frames (last local socket closed)."""
+        self._sessions.discard(session_id)
+        if self._pubsub is None:
+            return
+        try:
+            await self._pubsub.unsubscribe(self._get_channel(session_id))
+        except Exception as e:
+            logger.warning("redis_fanout_unsubscribe_failed", session_id=session_id, error=str(e))
+
+    def handle_message(self, channel: str | bytes, data: bytes) -> None:
+        """Pass a frame published by another worker to the handler."""
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        message = orjson.loads(data)
+        if message["w"] == self.worker_id or self._handler is None:
+            return
+
+        self.received += 1
+        self._handler(channel[len(CHANNEL_PREFIX):], message["f"])
+
+    def get_stats(self) -> dict[str, int]:
+        """Get fan-out counters."""
+        return {
+            "sessions": len(self._sessions),
+            "published": self.published,
+            "received": self.received,
+        }
+
+    async def _listen(self) -> None:
+        """Deliver subscribed frames, re-subscribing after connection loss."""
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                # Subscribing to a channel starts the connection; park on a
+                # worker channel so listen() has something to wait on
+                await pubsub.subscribe(
+                    self._get_channel(f"worker:{self.worker_id}"),
+                    *(self._get_channel(session_id) for session_id in self._sessions),
+                )
+                self._pubsub = pubsub
+                logger.info("redis_fanout_listening", sessions=len(self._sessions))
+
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        self.handle_message(message["channel"], message["data"])
+                    except Exception as e:
+                        logger.error("redis_fanout_frame_failed", error=str(e))
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("redis_fanout_subscription_lost", error=str(e))
+            finally:
+                self._pubsub = None
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+            await asyncio.sleep(RESUBSCRIBE_DELAY_SECONDS)
+
+    async def _flush_loop(self) -> None:
+        """Publish queued frames; frames queued during a flush form the next batch."""
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                await self._flush()
+        except asyncio.CancelledError:
+            pass
+
+    async def _flush(self) -> None:
+        """Publish all queued frames in a single pipeline."""
+        if not self._pending or not self._redis:
+            return
+
+        batch, self._pending = self._pending, []
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for channel, payload in batch:
+                    pipe.publish(channel, payload)
+                await pipe.execute()
+            self.published += len(batch)
+        except Exception as e:
+            logger.error("redis_fanout_publish_failed", frames=len(batch), error=str(e))
@@ -0,0 +1,188 @@
+"""
+WebSocket Frame Encoding
+
+Fast JSON serialization for WebSocket frames using orjson, plus an
+optional binary MessagePack subprotocol for bandwidth-constrained clients.
+
+Static frames (heartbeat pings) are pre-encoded once per codec; all other
+frames are encoded on send.
+
+Subprotocols (negotiated via ``Sec-WebSocket-Protocol``):
+- ``metchain.json.v1`` (default): JSON text frames
+- ``metchain.msgpack.v1``: MessagePack binary frames with a positional
+  envelope ``[type, target, content, seq, extras]`` where ``type`` and
+  persona targets are small integers (see FRAME_TYPE_CODES/PERSONA_CODES),
+  object targets are object IDs, and trailing nulls are omitted.
+"""
+
+from typing import Any, Protocol
+
+import msgpack
+import orjson
+
+JSON_SUBPROTOCOL = "metchain.json.v1"
+MSGPACK_SUBPROTOCOL = "metchain.msgpack.v1"
+
+# Integer codes used by the MessagePack envelope; unknown values are sent as strings
+FRAME_TYPE_CODES = {"system": 0, "typing": 1, "stream": 2, "done": 3, "error": 4, "ping": 5}
+PERSONA_CODES = {"engineer": 0, "researcher": 1, "speaker": 2, "educator": 3}
+
+_ENVELOPE_KEYS = frozenset({"type", "persona", "object_id", "content", "seq"})
+
+
+class FrameDecodeError(ValueError):
+    """Raised when an incoming frame is not a valid JSON object."""
+
+    pass
+
+
+def encode_frame(message: dict[str, Any]) -> str:
+    """
+    Serialize an outgoing frame to JSON text.
+
+    Args:
+        message: Frame payload
+
+    Returns:
+        JSON text ready for ``WebSocket.send_text``
+    """
+    return orjson.dumps(message).decode()
+
+
+def decode_frame(data: str | bytes) -> dict[str, Any]:
+    """
+    Parse an incoming frame.
+
+    Args:
+        data: Raw text or bytes received from the client
+
+    Returns:
+        The decoded JSON object
+
+    Raises:
+        FrameDecodeError: If the data is not a JSON object
+    """
+    try:
+        message = orjson.loads(data)
+    except orjson.JSONDecodeError as e:
+        raise FrameDecodeError(str(e)) from e
+
+    if not isinstance(message, dict):
+        raise FrameDecodeError("Frame must be a JSON object")
+
+    return message
+
+
+class FrameCodec(Protocol):
+    """Serializer for one negotiated WebSocket subprotocol."""
+
+    subprotocol: str
+    ping_frame: str | bytes
+
+    def encode(self, message: dict[str, Any]) -> str | bytes:
+        """Serialize an outgoing frame (text for str, binary for bytes)."""
+        ...
+
+    def decode(self, data: str | bytes) -> dict[str, Any]:
+        """Parse an incoming frame."""
+        ...
+
+
+class JsonFrameCodec:
+    """Default JSON text protocol."""
+
+    subprotocol = JSON_SUBPROTOCOL
+
+    def __init__(self) -> None:
+        self.ping_frame = self.encode({"type": "ping"})
+
+    def encode(self, message: dict[str, Any]) -> str:
+        """Serialize to JSON text."""
+        return encode_frame(message)
+
+    def decode(self, data: str | bytes) -> dict[str, Any]:
+        """Parse JSON text."""
+        return decode_frame(data)
+
+
+class MsgPackFrameCodec:
+    """
+    Compact binary protocol.
+
+    Outgoing frames use the positional envelope described in the module
+    docstring. Incoming binary frames are plain MessagePack maps with the
+    same keys as the JSON protocol; text frames are still accepted as JSON.
+    """
+
+    subprotocol = MSGPACK_SUBPROTOCOL
+
+    def __init__(self) -> None:
+        self.ping_frame = self.encode({"type": "ping"})
+
+    def encode(self, message: dict[str, Any]) -> bytes:
+        """Serialize to a MessagePack envelope."""
+        frame_type = message.get("type")
+        extras = {k: v for k, v in message.items() if k not in _ENVELOPE_KEYS}
+
+        persona = message.get("persona")
+        if persona is None:
+            target = message.get("object_id")
+        elif persona in PERSONA_CODES:
+            target = PERSONA_CODES[persona]
+        else:
+            target = None
+            extras["persona"] = persona
+        if persona is not None and message.get("object_id") is not None:
+            extras["object_id"] = message["object_id"]
+
+        envelope = [
+            FRAME_TYPE_CODES.get(frame_type, frame_type),
+            target,
+            message.get("content"),
+            message.get("seq"),
+            extras or None,
+        ]
+        while envelope and envelope[-1] is None:
+            envelope.pop()
+
+        return msgpack.packb(envelope, use_bin_type=True)
+
+    def decode(self, data: str | bytes) -> dict[str, Any]:
+        """Parse a MessagePack map (or JSON text)."""
+        if isinstance(data, str):
+            return decode_frame(data)
+
+        try:
+            message = msgpack.unpackb(data, raw=False)
+        except (ValueError, msgpack.UnpackException) as e:
+            raise FrameDecodeError(str(e)) from e
+
+        if not isinstance(message, dict):
+            raise FrameDecodeError("Frame must be a MessagePack map")
+
+        return message
+
+
+DEFAULT_CODEC = JsonFrameCodec()
+_CODECS: dict[str, FrameCodec] = {
+    JSON_SUBPROTOCOL: DEFAULT_CODEC,
+    MSGPACK_SUBPROTOCOL: MsgPackFrameCodec(),
+}
+
+
+def negotiate_codec(requested: list[str]) -> tuple[str | None, FrameCodec]:
+    """
+    Pick a codec from the client's offered subprotocols.
+
+    Args:
+        requested: Subprotocols offered by the client, in preference order
+
+    Returns:
+        The subprotocol to echo in the handshake (None if the client offered
+        none we support) and the codec to use for this connection
+    """
+    for subprotocol in requested:
+        codec = _CODECS.get(subprotocol)
+        if codec is not None:
+            return subprotocol, codec
+    return None, DEFAULT_CODEC
@@ -1,43 +1,294 @@
 """
 Rate Limiting Configuration
 
-Implements rate limiting for API endpoints and WebSocket connections
-using slowapi.
+Implements rate limiting for API endpoints using slowapi, and token-bucket
+limits for WebSocket traffic (handshakes per client IP; chat messages per
+connection, session and client IP).
+
+Clients are identified by the socket peer address, or by X-Forwarded-For
+when the peer is a trusted proxy (TRUSTED_PROXIES).
+
+WebSocket buckets live in process memory, or in Redis when
+WS_RATE_LIMIT_USE_REDIS is set so limits hold across workers. A message
+over its limit is delayed by up to MAX_MESSAGE_DELAY_SECONDS; beyond that
+it is rejected.
 """
 
+import asyncio
+import ipaddress
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Protocol
+
+import redis.asyncio as aioredis
 from fastapi import Request
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from app.core.config import settings
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
 
+@dataclass(frozen=True, slots=True)
+class TokenBucketLimit:
+    """Token bucket: ``rate`` tokens refill per second, up to ``burst``."""
+
+    rate: float
+    burst: int
+
+
+# WebSocket configuration
+WS_HANDSHAKE_LIMIT = TokenBucketLimit(rate=0.5, burst=10)  # Per client IP
+WS_CONNECTION_MESSAGE_LIMIT = TokenBucketLimit(rate=0.5, burst=5)
+WS_SESSION_MESSAGE_LIMIT = TokenBucketLimit(rate=0.5, burst=8)  # Shared by tabs
+WS_IP_MESSAGE_LIMIT = TokenBucketLimit(rate=2.0, burst=20)  # Shared by sessions behind NAT
+MAX_MESSAGE_DELAY_SECONDS = 3.0  # Longer waits are rejected instead
+MAX_MEMORY_BUCKETS = 10000  # Buckets kept in process (least recently used dropped)
+
+# Refill and take tokens atomically. A take may borrow up to max_wait worth
+# of future tokens (the caller waits that long); otherwise nothing is taken.
+# Returns {taken (1/0), wait in ms}.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local max_wait = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - updated) / 1000 * rate)
+local wait = 0
+if tokens < 1 then
+    wait = (1 - tokens) / rate * 1000
+end
+if wait > max_wait then
+    return {0, math.ceil(wait)}
+end
+tokens = tokens - 1
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'u', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1000)
+return {1, math.ceil(wait)}
+"""
+
+
+class TokenBucketStore(Protocol):
+    """Storage backend for token buckets."""
+
+    async def take(
+        self, key: str, limit: TokenBucketLimit, max_wait: float
+    ) -> tuple[bool, float]:
+        """
+        Take a token from a bucket.
+
+        Returns:
+            Whether a token was taken, and the seconds until one is available:
+            the caller waits that long before proceeding; if it exceeds
+            ``max_wait`` nothing is taken
+        """
+        ...
+
+
+class MemoryTokenBucketStore:
+    """Token buckets in process memory (per worker)."""
+
+    def __init__(self, maxsize: int = MAX_MEMORY_BUCKETS) -> None:
+        self.maxsize = maxsize
+        # Map: key -> (tokens, time.monotonic() of the last update)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(
+        self, key: str, limit: TokenBucketLimit, max_wait: float
+    ) -> tuple[bool, float]:
+        """Take a token from a bucket (see TokenBucketStore.take)."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (limit.burst, now))
+        tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+
+        wait = max(0.0, (1 - tokens) / limit.rate)
+        if wait > max_wait:
+            return False, wait
+
+        self._buckets[key] = (tokens - 1, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return True, wait
+
+
+class RedisTokenBucketStore:
+    """
+    Token buckets in Redis, shared by all workers.
+
+    Falls back to a per-worker memory store while Redis is unavailable.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None) -> None:
+        self.redis_url = redis_url or settings.REDIS_URL
+        self._redis: Optional[aioredis.Redis] = None
+        self._script = None
+        self._fallback = MemoryTokenBucketStore()
+
+    def _get_key(self, key: str) -> str:
+        """Get Redis key for a bucket."""
+        return f"ws:ratelimit:{key}"
+
+    async def take(
+        self, key: str, limit: TokenBucketLimit, max_wait: float
+    ) -> tuple[bool, float]:
+        """Take a token from a bucket (see TokenBucketStore.take)."""
+        if self._redis is None:
+            self._redis = aioredis.from_url(self.redis_url, socket_connect_timeout=5)
+            self._script = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+        try:
+            taken, wait_ms = await self._script(
+                keys=[self._get_key(key)],
+                args=[limit.rate, limit.burst, int(time.time() * 1000), int(max_wait * 1000)],
+            )
+        except Exception as e:
+            logger.warning("redis_rate_limit_failed", error=str(e))
+            return await self._fallback.take(key, limit, max_wait)
+
+        return bool(taken), wait_ms / 1000
+
+    async def close(self) -> None:
+        """Close the Redis connection."""
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+
+
+class WebSocketRateLimiter:
+    """Token-bucket limits for WebSocket handshakes and chat messages."""
+
+    def __init__(self, store: Optional[TokenBucketStore] = None) -> None:
+        if store is None:
+            store = (
+                RedisTokenBucketStore()
+                if settings.WS_RATE_LIMIT_USE_REDIS
+                else MemoryTokenBucketStore()
+            )
+        self.store = store
+        self.rejected_handshakes = 0
+        self.delayed_messages = 0
+        self.rejected_messages = 0
+
+    async def allow_handshake(self, client_ip: str) -> bool:
+        """Check a new connection against its client IP's handshake bucket."""
+        taken, _ = await self.store.take(f"handshake:{client_ip}", WS_HANDSHAKE_LIMIT, 0)
+        if not taken:
+            self.rejected_handshakes += 1
+            logger.warning("websocket_handshake_rate_limited", client_ip=client_ip)
+            return False
+        return True
+
+    async def acquire_message(
+        self, connection_id: str, session_id: str, client_ip: Optional[str]
+    ) -> Optional[float]:
+        """
+        Take a message token from the connection, session and client IP buckets.
+
+        Waits for up to MAX_MESSAGE_DELAY_SECONDS if the message is slightly
+        over a limit. Tokens taken before a rejecting bucket are not returned.
+
+        Returns:
+            None if the message may proceed, else the seconds after which the
+            client may retry
+        """
+        buckets = [
+            (f"conn:{connection_id}", WS_CONNECTION_MESSAGE_LIMIT),
+            (f"session:{session_id}", WS_SESSION_MESSAGE_LIMIT),
+        ]
+        if client_ip is not None:
+            buckets.append((f"ip:{client_ip}", WS_IP_MESSAGE_LIMIT))
+
+        delay = 0.0
+        for key, limit in buckets:
+            taken, wait = await self.store.take(key, limit, MAX_MESSAGE_DELAY_SECONDS)
+            if not taken:
+                self.rejected_messages += 1
+                logger.warning(
+                    "websocket_message_rate_limited",
+                    session_id=session_id,
+                    connection_id=connection_id,
+                    bucket=key.split(":", 1)[0],
+                )
+                # The bucket's token deficit: retrying then goes through at once
+                return float(math.ceil(wait))
+            delay = max(delay, wait)
+
+        if delay > 0:
+            self.delayed_messages += 1
+            await asyncio.sleep(delay)
+        return None
+
+    async def close(self) -> None:
+        """Close the store's connection, if any."""
+        if isinstance(self.store, RedisTokenBucketStore):
+            await self.store.close()
+
+
+@lru_cache
+def _get_trusted_networks(
+    trusted_proxies: tuple[str, ...],
+) -> tuple[ipaddress.IPv4Network | ipaddress.IPv6Network, ...]:
+    """Parse TRUSTED_PROXIES entries (IPs or CIDRs), skipping invalid ones."""
+    networks = []
+    for entry in trusted_proxies:
+        try:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+        except ValueError:
+            logger.warning("invalid_trusted_proxy_ignored", entry=entry)
+    return tuple(networks)
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    """Check whether an address belongs to a trusted proxy."""
+    networks = _get_trusted_networks(tuple(settings.trusted_proxies_list))
+    if not networks:
+        return False
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
 def get_identifier(request: Request) -> str:
     """
     Get rate limit identifier for a request.
 
-    Uses IP address from X-Forwarded-For header if available (for proxy/load balancer),
-    otherwise falls back to direct connection IP.
+    Uses the direct connection IP. When that is a trusted proxy
+    (TRUSTED_PROXIES), X-Forwarded-For is read from the right and the first
+    address not belonging to a trusted proxy is the client; entries further
+    left are supplied by the client and ignored.
 
     Args:
-        request: The incoming request
+        request: The incoming request (or WebSocket)
 
     Returns:
         str: The client identifier for rate limiting
     """
-    # Check for X-Forwarded-For header (proxy/load balancer)
+    client_ip = get_remote_address(request)
+    if not _is_trusted_proxy(client_ip):
+        return client_ip
+
     forwarded_for = request.headers.get("X-Forwarded-For")
     if forwarded_for:
-        # X-Forwarded-For can contain multiple IPs, use the first one (original client)
-        client_ip = forwarded_for.split(",")[0].strip()
+        for hop in reversed(forwarded_for.split(",")):
+            hop = hop.strip()
+            if not hop:
+                continue
+            client_ip = hop
+            if not _is_trusted_proxy(hop):
+                break
         logger.debug("rate_limit_identifier_from_header", ip=client_ip, header="X-Forwarded-For")
-        return client_ip
 
-    # Fall back to direct connection IP
-    client_ip = get_remote_address(request)
-    logger.debug("rate_limit_identifier_from_connection", ip=client_ip)
     return client_ip
 
 
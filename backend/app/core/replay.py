@@ -0,0 +1,411 @@
+"""
+Resumable WebSocket Streams
+
+Every outgoing session frame gets a monotonically increasing sequence
+number and is kept in a per-session ring buffer. A client that reconnects
+with ``last_seq`` gets the frames it missed replayed instead of losing the
+answer that was streaming when its socket dropped.
+
+Buffers live in process memory and can optionally be mirrored to a Redis
+stream so a reconnect that lands on another worker (or after a restart)
+can still be served.
+
+Consecutive stream deltas of one persona/object are merged as they are
+buffered, so a long answer takes a handful of buffer slots instead of one
+per token. A merged frame remembers where each delta ends, so a client
+whose ``last_seq`` falls inside it gets exactly the content it missed.
+"""
+
+import asyncio
+import time
+from array import array
+from collections import OrderedDict, deque
+from typing import Iterable, Optional
+
+import orjson
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Configuration
+REPLAY_BUFFER_FRAMES = 512  # Frames kept per session
+REPLAY_TTL_SECONDS = 300  # How long a disconnected session stays resumable
+MAX_RELEASED_BUFFERS = 2000  # Disconnected sessions kept for resumption
+REDIS_REPLAY_FLUSH_INTERVAL_SECONDS = 0.05  # Batching window for Redis mirror writes
+
+
+def frame_target(message: dict) -> tuple:
+    """Identify the chat bubble a frame belongs to (persona or object)."""
+    return (message.get("persona"), message.get("object_id"))
+
+
+def _merge_delta(
+    frame: dict, ends: Optional[array], message: dict
+) -> Optional[tuple[dict, array]]:
+    """
+    Merge a stamped stream delta into the buffered frame it directly follows.
+
+    ``ends`` holds the content length after each delta of a merged frame
+    (None for a single delta).
+
+    Returns:
+        The merged frame and its delta ends, or None if the delta needs its
+        own entry
+    """
+    if (
+        message.get("type") != "stream"
+        or frame.get("type") != "stream"
+        or message["seq"] != frame["seq"] + 1
+        or frame_target(frame) != frame_target(message)
+    ):
+        return None
+
+    if ends is None:
+        ends = array("I", [len(frame["content"])])
+    content = frame["content"] + message["content"]
+    ends.append(len(content))
+    return {**frame, "content": content, "seq": message["seq"]}, ends
+
+
+def _first_seq(frame: dict, ends: Optional[array]) -> int:
+    """Sequence number of the first delta in a (possibly merged) frame."""
+    return frame["seq"] - len(ends) + 1 if ends else frame["seq"]
+
+
+def _frames_after(
+    entries: Iterable[tuple[dict, Optional[array]]], last_seq: int
+) -> tuple[list[dict], bool]:
+    """
+    Get the frames newer than ``last_seq`` from buffered (frame, ends) entries.
+
+    A merged frame the client has partly seen is cut to the deltas after
+    ``last_seq``.
+
+    Returns:
+        The frames, and whether they cover everything the client missed
+    """
+    missed: list[dict] = []
+    oldest: Optional[int] = None
+    for frame, ends in entries:
+        first = _first_seq(frame, ends)
+        if oldest is None:
+            oldest = first
+        if frame["seq"] <= last_seq:
+            continue
+        if first <= last_seq:
+            frame = {**frame, "content": frame["content"][ends[last_seq - first] :]}
+        missed.append(frame)
+
+    complete = oldest is None or oldest <= last_seq + 1
+    return missed, complete
+
+
+class ReplayBuffer:
+    """Ring buffer of recent frames for one session."""
+
+    __slots__ = ("frames", "ends", "next_seq", "connections", "released_at")
+
+    def __init__(self, next_seq: int = 1, maxlen: int = REPLAY_BUFFER_FRAMES) -> None:
+        self.frames: deque[dict] = deque(maxlen=maxlen)
+        # Delta ends of each merged frame (None for single frames), kept aligned with frames
+        self.ends: deque[Optional[array]] = deque(maxlen=maxlen)
+        self.next_seq = next_seq
+        self.connections = 0
+        self.released_at = 0.0
+
+    def append(self, message: dict) -> dict:
+        """Stamp a frame with the next sequence number and keep it."""
+        frame = {**message, "seq": self.next_seq}
+        self.next_seq += 1
+        self._keep(frame)
+        return frame
+
+    def add(self, frame: dict) -> None:
+        """Keep a frame stamped by another worker, continuing its sequence."""
+        if frame["seq"] < self.next_seq:
+            return
+        self.next_seq = frame["seq"] + 1
+        self._keep(frame)
+
+    def _keep(self, frame: dict) -> None:
+        """Buffer a stamped frame, merging it into the previous delta if it continues it."""
+        if self.frames:
+            merged = _merge_delta(self.frames[-1], self.ends[-1], frame)
+            if merged is not None:
+                self.frames[-1], self.ends[-1] = merged
+                return
+        self.frames.append(frame)
+        self.ends.append(None)
+
+    def frames_after(self, last_seq: int) -> tuple[list[dict], bool]:
+        """
+        Get frames newer than ``last_seq``.
+
+        Returns:
+            The frames, and whether they cover everything the client missed
+        """
+        if last_seq >= self.next_seq:
+            # Client is ahead of us: the buffer was reset, send what we have
+            return list(self.frames), False
+
+        return _frames_after(zip(self.frames, self.ends), last_seq)
+
+
+class RedisReplayStream:
+    """
+    Mirror of replay buffers in Redis streams.
+
+    Writes are batched by a background flusher so Redis is never on the
+    per-token send path.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        maxlen: int = REPLAY_BUFFER_FRAMES,
+        ttl: int = REPLAY_TTL_SECONDS,
+    ) -> None:
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.maxlen = maxlen
+        self.ttl = ttl
+        self._redis: Optional[aioredis.Redis] = None
+        self._pending: list[tuple[str, dict]] = []
+        self._wakeup = asyncio.Event()
+        self._flusher_task: Optional[asyncio.Task] = None
+
+    def _get_key(self, session_id: str) -> str:
+        """Get Redis key for a session's replay stream."""
+        return f"ws:replay:{session_id}"
+
+    async def start(self) -> None:
+        """Connect to Redis and start the background flusher."""
+        if self._redis is not None:
+            return
+
+        self._redis = aioredis.from_url(self.redis_url, socket_connect_timeout=5)
+        self._flusher_task = asyncio.create_task(self._flush_loop())
+        logger.info("redis_replay_stream_started", url=self.redis_url)
+
+    async def stop(self) -> None:
+        """Flush pending frames and close the connection."""
+        if self._flusher_task:
+            self._flusher_task.cancel()
+            try:
+                await self._flusher_task
+            except asyncio.CancelledError:
+                pass
+            self._flusher_task = None
+
+        await self._flush()
+
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+            logger.info("redis_replay_stream_stopped")
+
+    def append(self, session_id: str, frame: dict) -> None:
+        """Queue a frame for the next batched write."""
+        self._pending.append((session_id, frame))
+        self._wakeup.set()
+
+    async def frames_after(self, session_id: str, last_seq: int) -> tuple[list[dict], bool]:
+        """
+        Read frames newer than ``last_seq`` from the stream.
+
+        Returns:
+            The frames, and whether they cover everything the client missed
+        """
+        if not self._redis:
+            return [], True
+
+        try:
+            entries = await self._redis.xrange(self._get_key(session_id))
+        except Exception as e:
+            logger.error("redis_replay_read_failed", session_id=session_id, error=str(e))
+            return [], True
+
+        return _frames_after(
+            (
+                (orjson.loads(fields[b"f"]), array("I", fields[b"e"]) if b"e" in fields else None)
+                for _, fields in entries
+            ),
+            last_seq,
+        )
+
+    async def last_seq(self, session_id: str) -> int:
+        """Get the newest sequence number stored for a session (0 if none)."""
+        if not self._redis:
+            return 0
+
+        try:
+            entries = await self._redis.xrevrange(self._get_key(session_id), count=1)
+        except Exception as e:
+            logger.error("redis_replay_read_failed", session_id=session_id, error=str(e))
+            return 0
+
+        if not entries:
+            return 0
+        return orjson.loads(entries[0][1][b"f"])["seq"]
+
+    async def _flush_loop(self) -> None:
+        """Write queued frames in pipelined batches."""
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                await asyncio.sleep(REDIS_REPLAY_FLUSH_INTERVAL_SECONDS)
+                await self._flush()
+        except asyncio.CancelledError:
+            pass
+
+    async def _flush(self) -> None:
+        """Write all queued frames in a single pipeline, merging stream deltas."""
+        if not self._pending or not self._redis:
+            return
+
+        batch, self._pending = self._pending, []
+        entries: dict[str, list[tuple[dict, Optional[array]]]] = {}
+        for session_id, frame in batch:
+            session_entries = entries.setdefault(session_id, [])
+            merged = _merge_delta(*session_entries[-1], frame) if session_entries else None
+            if merged is not None:
+                session_entries[-1] = merged
+            else:
+                session_entries.append((frame, None))
+
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                touched = set()
+                for session_id, session_entries in entries.items():
+                    key = self._get_key(session_id)
+                    for frame, ends in session_entries:
+                        fields = {"f": orjson.dumps(frame)}
+                        if ends is not None:
+                            fields["e"] = ends.tobytes()
+                        pipe.xadd(key, fields, maxlen=self.maxlen, approximate=True)
+                    touched.add(key)
+                for key in touched:
+                    pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.error("redis_replay_write_failed", frames=len(batch), error=str(e))
+
+
+class ReplayStore:
+    """
+    Per-session replay buffers.
+
+    Buffers of connected sessions are always kept. Once a session's last
+    connection closes, its buffer stays resumable for REPLAY_TTL_SECONDS
+    (up to MAX_RELEASED_BUFFERS sessions, least recently released first out).
+    """
+
+    def __init__(self, redis_stream: Optional[RedisReplayStream] = None) -> None:
+        self._buffers: dict[str, ReplayBuffer] = {}
+        # Released (disconnected) sessions in release order
+        self._released: OrderedDict[str, None] = OrderedDict()
+        self.redis_stream = redis_stream
+
+    async def start(self) -> None:
+        """Start the optional Redis mirror."""
+        if self.redis_stream:
+            await self.redis_stream.start()
+
+    async def stop(self) -> None:
+        """Stop the optional Redis mirror."""
+        if self.redis_stream:
+            await self.redis_stream.stop()
+
+    def _get_buffer(self, session_id: str) -> ReplayBuffer:
+        """Get or create the buffer for a session."""
+        buffer = self._buffers.get(session_id)
+        if buffer is None:
+            # Frames for a session without live connections: keep it prunable
+            buffer = self._buffers[session_id] = ReplayBuffer()
+            buffer.released_at = time.monotonic()
+            self._released[session_id] = None
+        return buffer
+
+    async def acquire(self, session_id: str) -> None:
+        """Mark a session as having one more live connection."""
+        buffer = self._buffers.get(session_id)
+        if buffer is None:
+            # Continue the sequence stored in Redis (e.g. reconnect on another worker)
+            next_seq = 1
+            if self.redis_stream:
+                next_seq = await self.redis_stream.last_seq(session_id) + 1
+            buffer = self._buffers.setdefault(session_id, ReplayBuffer(next_seq=next_seq))
+
+        buffer.connections += 1
+        self._released.pop(session_id, None)
+        self._prune()
+
+    def release(self, session_id: str) -> None:
+        """Mark a session as having one less live connection."""
+        buffer = self._buffers.get(session_id)
+        if buffer is None:
+            return
+
+        buffer.connections = max(0, buffer.connections - 1)
+        if buffer.connections == 0:
+            buffer.released_at = time.monotonic()
+            self._released[session_id] = None
+            self._released.move_to_end(session_id)
+        self._prune()
+
+    def record(self, session_id: str, message: dict) -> dict:
+        """
+        Stamp a session frame with its sequence number and buffer it.
+
+        Returns:
+            The stamped frame to send
+        """
+        frame = self._get_buffer(session_id).append(message)
+        if self.redis_stream:
+            self.redis_stream.append(session_id, frame)
+        return frame
+
+    def observe(self, session_id: str, frame: dict) -> None:
+        """
+        Buffer a frame another worker stamped and published for a session.
+
+        Later local frames continue its sequence. The publishing worker
+        already mirrored it to Redis.
+        """
+        self._get_buffer(session_id).add(frame)
+
+    async def frames_after(self, session_id: str, last_seq: int) -> tuple[list[dict], bool]:
+        """
+        Get the frames a reconnecting client missed.
+
+        Returns:
+            The frames, and whether they cover the whole gap since ``last_seq``
+        """
+        buffer = self._buffers.get(session_id)
+        if buffer is not None and buffer.frames:
+            return buffer.frames_after(last_seq)
+
+        if self.redis_stream:
+            return await self.redis_stream.frames_after(session_id, last_seq)
+
+        return [], True
+
+    def get_buffer_count(self) -> int:
+        """Get the number of sessions with a replay buffer."""
+        return len(self._buffers)
+
+    def _prune(self) -> None:
+        """Drop expired or excess released buffers (oldest first)."""
+        cutoff = time.monotonic() - REPLAY_TTL_SECONDS
+        while self._released:
+            session_id = next(iter(self._released))
+            buffer = self._buffers.get(session_id)
+            if buffer is not None and buffer.connections == 0:
+                expired = buffer.released_at < cutoff
+                if not expired and len(self._released) <= MAX_RELEASED_BUFFERS:
+                    break
+                del self._buffers[session_id]
+            del self._released[session_id]
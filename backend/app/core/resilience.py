@@ -10,6 +10,8 @@ from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any, Callable, Optional
 
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
 from tenacity import (
     AsyncRetrying,
     retry_if_exception_type,
@@ -220,10 +222,14 @@ def get_redis_retry_config():
         AsyncRetrying: Configured retry instance
     """
     return AsyncRetrying(
-        # Retry on connection errors
-        retry=retry_if_exception_type((ConnectionError, TimeoutError)),
+        # Retry on connection errors (redis-py raises its own exception types)
+        retry=retry_if_exception_type(
+            (ConnectionError, TimeoutError, RedisConnectionError, RedisTimeoutError)
+        ),
         # Stop after 2 attempts (Redis should be fast)
         stop=stop_after_attempt(2),
+        # Surface the original error, not tenacity's RetryError
+        reraise=True,
         # Shorter backoff for Redis: 0.5s, 1s
         wait=wait_exponential(multiplier=0.5, min=0.5, max=2),
         # Callback on retry
@@ -238,6 +244,7 @@ def get_redis_retry_config():
 # Global circuit breakers
 _llm_circuit_breaker: Optional[CircuitBreaker] = None
 _redis_circuit_breaker: Optional[CircuitBreaker] = None
+_sqlite_circuit_breaker: Optional[CircuitBreaker] = None
 
 
 def get_llm_circuit_breaker() -> CircuitBreaker:
@@ -274,3 +281,21 @@ def get_redis_circuit_breaker() -> CircuitBreaker:
             name="redis",
         )
     return _redis_circuit_breaker
+
+
+def get_sqlite_circuit_breaker() -> CircuitBreaker:
+    """
+    Get global SQLite circuit breaker instance.
+
+    Returns:
+        CircuitBreaker: Singleton instance for SQLite conversation storage calls
+    """
+    global _sqlite_circuit_breaker
+    if _sqlite_circuit_breaker is None:
+        _sqlite_circuit_breaker = CircuitBreaker(
+            failure_threshold=3,  # Open after 3 failures (disk full, locked database)
+            recovery_timeout=30,  # Wait 30s before retry
+            half_open_max_calls=1,  # Test with 1 call
+            name="sqlite",
+        )
+    return _sqlite_circuit_breaker
@@ -0,0 +1,124 @@
+"""
+Timer Scheduler
+
+One task drives any number of timers from a min-heap, so per-connection
+housekeeping (heartbeats, idle expiry) costs a heap entry instead of a
+sleeping task per connection.
+
+- Scheduling and cancelling are O(log n) / O(1); each wakeup only touches
+  the timers that are due
+- Cancelled timers are dropped lazily when they reach the top of the heap
+- Timers due within TIMER_RESOLUTION_SECONDS of each other fire together
+- Callbacks are plain functions run on the scheduler task; they must not
+  block (start a task for async work)
+"""
+
+import asyncio
+import heapq
+import time
+from typing import Any, Callable, Optional
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Configuration
+TIMER_RESOLUTION_SECONDS = 0.05  # Timers due this close together fire in one wakeup
+
+
+class TimerHandle:
+    """A scheduled callback; cancel() prevents it from running."""
+
+    __slots__ = ("deadline", "callback", "args", "cancelled")
+
+    def __init__(self, deadline: float, callback: Callable[..., Any], args: tuple) -> None:
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Cancel the timer (no-op if it already fired)."""
+        self.cancelled = True
+
+
+class TimerHeap:
+    """Min-heap of timers driven by a single asyncio task."""
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, TimerHandle]] = []
+        # Scheduling order: tie-breaker so handles themselves are never compared
+        self._next_id = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.fired = 0
+
+    def __len__(self) -> int:
+        """Number of scheduled timers (including cancelled ones not yet dropped)."""
+        return len(self._heap)
+
+    async def start(self) -> None:
+        """Start the scheduler task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the scheduler task and drop every timer."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._heap.clear()
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> TimerHandle:
+        """
+        Schedule ``callback(*args)`` to run after ``delay`` seconds.
+
+        Returns:
+            TimerHandle: Handle to cancel the timer
+        """
+        handle = TimerHandle(time.monotonic() + delay, callback, args)
+        heapq.heappush(self._heap, (handle.deadline, self._next_id, handle))
+        self._next_id += 1
+        if self._heap[0][2] is handle:
+            # New earliest deadline: make the scheduler recompute its sleep
+            self._wakeup.set()
+        return handle
+
+    async def _run(self) -> None:
+        """Sleep until the earliest deadline, then fire every due timer."""
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._fire_due()
+
+    def _fire_due(self) -> None:
+        """Run the callbacks of every timer due now (within the resolution)."""
+        horizon = time.monotonic() + TIMER_RESOLUTION_SECONDS
+        # Timers scheduled by these callbacks wait for the next wakeup
+        scheduled_before = self._next_id
+        while self._heap and self._heap[0][0] <= horizon and self._heap[0][1] < scheduled_before:
+            _, _, handle = heapq.heappop(self._heap)
+            if handle.cancelled:
+                continue
+            handle.cancelled = True
+            self.fired += 1
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                logger.error("timer_callback_failed", error=str(e))
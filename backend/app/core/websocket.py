@@ -2,41 +2,255 @@
 Enhanced WebSocket Connection Manager
 
 Features:
-- Connection health monitoring with ping/pong
-- TTL-based connection cleanup
-- Connection limits per client
+- Connection health monitoring: pings must be answered with a pong within
+  HEARTBEAT_TIMEOUT_SECONDS; the round-trip time is kept per connection
+- Idle TTL expiry
+- One scheduler task (see app.core.timers) drives pings and expiry for
+  every connection
+- Connection limits per session, per client IP and in total
+- Token-bucket rate limits for handshakes and chat messages (see
+  app.core.rate_limit)
+- Several sockets (tabs) per session, indexed by connection id; one
+  generation at a time per session channel, streamed to all of them
+- Admission of generations by active LLM turns and event-loop lag (see
+  app.core.admission); waiting sessions get ``queued`` frames
 - Automatic stale connection removal
+- Bounded per-connection send queue drained by a dedicated writer task
+- Stream frame coalescing within a short, per-connection time/size window
+- orjson-encoded JSON frames, or MessagePack via subprotocol negotiation
+  (see app.core.frames)
+- Sequence-numbered frames with replay on reconnect (see app.core.replay)
+- Optional cross-worker delivery of session frames over Redis pub/sub
+  (see app.core.fanout)
+- Drain mode for deploys: no new connections or turns, in-flight turns
+  finish, clients get a ``reconnect`` hint before the worker shuts down
 """
 
 import asyncio
+import time
+from collections import deque
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime
+from typing import AsyncIterator, Callable, Hashable, MutableSequence, Optional
+from uuid import uuid4
 
-from fastapi import WebSocket
+from fastapi import WebSocket, WebSocketDisconnect
 
+from app.core.admission import AdmissionController
+from app.core.config import settings
+from app.core.fanout import RedisFanout
+from app.core.frames import DEFAULT_CODEC, FrameCodec, negotiate_codec
 from app.core.logging import get_logger
+from app.core.rate_limit import WebSocketRateLimiter, get_identifier
+from app.core.replay import RedisReplayStream, ReplayStore, frame_target
+from app.core.timers import TimerHandle, TimerHeap
 
 logger = get_logger(__name__)
 
 # Configuration
-MAX_CONNECTIONS_PER_CLIENT = 5  # Max concurrent connections per session
-MAX_TOTAL_CONNECTIONS = 1000  # Total connection limit
-CONNECTION_TTL_SECONDS = 3600  # 1 hour idle timeout
-HEARTBEAT_INTERVAL_SECONDS = 30  # Ping interval
-HEARTBEAT_TIMEOUT_SECONDS = 10  # Pong timeout
+MAX_CONNECTIONS_PER_SESSION = 5  # Max concurrent connections (tabs) per session
+MAX_CONNECTIONS_PER_IP = 20  # Max concurrent connections per client address
+MAX_TOTAL_CONNECTIONS = 5000  # Memory backstop; LLM load is admitted per turn
+CONNECTION_TTL_SECONDS = 3600  # 1 hour without frames in either direction
+HEARTBEAT_INTERVAL_SECONDS = 20  # Ping interval
+HEARTBEAT_TIMEOUT_SECONDS = 5  # Max time for the client's pong to arrive
+SEND_QUEUE_MAX_FRAMES = 256  # Outgoing frames buffered per connection
+SLOW_CONSUMER_TIMEOUT_SECONDS = 10  # Max wait for queue space before dropping a client
+DEFAULT_COALESCE_WINDOW_MS = 30  # Merge stream deltas arriving within this window
+MAX_COALESCE_WINDOW_MS = 200  # Upper bound for client-provided window hints
+COALESCE_MAX_CHARS = 2048  # Flush a coalesced batch once it carries this much text
+DRAIN_TIMEOUT_SECONDS = 30  # Max wait for in-flight generations when draining
+DRAIN_POLL_INTERVAL_SECONDS = 0.1
+
+
+# Queued by the heartbeat and written as the codec's pre-encoded ping frame
+PING_FRAME = {"type": "ping"}
+# Client reply to a ping; consumed by receive_message
+PONG_TYPE = "pong"
+# Sent to a session once it has no generation in flight on a draining worker
+RECONNECT_FRAME = {"type": "reconnect", "content": ""}
+# Sent instead of starting a generation on a draining worker
+RECONNECT_RESEND_FRAME = {
+    "type": "reconnect",
+    "content": "The server is restarting. Please send your message again in a moment.",
+}
+# Sent instead of a generation when the admission queue is full
+BUSY_FRAME = {
+    "type": "error",
+    "content": "The assistant is very busy right now. Please try again in a minute.",
+}
+
+
+def _coalesce_stream(frames: MutableSequence[dict], message: dict) -> bool:
+    """
+    Merge a stream delta into the last pending frame if it continues it.
+
+    Only a directly preceding stream frame of the same persona/object is
+    extended, so every merged frame covers a contiguous range of sequence
+    numbers and carries the newest one. Merging across interleaved
+    personas would leave gaps that make resumption lossy.
+
+    Returns:
+        bool: True if the delta was merged, False if it needs its own frame
+    """
+    if message.get("type") != "stream" or not frames:
+        return False
+
+    pending = frames[-1]
+    if pending.get("type") != "stream" or frame_target(pending) != frame_target(message):
+        return False
+
+    merged = {**pending, "content": pending["content"] + message["content"]}
+    if "seq" in message:
+        merged["seq"] = message["seq"]
+    frames[-1] = merged
+    return True
+
+
+def resolve_coalesce_window(hint_ms: Optional[int]) -> float:
+    """
+    Resolve a client coalescing hint (milliseconds) to a window in seconds.
+
+    Missing hints use DEFAULT_COALESCE_WINDOW_MS; values are clamped to
+    [0, MAX_COALESCE_WINDOW_MS]. A hint of 0 disables coalescing.
+    """
+    if hint_ms is None:
+        hint_ms = DEFAULT_COALESCE_WINDOW_MS
+    return max(0, min(hint_ms, MAX_COALESCE_WINDOW_MS)) / 1000
+
+
+class SendQueue:
+    """
+    Bounded queue of outgoing frames for a single connection.
+
+    When the queue is full, a new ``stream`` delta that continues the last
+    queued frame is merged into it instead of taking a new slot. Other
+    frames wait for space (backpressure).
+    """
+
+    def __init__(self, maxsize: int = SEND_QUEUE_MAX_FRAMES) -> None:
+        self.maxsize = maxsize
+        self._frames: deque[dict] = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self.coalesced_count = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def put_nowait(self, message: dict) -> bool:
+        """
+        Queue a frame without waiting.
+
+        Returns:
+            bool: True if the frame was queued or merged, False if the queue is full
+        """
+        if len(self._frames) < self.maxsize:
+            self._frames.append(message)
+            self._not_empty.set()
+            return True
+
+        self._not_full.clear()
+        if _coalesce_stream(self._frames, message):
+            self.coalesced_count += 1
+            return True
+        return False
 
+    def extend(self, messages: list[dict]) -> None:
+        """Queue frames regardless of capacity (used for bounded replays)."""
+        self._frames.extend(messages)
+        if self._frames:
+            self._not_empty.set()
 
-@dataclass
+    async def put(self, message: dict, timeout: float = SLOW_CONSUMER_TIMEOUT_SECONDS) -> bool:
+        """
+        Queue a frame, waiting up to ``timeout`` seconds for space.
+
+        Returns:
+            bool: True if the frame was queued or merged, False on timeout
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        while not self.put_nowait(message):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._not_full.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return False
+
+        return True
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """
+        Wait for and remove the oldest queued frame.
+
+        Returns:
+            The frame, or None if ``timeout`` elapsed with the queue empty
+        """
+        while not self._frames:
+            self._not_empty.clear()
+            try:
+                await asyncio.wait_for(self._not_empty.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+
+        message = self._frames.popleft()
+        self._not_full.set()
+        return message
+
+
+async def _cancel_task(task: Optional[asyncio.Task]) -> None:
+    """Cancel a background task and wait for it, unless it is the current task."""
+    if task is None or task.done() or task is asyncio.current_task():
+        return
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+@dataclass(slots=True)
 class ConnectionInfo:
     """Information about a WebSocket connection."""
 
     websocket: WebSocket
     session_id: str
+    connection_id: str = field(default_factory=lambda: uuid4().hex)
+    client_ip: Optional[str] = None
     connected_at: datetime = field(default_factory=datetime.utcnow)
-    last_activity: datetime = field(default_factory=datetime.utcnow)
+    # time.monotonic() of the last frame received or sent (pings and pongs excluded)
+    last_activity: float = field(default_factory=time.monotonic)
+    # time.monotonic() when the last ping was queued, written, and answered
+    ping_sent_at: float = 0.0
+    ping_written_at: float = 0.0
+    pong_received_at: float = 0.0
+    rtt_ms: Optional[float] = None  # Round-trip time of the last answered ping
     is_alive: bool = True
-    heartbeat_task: Optional[asyncio.Task] = None
+    # Whether receive_message is waiting for a frame; pongs are only read then
+    receiving: bool = False
+    timer: Optional[TimerHandle] = None  # Next heartbeat or liveness check
+    send_queue: SendQueue = field(default_factory=SendQueue)
+    writer_task: Optional[asyncio.Task] = None
+    coalesce_window: float = DEFAULT_COALESCE_WINDOW_MS / 1000
+    codec: FrameCodec = DEFAULT_CODEC
+    closed: bool = False
+
+
+@dataclass(slots=True)
+class SessionGenerations:
+    """Generations running or waiting for one session conversation."""
+
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # Generations holding or waiting for the lock
+    waiting: int = 0
+    # Message ids of those generations (generations without one are not listed)
+    keys: set = field(default_factory=set)
 
 
 class ConnectionManager:
@@ -44,259 +258,732 @@ class ConnectionManager:
     Manage WebSocket connections with health monitoring and cleanup.
 
     Features:
-    - Per-client connection limits
-    - Automatic cleanup of stale connections
-    - Health monitoring with ping/pong
-    - TTL-based connection expiry
+    - Per-session, per-IP and total connection limits, checked in O(1)
+    - Several sockets per session (e.g. browser tabs); session frames go to all of them
+    - One LLM generation at a time per session channel, shared by all of its sockets
+    - Health monitoring with pings and idle TTL expiry, driven by one timer task
+    - Per-connection writer task so slow sockets never block LLM streaming
+    - Replay of missed frames when a client reconnects with ``last_seq``
+    - Session frames published to other workers when WS_FANOUT_USE_REDIS is set
+    - Drain mode (``drain``) so deploys do not cut answers mid-stream
     """
 
     def __init__(self) -> None:
-        # Map: session_id -> ConnectionInfo
-        self.active_connections: dict[str, ConnectionInfo] = {}
-        # Background cleanup task
-        self._cleanup_task: Optional[asyncio.Task] = None
+        # Map: connection_id -> ConnectionInfo
+        self.connections: dict[str, ConnectionInfo] = {}
+        # Indexes: session_id -> connection ids, client IP -> connection count
+        self._session_connections: dict[str, set[str]] = {}
+        self._ip_connections: dict[str, int] = {}
+        # Generations per (session, channel) (only while one is running)
+        self._generations: dict[tuple[str, Optional[str]], SessionGenerations] = {}
+        self.duplicate_generations = 0
+        # LLM turns admitted by load rather than by connection count
+        self.admission = AdmissionController()
+        self.rate_limiter = WebSocketRateLimiter()
+        # Sequence numbers and replay buffers per session
+        self.replay = ReplayStore(
+            redis_stream=RedisReplayStream() if settings.WS_REPLAY_USE_REDIS else None
+        )
+        # Delivery of session frames to sockets held by other workers
+        self.fanout = RedisFanout() if settings.WS_FANOUT_USE_REDIS else None
+        # Heartbeat and idle-expiry timers for every connection
+        self._timers = TimerHeap()
+        self._closing_tasks: set[asyncio.Task] = set()
+        self._drain_task: Optional[asyncio.Task] = None
+        self._draining = False
         self._is_running = False
 
+    @property
+    def draining(self) -> bool:
+        """Whether the manager is draining (no new connections or turns)."""
+        return self._draining
+
     async def start(self) -> None:
         """Start the connection manager background tasks."""
         if self._is_running:
             return
 
         self._is_running = True
-        self._cleanup_task = asyncio.create_task(self._periodic_cleanup())
+        await self.replay.start()
+        if self.fanout:
+            await self.fanout.start(self._on_remote_frame)
+        await self.admission.start()
+        await self._timers.start()
         logger.info("connection_manager_started")
 
     async def stop(self) -> None:
         """Stop the connection manager and cleanup all connections."""
         self._is_running = False
+        await _cancel_task(self._drain_task)
+        await self._timers.stop()
+        await self.admission.stop()
+
+        # Close all connections (1012: clients were told to reconnect elsewhere)
+        if self._draining:
+            code, reason = 1012, "Service restarting"
+        else:
+            code, reason = 1001, "Server shutting down"
+        for conn_info in list(self.connections.values()):
+            await self._close_connection(conn_info, code=code, reason=reason)
+        if self._closing_tasks:
+            await asyncio.gather(*self._closing_tasks, return_exceptions=True)
+
+        if self.fanout:
+            await self.fanout.stop()
+        await self.replay.stop()
+        await self.rate_limiter.close()
+        logger.info("connection_manager_stopped")
 
-        # Cancel cleanup task
-        if self._cleanup_task:
-            self._cleanup_task.cancel()
-            try:
-                await self._cleanup_task
-            except asyncio.CancelledError:
-                pass
+    def begin_drain(self, timeout: float = DRAIN_TIMEOUT_SECONDS) -> asyncio.Task:
+        """
+        Start draining in the background (idempotent).
 
-        # Close all connections
-        for session_id in list(self.active_connections.keys()):
-            await self._close_connection(session_id, code=1001, reason="Server shutting down")
+        Returns:
+            The drain task; it finishes once in-flight generations are done
+            or ``timeout`` seconds have passed
+        """
+        if self._drain_task is None:
+            self._drain_task = asyncio.create_task(self._drain(timeout))
+        return self._drain_task
 
-        logger.info("connection_manager_stopped")
+    async def drain(self, timeout: float = DRAIN_TIMEOUT_SECONDS) -> None:
+        """Drain and wait for it to finish (see ``begin_drain``); call ``stop`` after."""
+        await asyncio.shield(self.begin_drain(timeout))
 
-    async def connect(self, websocket: WebSocket, session_id: str) -> bool:
+    async def _drain(self, timeout: float) -> None:
+        """Refuse new work, hint idle sessions to reconnect, and wait for generations."""
+        self._draining = True
+        logger.info(
+            "connection_manager_draining",
+            connections=len(self.connections),
+            generations=len(self._generations),
+        )
+
+        # Idle sessions can move to another worker right away; the others are
+        # told when their last generation finishes (see run_generation)
+        busy_sessions = {session_id for session_id, _ in self._generations}
+        idle_sessions = [
+            session_id
+            for session_id in self._session_connections
+            if session_id not in busy_sessions
+        ]
+        await asyncio.gather(
+            *(self.send_message(session_id, RECONNECT_FRAME) for session_id in idle_sessions)
+        )
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._generations and loop.time() < deadline:
+            await asyncio.sleep(DRAIN_POLL_INTERVAL_SECONDS)
+
+        logger.info(
+            "connection_manager_drained",
+            connections=len(self.connections),
+            unfinished_generations=len(self._generations),
+        )
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        coalesce_ms: Optional[int] = None,
+        last_seq: Optional[int] = None,
+    ) -> Optional[str]:
         """
         Accept and store a WebSocket connection.
 
+        Args:
+            websocket: The WebSocket to accept
+            session_id: Session identifier
+            coalesce_ms: Client hint for the stream coalescing window
+            last_seq: Last sequence number the client received, to resume a stream
+
+        Returns:
+            The new connection's id, or None if it was rejected (limits exceeded
+            or draining)
+        """
+        if self._draining:
+            await websocket.close(code=1012, reason="Service restarting")
+            return None
+
+        client_ip = get_identifier(websocket)
+        rejection = self._check_limits(session_id, client_ip)
+        if rejection is None and not await self.rate_limiter.allow_handshake(client_ip):
+            rejection = "Too many connection attempts"
+        if rejection is not None:
+            await websocket.close(code=1008, reason=rejection)
+            return None
+
+        # Accept the connection with the negotiated subprotocol
+        subprotocol, codec = negotiate_codec(websocket.scope.get("subprotocols", []))
+        await websocket.accept(subprotocol=subprotocol)
+
+        # Create connection info
+        conn_info = ConnectionInfo(
+            websocket=websocket,
+            session_id=session_id,
+            client_ip=client_ip,
+            coalesce_window=resolve_coalesce_window(coalesce_ms),
+            codec=codec,
+        )
+
+        await self.replay.acquire(session_id)
+
+        # Queue missed frames, then register. Reading a local buffer does not
+        # suspend, so no live frame can slip in between replay and registration.
+        if last_seq is not None:
+            await self._queue_replay(conn_info, last_seq)
+
+        # Store connection
+        self._register(conn_info)
+        if self.fanout and len(self._session_connections[session_id]) == 1:
+            await self.fanout.subscribe(session_id)
+
+        # Start the writer task and the heartbeat timer
+        conn_info.writer_task = asyncio.create_task(self._writer_loop(conn_info))
+        self._schedule_heartbeat(conn_info, HEARTBEAT_INTERVAL_SECONDS)
+
+        logger.info(
+            "websocket_connected",
+            session_id=session_id,
+            connection_id=conn_info.connection_id,
+            subprotocol=subprotocol,
+            resumed=last_seq is not None,
+            session_connections=len(self._session_connections[session_id]),
+            total_connections=len(self.connections),
+        )
+
+        return conn_info.connection_id
+
+    def _check_limits(self, session_id: str, client_ip: str) -> Optional[str]:
+        """
+        Check the connection limits for a new socket.
+
         Returns:
-            bool: True if connection was accepted, False if rejected (limits exceeded)
+            The close reason if the connection must be rejected, else None
         """
-        # Check total connection limit
-        if len(self.active_connections) >= MAX_TOTAL_CONNECTIONS:
+        total_connections = len(self.connections)
+        if total_connections >= MAX_TOTAL_CONNECTIONS:
             logger.warning(
                 "connection_limit_exceeded",
                 session_id=session_id,
-                total_connections=len(self.active_connections),
+                total_connections=total_connections,
                 max_allowed=MAX_TOTAL_CONNECTIONS,
             )
-            await websocket.close(code=1008, reason="Server at capacity")
-            return False
+            return "Server at capacity"
 
-        # Check per-client connection limit
-        existing_connections = sum(
-            1 for conn in self.active_connections.values() if conn.session_id == session_id
-        )
-        if existing_connections >= MAX_CONNECTIONS_PER_CLIENT:
+        session_connections = len(self._session_connections.get(session_id, ()))
+        if session_connections >= MAX_CONNECTIONS_PER_SESSION:
             logger.warning(
                 "client_connection_limit_exceeded",
                 session_id=session_id,
-                client_connections=existing_connections,
-                max_allowed=MAX_CONNECTIONS_PER_CLIENT,
+                client_connections=session_connections,
+                max_allowed=MAX_CONNECTIONS_PER_SESSION,
             )
-            await websocket.close(code=1008, reason="Too many connections from this client")
-            return False
+            return "Too many connections from this client"
 
-        # Accept the connection
-        await websocket.accept()
+        ip_connections = self._ip_connections.get(client_ip, 0)
+        if ip_connections >= MAX_CONNECTIONS_PER_IP:
+            logger.warning(
+                "ip_connection_limit_exceeded",
+                session_id=session_id,
+                client_ip=client_ip,
+                ip_connections=ip_connections,
+                max_allowed=MAX_CONNECTIONS_PER_IP,
+            )
+            return "Too many connections from this address"
 
-        # Create connection info
-        conn_info = ConnectionInfo(websocket=websocket, session_id=session_id)
+        return None
 
-        # Start heartbeat task
-        conn_info.heartbeat_task = asyncio.create_task(
-            self._heartbeat_loop(session_id, conn_info)
+    def _register(self, conn_info: ConnectionInfo) -> None:
+        """Add a connection to every index."""
+        self.connections[conn_info.connection_id] = conn_info
+        self._session_connections.setdefault(conn_info.session_id, set()).add(
+            conn_info.connection_id
         )
+        if conn_info.client_ip is not None:
+            self._ip_connections[conn_info.client_ip] = (
+                self._ip_connections.get(conn_info.client_ip, 0) + 1
+            )
 
-        # Store connection
-        self.active_connections[session_id] = conn_info
+    def _unregister(self, conn_info: ConnectionInfo) -> None:
+        """Remove a connection from every index."""
+        if self.connections.pop(conn_info.connection_id, None) is None:
+            return
 
-        logger.info(
-            "websocket_connected",
-            session_id=session_id,
-            total_connections=len(self.active_connections),
-        )
+        connection_ids = self._session_connections.get(conn_info.session_id)
+        if connection_ids is not None:
+            connection_ids.discard(conn_info.connection_id)
+            if not connection_ids:
+                del self._session_connections[conn_info.session_id]
 
-        return True
+        if conn_info.client_ip is not None:
+            remaining = self._ip_connections.get(conn_info.client_ip, 0) - 1
+            if remaining > 0:
+                self._ip_connections[conn_info.client_ip] = remaining
+            else:
+                self._ip_connections.pop(conn_info.client_ip, None)
 
-    async def disconnect(self, session_id: str) -> None:
-        """Remove and cleanup a WebSocket connection."""
-        await self._close_connection(session_id)
+    async def disconnect(self, connection_id: str) -> None:
+        """
+        Remove and cleanup a WebSocket connection.
+
+        Args:
+            connection_id: The connection to close (other sockets of its session stay open)
+        """
+        conn_info = self.connections.get(connection_id)
+        if conn_info:
+            await self._close_connection(conn_info)
 
     async def send_message(self, session_id: str, message: dict) -> bool:
         """
-        Send a message to a specific connection.
+        Stamp a message with its sequence number and queue it for every socket of a session.
+
+        The frame is recorded for replay even if the session is currently
+        disconnected, so a client that reconnects with ``last_seq`` gets it.
+        The frame is written by each connection's writer task. A connection
+        that stays behind for longer than SLOW_CONSUMER_TIMEOUT_SECONDS even
+        after stream deltas are coalesced is dropped. With fan-out enabled the
+        frame is also published for sockets of the session on other workers.
 
         Returns:
-            bool: True if message was sent successfully, False otherwise
+            bool: True if message was queued for at least one connection (or
+            published to other workers), False otherwise
         """
-        conn_info = self.active_connections.get(session_id)
-        if not conn_info:
+        frame = self.replay.record(session_id, message)
+        if self.fanout:
+            self.fanout.publish(session_id, frame)
+
+        connection_ids = self._session_connections.get(session_id)
+        if not connection_ids:
+            return self.fanout is not None
+
+        if len(connection_ids) == 1:
+            (connection_id,) = connection_ids
+            return await self._deliver(self.connections[connection_id], frame)
+
+        conns = [self.connections[connection_id] for connection_id in connection_ids]
+        results = await asyncio.gather(*(self._deliver(conn_info, frame) for conn_info in conns))
+        return any(results) or self.fanout is not None
+
+    async def acquire_message(self, connection_id: str) -> Optional[float]:
+        """
+        Apply the message rate limits to a connection's next chat message.
+
+        May wait briefly if the message is slightly over a limit.
+
+        Returns:
+            None if the message may proceed, else the seconds after which the
+            client may retry
+        """
+        conn_info = self.connections.get(connection_id)
+        if conn_info is None:
+            return None
+        return await self.rate_limiter.acquire_message(
+            connection_id, conn_info.session_id, conn_info.client_ip
+        )
+
+    async def run_generation(
+        self,
+        session_id: str,
+        key: Optional[Hashable],
+        stream: Callable[[], AsyncIterator[dict]],
+        channel: Optional[str] = None,
+        conversation: Optional[str] = None,
+    ) -> bool:
+        """
+        Run a generation for a session and send its frames to every socket of it.
+
+        Generations of a session conversation run one at a time, so turns
+        sent from several tabs neither interleave their frames nor race on
+        the conversation history; different conversations run side by side.
+        A generation whose key is already running or waiting in its
+        conversation (the same message resent, e.g. after a reconnect) is
+        skipped: its frames already reach every tab.
+
+        Each generation is also admitted by the worker's AdmissionController.
+        While it waits for capacity the session gets ``queued`` frames with
+        its position and ETA; if the queue is full it gets an error frame.
+        On a draining worker no generation starts; the session is told to
+        reconnect and resend instead.
+
+        Args:
+            session_id: Session identifier
+            key: Identifies the request (e.g. the client's message id); None
+                is never a duplicate
+            stream: Starts the generation; yields the frames to send
+            channel: Logical channel of a multiplexed connection; when given,
+                every frame sent for the generation carries it
+            conversation: History the generation writes to, which it locks
+                (defaults to ``channel``)
+
+        Returns:
+            bool: True if the generation ran, False if it was a duplicate or rejected
+        """
+
+        async def send(frame: dict) -> None:
+            if channel is not None:
+                frame = {**frame, "channel": channel}
+            await self.send_message(session_id, frame)
+
+        if self._draining:
+            await send(RECONNECT_RESEND_FRAME)
             return False
 
+        generations_key = (session_id, conversation if conversation is not None else channel)
+        generations = self._generations.get(generations_key)
+        if generations is not None and key is not None and key in generations.keys:
+            self.duplicate_generations += 1
+            logger.info("duplicate_generation_skipped", session_id=session_id, channel=channel)
+            return False
+
+        async def on_queued(position: int, eta_seconds: float) -> None:
+            await send(
+                {
+                    "type": "queued",
+                    "content": "",
+                    "position": position,
+                    "eta_seconds": round(eta_seconds),
+                }
+            )
+
         try:
-            await conn_info.websocket.send_json(message)
-            # Update last activity time
-            conn_info.last_activity = datetime.utcnow()
+            if generations is None:
+                generations = self._generations[generations_key] = SessionGenerations()
+            generations.waiting += 1
+            if key is not None:
+                generations.keys.add(key)
+            async with generations.lock:
+                if not await self.admission.acquire(on_queued):
+                    await send(BUSY_FRAME)
+                    return False
+
+                started_at = time.monotonic()
+                try:
+                    async for frame in stream():
+                        await send(frame)
+                finally:
+                    self.admission.release(time.monotonic() - started_at)
+        finally:
+            generations.waiting -= 1
+            generations.keys.discard(key)
+            if not generations.waiting:
+                # Nothing waits on the lock any more
+                del self._generations[generations_key]
+                if self._draining and not any(
+                    busy_session == session_id for busy_session, _ in self._generations
+                ):
+                    await self.send_message(session_id, RECONNECT_FRAME)
+
+        return True
+
+    async def _deliver(self, conn_info: ConnectionInfo, frame: dict) -> bool:
+        """Queue a frame for one connection, dropping it if it is too slow."""
+        if await conn_info.send_queue.put(frame):
             return True
-        except Exception as e:
-            logger.error("send_message_failed", session_id=session_id, error=str(e))
-            # Connection is broken, clean it up
-            await self._close_connection(session_id)
-            return False
 
-    def get_connection_count(self) -> int:
-        """Get the number of active connections."""
-        return len(self.active_connections)
+        self._log_slow_consumer(conn_info)
+        await self._close_connection(conn_info, code=1013, reason="Client too slow")
+        return False
+
+    def _on_remote_frame(self, session_id: str, frame: dict) -> None:
+        """Queue a frame another worker published for the local sockets of a session."""
+        self.replay.observe(session_id, frame)
+
+        for connection_id in list(self._session_connections.get(session_id, ())):
+            conn_info = self.connections[connection_id]
+            # The subscription listener must not wait on one slow socket
+            if not conn_info.send_queue.put_nowait(frame):
+                self._log_slow_consumer(conn_info)
+                self._close_in_background(conn_info, code=1013, reason="Client too slow")
+
+    def _log_slow_consumer(self, conn_info: ConnectionInfo) -> None:
+        """Log a connection dropped for falling behind."""
+        logger.warning(
+            "slow_consumer_dropped",
+            session_id=conn_info.session_id,
+            connection_id=conn_info.connection_id,
+            queued_frames=len(conn_info.send_queue),
+            coalesced_frames=conn_info.send_queue.coalesced_count,
+        )
 
-    def is_connected(self, session_id: str) -> bool:
-        """Check if a session is connected."""
-        return session_id in self.active_connections
+    async def _queue_replay(self, conn_info: ConnectionInfo, last_seq: int) -> None:
+        """Queue the frames a reconnecting client missed, merged where possible."""
+        missed, complete = await self.replay.frames_after(conn_info.session_id, last_seq)
+
+        frames: list[dict] = []
+        for frame in missed:
+            if not _coalesce_stream(frames, frame):
+                frames.append(frame)
 
-    async def _heartbeat_loop(self, session_id: str, conn_info: ConnectionInfo) -> None:
+        header = {
+            "type": "replay",
+            "from_seq": missed[0]["seq"] if missed else last_seq + 1,
+            "to_seq": missed[-1]["seq"] if missed else last_seq,
+            "complete": complete,
+        }
+        conn_info.send_queue.extend([header, *frames])
+
+        logger.info(
+            "websocket_replay_queued",
+            session_id=conn_info.session_id,
+            last_seq=last_seq,
+            replayed_frames=len(missed),
+            sent_frames=len(frames),
+            complete=complete,
+        )
+
+    async def receive_message(self, connection_id: str) -> dict:
         """
-        Send periodic pings to keep connection alive and detect dead connections.
+        Receive and decode the next frame from a connection.
+
+        Returns:
+            dict: The decoded message
 
-        This task runs for each connection and sends pings at regular intervals.
-        If a pong is not received within the timeout, the connection is closed.
+        Raises:
+            WebSocketDisconnect: If the client disconnected or the connection is gone
+            FrameDecodeError: If the frame could not be decoded
         """
-        try:
-            while self._is_running and conn_info.is_alive:
-                await asyncio.sleep(HEARTBEAT_INTERVAL_SECONDS)
+        conn_info = self.connections.get(connection_id)
+        if not conn_info:
+            raise WebSocketDisconnect(code=1000)
 
-                # Check if connection still exists
-                if session_id not in self.active_connections:
-                    break
+        while True:
+            conn_info.receiving = True
+            try:
+                message = await conn_info.websocket.receive()
+            finally:
+                conn_info.receiving = False
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(
+                    code=message.get("code", 1000), reason=message.get("reason")
+                )
+
+            data = message.get("text")
+            if data is None:
+                data = message.get("bytes") or b""
+            decoded = conn_info.codec.decode(data)
+
+            if decoded.get("type") == PONG_TYPE:
+                self._on_pong(conn_info)
+                continue
+
+            conn_info.last_activity = time.monotonic()
+            return decoded
+
+    def _on_pong(self, conn_info: ConnectionInfo) -> None:
+        """Record a pong and the round-trip time of the ping it answers."""
+        now = time.monotonic()
+        # Only the first pong after a written ping measures its round trip
+        if conn_info.pong_received_at < conn_info.ping_written_at:
+            conn_info.rtt_ms = (now - conn_info.ping_written_at) * 1000
+        conn_info.pong_received_at = now
 
-                try:
-                    # Send ping and wait for pong with timeout
-                    await asyncio.wait_for(
-                        conn_info.websocket.send_json({"type": "ping"}),
-                        timeout=HEARTBEAT_TIMEOUT_SECONDS,
-                    )
-                    conn_info.last_activity = datetime.utcnow()
-                except asyncio.TimeoutError:
-                    logger.warning(
-                        "heartbeat_timeout",
-                        session_id=session_id,
-                        timeout_seconds=HEARTBEAT_TIMEOUT_SECONDS,
-                    )
-                    conn_info.is_alive = False
-                    await self._close_connection(session_id, code=1002, reason="Heartbeat timeout")
-                    break
-                except Exception as e:
-                    logger.error("heartbeat_error", session_id=session_id, error=str(e))
-                    await self._close_connection(session_id)
-                    break
+    def get_connection_count(self) -> int:
+        """Get the number of active connections."""
+        return len(self.connections)
 
+    def get_rtt_stats(self) -> dict[str, int | float | None]:
+        """
+        Summarize the ping round-trip times of the open connections.
+
+        Returns:
+            Connection counts plus median, 95th percentile and max RTT in ms
+            (None until a connection has answered a ping)
+        """
+        rtts = sorted(
+            conn_info.rtt_ms
+            for conn_info in self.connections.values()
+            if conn_info.rtt_ms is not None
+        )
+        stats: dict[str, int | float | None] = {
+            "connections": len(self.connections),
+            "measured": len(rtts),
+            "p50_ms": None,
+            "p95_ms": None,
+            "max_ms": None,
+        }
+        if rtts:
+            stats["p50_ms"] = round(rtts[len(rtts) // 2], 1)
+            stats["p95_ms"] = round(rtts[min(len(rtts) - 1, int(len(rtts) * 0.95))], 1)
+            stats["max_ms"] = round(rtts[-1], 1)
+        return stats
+
+    def get_session_connection_count(self, session_id: str) -> int:
+        """Get the number of active connections of a session."""
+        return len(self._session_connections.get(session_id, ()))
+
+    def is_connected(self, session_id: str) -> bool:
+        """Check if a session has at least one connection."""
+        return session_id in self._session_connections
+
+    async def _writer_loop(self, conn_info: ConnectionInfo) -> None:
+        """Drain the connection's send queue onto the socket."""
+        try:
+            while True:
+                message = await conn_info.send_queue.get()
+                for frame in await self._collect_batch(conn_info, message):
+                    if frame is PING_FRAME:
+                        await self._send_raw(conn_info, conn_info.codec.ping_frame)
+                        conn_info.ping_written_at = time.monotonic()
+                    else:
+                        await self._send_raw(conn_info, conn_info.codec.encode(frame))
+                        conn_info.last_activity = time.monotonic()
         except asyncio.CancelledError:
-            # Task was cancelled during shutdown
             pass
         except Exception as e:
-            logger.error("heartbeat_loop_error", session_id=session_id, error=str(e))
+            logger.error(
+                "send_message_failed",
+                session_id=conn_info.session_id,
+                connection_id=conn_info.connection_id,
+                error=str(e),
+            )
+            # Connection is broken, clean it up
+            await self._close_connection(conn_info)
+
+    async def _send_raw(self, conn_info: ConnectionInfo, data: str | bytes) -> None:
+        """Send an encoded frame as a text or binary WebSocket message."""
+        if isinstance(data, bytes):
+            await conn_info.websocket.send_bytes(data)
+        else:
+            await conn_info.websocket.send_text(data)
 
-    async def _periodic_cleanup(self) -> None:
+    async def _collect_batch(self, conn_info: ConnectionInfo, first: dict) -> list[dict]:
         """
-        Periodically cleanup stale connections based on TTL.
+        Gather frames arriving within the coalescing window after a stream frame.
 
-        This background task runs every minute and removes connections that:
-        - Haven't had activity in CONNECTION_TTL_SECONDS
-        - Are marked as not alive
+        Consecutive stream deltas for the same persona/object are merged so a
+        burst of tiny tokens becomes a single WebSocket frame.
         """
-        try:
-            while self._is_running:
-                await asyncio.sleep(60)  # Run cleanup every minute
-
-                current_time = datetime.utcnow()
-                stale_sessions = []
-
-                for session_id, conn_info in self.active_connections.items():
-                    # Check TTL
-                    idle_time = current_time - conn_info.last_activity
-                    if idle_time > timedelta(seconds=CONNECTION_TTL_SECONDS):
-                        logger.info(
-                            "connection_ttl_expired",
-                            session_id=session_id,
-                            idle_seconds=idle_time.total_seconds(),
-                        )
-                        stale_sessions.append(session_id)
-                    # Check if marked as dead
-                    elif not conn_info.is_alive:
-                        logger.info("connection_dead", session_id=session_id)
-                        stale_sessions.append(session_id)
-
-                # Cleanup stale connections
-                for session_id in stale_sessions:
-                    await self._close_connection(
-                        session_id, code=1000, reason="Connection idle timeout"
-                    )
-
-                if stale_sessions:
-                    logger.info(
-                        "cleanup_completed",
-                        removed_count=len(stale_sessions),
-                        remaining_connections=len(self.active_connections),
-                    )
+        batch = [first]
+        if conn_info.coalesce_window <= 0 or first.get("type") != "stream":
+            return batch
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + conn_info.coalesce_window
+        batch_chars = len(first["content"])
+
+        while batch_chars < COALESCE_MAX_CHARS:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            message = await conn_info.send_queue.get(timeout=remaining)
+            if message is None:
+                break
+            if message.get("type") == "stream":
+                batch_chars += len(message["content"])
+            if not _coalesce_stream(batch, message):
+                batch.append(message)
+
+        return batch
+
+    def _schedule_heartbeat(self, conn_info: ConnectionInfo, delay: float) -> None:
+        """Schedule a connection's next ping."""
+        conn_info.timer = self._timers.call_later(delay, self._on_heartbeat, conn_info)
+
+    def _on_heartbeat(self, conn_info: ConnectionInfo) -> None:
+        """Expire an idle connection, or queue a ping and schedule its pong deadline."""
+        if conn_info.closed:
+            return
 
-        except asyncio.CancelledError:
-            # Task was cancelled during shutdown
-            pass
-        except Exception as e:
-            logger.error("cleanup_task_error", error=str(e))
+        now = time.monotonic()
+        idle_seconds = now - conn_info.last_activity
+        if idle_seconds > CONNECTION_TTL_SECONDS:
+            logger.info(
+                "connection_ttl_expired",
+                session_id=conn_info.session_id,
+                connection_id=conn_info.connection_id,
+                idle_seconds=idle_seconds,
+            )
+            self._close_in_background(conn_info, code=1000, reason="Connection idle timeout")
+            return
+
+        # Written by the writer task behind any frames already queued; one
+        # ping per interval may exceed the queue's capacity
+        conn_info.ping_sent_at = now
+        conn_info.send_queue.extend([PING_FRAME])
+        conn_info.timer = self._timers.call_later(
+            HEARTBEAT_TIMEOUT_SECONDS, self._on_heartbeat_timeout, conn_info
+        )
+
+    def _on_heartbeat_timeout(self, conn_info: ConnectionInfo) -> None:
+        """
+        Close a connection that did not answer the last ping in time.
+
+        Pongs are read by ``receive_message``, so a connection whose endpoint
+        is not reading (e.g. still handling the previous message) is given
+        until it reads again rather than closed.
+        """
+        if conn_info.closed:
+            return
+
+        if conn_info.pong_received_at < conn_info.ping_sent_at and not conn_info.receiving:
+            # The endpoint is busy handling a message, so a pong may be waiting
+            # unread: check again once it is reading
+            conn_info.timer = self._timers.call_later(
+                HEARTBEAT_TIMEOUT_SECONDS, self._on_heartbeat_timeout, conn_info
+            )
+            return
+
+        if conn_info.pong_received_at < conn_info.ping_sent_at:
+            # Half-open sockets and stalled writers both end up here
+            logger.warning(
+                "heartbeat_timeout",
+                session_id=conn_info.session_id,
+                connection_id=conn_info.connection_id,
+                timeout_seconds=HEARTBEAT_TIMEOUT_SECONDS,
+                ping_written=conn_info.ping_written_at >= conn_info.ping_sent_at,
+                last_rtt_ms=conn_info.rtt_ms,
+            )
+            conn_info.is_alive = False
+            self._close_in_background(conn_info, code=1002, reason="Heartbeat timeout")
+            return
+
+        self._schedule_heartbeat(conn_info, HEARTBEAT_INTERVAL_SECONDS - HEARTBEAT_TIMEOUT_SECONDS)
+
+    def _close_in_background(self, conn_info: ConnectionInfo, code: int, reason: str) -> None:
+        """Close a connection from a timer callback."""
+        task = asyncio.create_task(self._close_connection(conn_info, code=code, reason=reason))
+        self._closing_tasks.add(task)
+        task.add_done_callback(self._closing_tasks.discard)
 
     async def _close_connection(
-        self, session_id: str, code: int = 1000, reason: str = "Connection closed"
+        self,
+        conn_info: ConnectionInfo,
+        code: int = 1000,
+        reason: str = "Connection closed",
     ) -> None:
         """
         Internal method to close and cleanup a connection.
 
         Args:
-            session_id: The session to close
+            conn_info: The connection to close
             code: WebSocket close code
             reason: Close reason message
         """
-        conn_info = self.active_connections.get(session_id)
-        if not conn_info:
+        if conn_info.closed:
             return
+        conn_info.closed = True
 
-        # Cancel heartbeat task
-        if conn_info.heartbeat_task:
-            conn_info.heartbeat_task.cancel()
-            try:
-                await conn_info.heartbeat_task
-            except asyncio.CancelledError:
-                pass
+        self._unregister(conn_info)
+        self.replay.release(conn_info.session_id)
+        if self.fanout and not self.is_connected(conn_info.session_id):
+            await self.fanout.unsubscribe(conn_info.session_id)
+
+        # Cancel the heartbeat timer and the writer (the caller may be the writer)
+        if conn_info.timer:
+            conn_info.timer.cancel()
+        await _cancel_task(conn_info.writer_task)
 
         # Close WebSocket
         try:
             await conn_info.websocket.close(code=code, reason=reason)
         except Exception as e:
-            logger.debug("close_websocket_error", session_id=session_id, error=str(e))
+            logger.debug("close_websocket_error", session_id=conn_info.session_id, error=str(e))
 
-        # Remove from active connections
-        if session_id in self.active_connections:
-            del self.active_connections[session_id]
-            logger.info(
-                "websocket_disconnected",
-                session_id=session_id,
-                total_connections=len(self.active_connections),
-            )
+        logger.info(
+            "websocket_disconnected",
+            session_id=conn_info.session_id,
+            connection_id=conn_info.connection_id,
+            total_connections=len(self.connections),
+        )
@@ -4,6 +4,9 @@ FastAPI Application Factory
 Main entry point for the me.tchain.ai backend.
 """
 
+import asyncio
+import signal
+import threading
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
@@ -19,7 +22,10 @@ from app.api.v1.router import api_router
 from app.core.config import settings
 from app.core.logging import get_logger, setup_logging
 from app.core.rate_limit import get_limiter
-from app.services.chatbot.redis_memory import get_redis_memory
+from app.core.websocket import ConnectionManager
+from app.services.chatbot.memory_service import get_memory_service
+from app.services.chatbot.summarizer import get_summarizer
+from app.services.chatbot.write_behind import get_write_behind
 from app.services.llm.client import get_llm_manager
 
 logger = get_logger(__name__)
@@ -55,6 +61,43 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         return response
 
 
+def _drain_on_sigterm(ws_manager: ConnectionManager) -> None:
+    """
+    Drain WebSocket connections before the server handles SIGTERM.
+
+    uvicorn closes every socket as soon as it handles SIGTERM, cutting off
+    answers mid-stream. The first SIGTERM therefore starts a drain and is
+    passed on to uvicorn once the drain finished; a second one is passed on
+    at once.
+    """
+    # Signal handlers can only be installed from the main thread
+    if threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+    if not callable(previous):
+        return
+
+    loop = asyncio.get_running_loop()
+    received = 0
+
+    def handle_sigterm(sig, frame) -> None:
+        nonlocal received
+        received += 1
+        if received > 1:
+            previous(sig, frame)
+            return
+
+        logger.info("sigterm_received_draining")
+
+        def start_drain() -> None:
+            task = ws_manager.begin_drain()
+            task.add_done_callback(lambda _: previous(sig, frame))
+
+        loop.call_soon_threadsafe(start_drain)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan handler for startup and shutdown events."""
@@ -62,19 +105,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     setup_logging()
     logger.info("application_starting")
 
-    # Initialize Redis memory (if enabled)
-    redis_memory = None
-    if settings.REDIS_USE_FOR_MEMORY:
-        try:
-            redis_memory = get_redis_memory()
-            await redis_memory.initialize()
-            logger.info("redis_memory_initialized")
-        except Exception as e:
-            logger.warning(
-                "redis_memory_initialization_failed_fallback_to_in_memory",
-                error=str(e),
-            )
-            # Will fall back to in-memory storage
+    # Initialize conversation memory (Redis with automatic local fallback)
+    memory_service = get_memory_service()
+    await memory_service.initialize()
+
+    # Start write-behind flusher for conversation turns (if enabled)
+    write_behind = get_write_behind()
+    if settings.MEMORY_WRITE_BEHIND:
+        await write_behind.start()
 
     # Initialize LLM client (shared singleton)
     llm_manager = get_llm_manager()
@@ -84,6 +122,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Initialize WebSocket connection manager
     ws_manager = init_manager()
     await ws_manager.start()
+    _drain_on_sigterm(ws_manager)
     logger.info("websocket_manager_started")
 
     yield
@@ -91,7 +130,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Shutdown
     logger.info("application_shutting_down")
 
-    # Stop WebSocket connection manager
+    # Stop WebSocket connection manager (after a drain, if one was started)
     await ws_manager.stop()
     logger.info("websocket_manager_stopped")
 
@@ -99,10 +138,16 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     await llm_manager.shutdown()
     logger.info("llm_manager_shutdown")
 
-    # Close Redis connection (if initialized)
-    if redis_memory:
-        await redis_memory.close()
-        logger.info("redis_memory_closed")
+    # Flush queued conversation turns before closing storage; interrupted
+    # turns are written in the background even without MEMORY_WRITE_BEHIND
+    await write_behind.stop()
+
+    # Cancel background summaries (unsummarized messages are simply kept)
+    await get_summarizer().stop()
+
+    # Close conversation memory (Redis connection, if any)
+    await memory_service.close()
+    logger.info("memory_service_closed")
 
 
 def create_app() -> FastAPI:
@@ -7,16 +7,45 @@ The main chatbot agent using LangGraph for orchestration.
 import asyncio
 from typing import AsyncGenerator, Optional
 
+from app.core.config import settings
 from app.core.logging import get_logger
 from app.services.chatbot.memory_factory import ConversationMemoryProtocol, get_memory
 from app.services.chatbot.object_persona_loader import get_object_persona
 from app.services.chatbot.persona import get_persona, load_persona_by_type
 from app.services.chatbot.persona_router import route_question
 from app.services.chatbot.prompts import get_system_prompt
-from app.services.llm.client import get_llm_client
+from app.services.chatbot.summarizer import get_summarizer
+from app.services.chatbot.write_behind import get_write_behind
+from app.services.llm.client import get_llm_client, get_llm_manager
 
 logger = get_logger(__name__)
 
+# Chunks buffered between persona streams and the socket writer.
+# When full, persona streams pause reading from the LLM (backpressure).
+PERSONA_CHUNK_QUEUE_SIZE = 64
+
+# Messages sent to the LLM as conversation context (including the new user message)
+HISTORY_LIMIT = 10
+
+# Conversation channels: each chat surface keeps its own history within a session
+PERSONA_CHANNEL = "persona-group"
+OBJECT_CHANNEL_PREFIX = "object:"
+
+# Cross-channel context (MEMORY_CROSS_CHANNEL_CONTEXT): recent main-chat messages
+# shown to object prompts, each cut to a short excerpt
+CROSS_CHANNEL_MESSAGES = 2
+CROSS_CHANNEL_EXCERPT_CHARS = 300
+
+
+def channel_key(session_id: str, channel: str) -> str:
+    """Memory key of one conversation channel within a session."""
+    return f"{session_id}:{channel}"
+
+
+def object_channel(object_id: str) -> str:
+    """Channel name of a timeline object chat."""
+    return f"{OBJECT_CHANNEL_PREFIX}{object_id}"
+
 
 class ChatAgent:
     """
@@ -39,6 +68,92 @@ class ChatAgent:
             self.memory = await get_memory()
         return self.memory
 
+    async def _commit_turn(
+        self,
+        memory: ConversationMemoryProtocol,
+        key: str,
+        messages: list[dict[str, str]],
+    ) -> None:
+        """
+        Persist a turn's messages in a single write.
+
+        With MEMORY_WRITE_BEHIND the turn is handed to the background flusher
+        instead. Storage failures are logged, never raised: the answer has
+        already been delivered. Long conversations are then summarized in
+        the background (MEMORY_SUMMARY_ENABLED).
+        """
+        if settings.MEMORY_WRITE_BEHIND:
+            get_write_behind().submit(memory, key, messages)
+        else:
+            try:
+                await memory.add_messages(key, messages)
+            except Exception as e:
+                logger.error("turn_commit_failed", key=key, error=str(e))
+                return
+
+        if settings.MEMORY_SUMMARY_ENABLED:
+            get_summarizer().schedule(memory, key)
+
+    def _commit_interrupted_turn(
+        self,
+        memory: ConversationMemoryProtocol,
+        key: str,
+        user_entry: dict[str, str],
+        partial_response: str,
+    ) -> None:
+        """Persist a turn cut short (e.g. client disconnect) without awaiting storage."""
+        messages = [user_entry]
+        if partial_response:
+            messages.append({"role": "assistant", "content": partial_response})
+        get_write_behind().submit(memory, key, messages)
+
+    async def _build_messages(
+        self,
+        memory: ConversationMemoryProtocol,
+        key: str,
+        system_prompt: str,
+        user_entry: dict[str, str],
+        context_key: Optional[str] = None,
+    ) -> list[dict[str, str]]:
+        """
+        Build the LLM prompt: system prompt, summary, recent history, then this turn's message.
+
+        Args:
+            memory: Conversation memory
+            key: Channel key whose history is the conversation context
+            system_prompt: System prompt for this channel
+            user_entry: This turn's user message
+            context_key: Another channel summarised into a short system note
+        """
+        reads = [
+            memory.get_history(key, limit=HISTORY_LIMIT - 1),
+            memory.get_summary(key),
+        ]
+        if context_key is not None:
+            reads.append(memory.get_history(context_key, limit=CROSS_CHANNEL_MESSAGES))
+        history, summary, *context = await asyncio.gather(*reads)
+
+        messages = [{"role": "system", "content": system_prompt}]
+        if summary:
+            messages.append(self._summary_entry(summary))
+        if context and context[0]:
+            messages.append({"role": "system", "content": self._cross_channel_note(context[0])})
+        return [*messages, *history, user_entry]
+
+    def _summary_entry(self, summary: str) -> dict[str, str]:
+        """System message carrying the running summary of older turns."""
+        return {"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}
+
+    def _cross_channel_note(self, context: list[dict[str, str]]) -> str:
+        """Condense another channel's latest messages into a system note."""
+        lines = []
+        for msg in context:
+            excerpt = msg["content"][:CROSS_CHANNEL_EXCERPT_CHARS]
+            if len(msg["content"]) > CROSS_CHANNEL_EXCERPT_CHARS:
+                excerpt += "..."
+            lines.append(f"- {msg['role']}: {excerpt}")
+        return "Latest messages from the visitor's main chat, for context only:\n" + "\n".join(lines)
+
     async def chat(self, user_message: str, session_id: str) -> str:
         """
         Send a message and get a response.
@@ -53,23 +168,26 @@ class ChatAgent:
         # Get memory instance
         memory = await self._get_memory()
 
-        # Add user message to memory
-        await memory.add_message(session_id, "user", user_message)
+        # The turn is written once, when it completes
+        key = channel_key(session_id, PERSONA_CHANNEL)
+        user_entry = {"role": "user", "content": user_message}
+        committed = False
 
         try:
             llm = await get_llm_client()
 
             # Build messages
-            messages = [{"role": "system", "content": self.system_prompt}]
-            history = await memory.get_history(session_id, limit=10)
-            messages.extend(history)
+            messages = await self._build_messages(memory, key, self.system_prompt, user_entry)
 
             # Get response
             response = await llm.ainvoke(messages)
             assistant_message = response.content
 
             # Add to memory
-            await memory.add_message(session_id, "assistant", assistant_message)
+            await self._commit_turn(
+                memory, key, [user_entry, {"role": "assistant", "content": assistant_message}]
+            )
+            committed = True
 
             logger.info(
                 "chat_response_generated",
@@ -82,8 +200,14 @@ class ChatAgent:
 
         except Exception as e:
             logger.error("chat_error", session_id=session_id, error=str(e))
+            await self._commit_turn(memory, key, [user_entry])
+            committed = True
             return self._get_fallback_response()
 
+        finally:
+            if not committed:
+                self._commit_interrupted_turn(memory, key, user_entry, "")
+
     async def stream_response(
         self, user_message: str, session_id: str
     ) -> AsyncGenerator[str, None]:
@@ -100,26 +224,29 @@ class ChatAgent:
         # Get memory instance
         memory = await self._get_memory()
 
-        # Add user message to memory
-        await memory.add_message(session_id, "user", user_message)
+        # The turn is written once, when it completes (or is interrupted)
+        key = channel_key(session_id, PERSONA_CHANNEL)
+        user_entry = {"role": "user", "content": user_message}
+        full_response = ""
+        committed = False
 
         try:
             llm = await get_llm_client()
 
             # Build messages
-            messages = [{"role": "system", "content": self.system_prompt}]
-            history = await memory.get_history(session_id, limit=10)
-            messages.extend(history)
+            messages = await self._build_messages(memory, key, self.system_prompt, user_entry)
 
             # Stream response
-            full_response = ""
             async for chunk in llm.astream(messages):
                 if chunk.content:
                     full_response += chunk.content
                     yield chunk.content
 
-            # Add complete response to memory
-            await memory.add_message(session_id, "assistant", full_response)
+            # Add complete turn to memory
+            await self._commit_turn(
+                memory, key, [user_entry, {"role": "assistant", "content": full_response}]
+            )
+            committed = True
 
             logger.info(
                 "chat_stream_completed",
@@ -129,9 +256,16 @@ class ChatAgent:
 
         except Exception as e:
             logger.error("chat_stream_error", session_id=session_id, error=str(e))
-            fallback = self._get_fallback_response()
-            yield fallback
-            await memory.add_message(session_id, "assistant", fallback)
+            full_response = self._get_fallback_response()
+            yield full_response
+            await self._commit_turn(
+                memory, key, [user_entry, {"role": "assistant", "content": full_response}]
+            )
+            committed = True
+
+        finally:
+            if not committed:
+                self._commit_interrupted_turn(memory, key, user_entry, full_response)
 
     async def stream_multi_persona_response(
         self, user_message: str, session_id: str, selected_persona: Optional[str] = None
@@ -157,12 +291,22 @@ class ChatAgent:
         # Get memory instance
         memory = await self._get_memory()
 
-        # Add user message to memory
-        await memory.add_message(session_id, "user", user_message)
+        # The turn is written once, when it completes (or is interrupted)
+        key = channel_key(session_id, PERSONA_CHANNEL)
+        user_entry = {"role": "user", "content": user_message}
+        relevant_personas: list[str] = []
+        persona_responses_text: dict[str, str] = {}
+        committed = False
 
         try:
-            # Use LLM router to determine which persona(s) should respond
-            persona_responses = await route_question(user_message)
+            # Route the question and read history concurrently; history is shared by all personas
+            persona_responses, history, summary = await asyncio.gather(
+                route_question(user_message),
+                memory.get_history(key, limit=HISTORY_LIMIT - 1),
+                memory.get_summary(key),
+            )
+            if summary:
+                history = [self._summary_entry(summary), *history]
 
             # Extract persona names from router response
             relevant_personas = [pr.persona for pr in persona_responses]
@@ -175,11 +319,11 @@ class ChatAgent:
                 routing_details=[{"persona": pr.persona, "order": pr.order, "reasoning": pr.reasoning} for pr in persona_responses],
             )
 
-            # Queue to collect chunks from all persona streams
-            chunk_queue: asyncio.Queue[dict] = asyncio.Queue()
+            # Bounded queue to collect chunks from all persona streams
+            chunk_queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=PERSONA_CHUNK_QUEUE_SIZE)
 
             # Track responses for memory
-            persona_responses_text: dict[str, str] = {p: "" for p in relevant_personas}
+            persona_responses_text = {p: "" for p in relevant_personas}
 
             async def stream_persona(persona_type: str) -> None:
                 """Stream a single persona's response to the queue."""
@@ -195,9 +339,7 @@ class ChatAgent:
                     llm = await get_llm_client()
 
                     # Build messages with persona-specific system prompt
-                    messages = [{"role": "system", "content": persona_prompt}]
-                    history = await memory.get_history(session_id, limit=10)
-                    messages.extend(history)
+                    messages = [{"role": "system", "content": persona_prompt}, *history, user_entry]
 
                     # Stream response
                     async for chunk in llm.astream(messages):
@@ -236,32 +378,36 @@ class ChatAgent:
             completed_count = 0
             total_personas = len(relevant_personas)
 
-            # Yield chunks as they arrive until all personas complete
-            while completed_count < total_personas:
-                try:
-                    # Wait for next chunk with timeout
-                    chunk = await asyncio.wait_for(chunk_queue.get(), timeout=60.0)
-                    yield chunk
-
-                    # Track completions
-                    if chunk["type"] == "done":
-                        completed_count += 1
-
-                except asyncio.TimeoutError:
-                    logger.warning("multi_persona_stream_timeout", session_id=session_id)
-                    break
-
-            # Wait for all tasks to finish (cleanup)
-            await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Build combined response for memory
-            full_combined_response = ""
-            for persona_type in relevant_personas:
-                persona_label = persona_type.capitalize()
-                full_combined_response += f"[{persona_label}]: {persona_responses_text[persona_type]}\n\n"
-
-            # Add combined response to memory
-            await memory.add_message(session_id, "assistant", full_combined_response.strip())
+            try:
+                # Yield chunks as they arrive until all personas complete
+                while completed_count < total_personas:
+                    try:
+                        # Wait for next chunk with timeout
+                        chunk = await asyncio.wait_for(chunk_queue.get(), timeout=60.0)
+                        yield chunk
+
+                        # Track completions
+                        if chunk["type"] == "done":
+                            completed_count += 1
+
+                    except asyncio.TimeoutError:
+                        logger.warning("multi_persona_stream_timeout", session_id=session_id)
+                        break
+            finally:
+                # Producers may be blocked on the bounded queue if we stopped early
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+
+                # Wait for all tasks to finish (cleanup)
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            # Add user message and combined response to memory
+            combined_response = self._combine_persona_responses(relevant_personas, persona_responses_text)
+            await self._commit_turn(
+                memory, key, [user_entry, {"role": "assistant", "content": combined_response}]
+            )
+            committed = True
 
             logger.info(
                 "multi_persona_stream_completed",
@@ -279,7 +425,26 @@ class ChatAgent:
                 "content": fallback,
             }
             yield {"type": "done", "persona": fallback_persona, "content": ""}
-            await memory.add_message(session_id, "assistant", fallback)
+            await self._commit_turn(
+                memory, key, [user_entry, {"role": "assistant", "content": fallback}]
+            )
+            committed = True
+
+        finally:
+            if not committed:
+                partial = self._combine_persona_responses(
+                    [p for p in relevant_personas if persona_responses_text.get(p)],
+                    persona_responses_text,
+                )
+                self._commit_interrupted_turn(memory, key, user_entry, partial)
+
+    def _combine_persona_responses(self, personas: list[str], responses: dict[str, str]) -> str:
+        """Build the single assistant message stored for a multi-persona turn."""
+        combined = ""
+        for persona_type in personas:
+            persona_label = persona_type.capitalize()
+            combined += f"[{persona_label}]: {responses[persona_type]}\n\n"
+        return combined.strip()
 
     async def stream_object_response(
         self,
@@ -311,8 +476,11 @@ class ChatAgent:
         # Get memory instance
         memory = await self._get_memory()
 
-        # Add user message to memory with object context
-        await memory.add_message(session_id, "user", f"[To {object_title}]: {user_message}")
+        # The turn is written to the object's own channel once it completes (or is interrupted)
+        key = channel_key(session_id, object_channel(object_id))
+        user_entry = {"role": "user", "content": f"[To {object_title}]: {user_message}"}
+        full_response = ""
+        committed = False
 
         try:
             # Send typing indicator
@@ -328,12 +496,16 @@ class ChatAgent:
             llm = await get_llm_client()
 
             # Build messages with object persona system prompt
-            messages = [{"role": "system", "content": object_system_prompt}]
-            history = await memory.get_history(session_id, limit=10)
-            messages.extend(history)
+            context_key = (
+                channel_key(session_id, PERSONA_CHANNEL)
+                if settings.MEMORY_CROSS_CHANNEL_CONTEXT
+                else None
+            )
+            messages = await self._build_messages(
+                memory, key, object_system_prompt, user_entry, context_key
+            )
 
             # Stream response
-            full_response = ""
             async for chunk in llm.astream(messages):
                 if chunk.content:
                     full_response += chunk.content
@@ -347,9 +519,12 @@ class ChatAgent:
             yield {"type": "done", "object_id": object_id, "content": ""}
 
             # Add to memory
-            await memory.add_message(
-                session_id, "assistant", f"[{object_title}]: {full_response}"
+            await self._commit_turn(
+                memory,
+                key,
+                [user_entry, {"role": "assistant", "content": f"[{object_title}]: {full_response}"}],
             )
+            committed = True
 
             logger.info(
                 "object_response_completed",
@@ -365,10 +540,57 @@ class ChatAgent:
                 object_id=object_id,
                 error=str(e),
             )
-            fallback = self._get_object_fallback_response(object_title)
-            yield {"type": "stream", "object_id": object_id, "content": fallback}
+            full_response = self._get_object_fallback_response(object_title)
+            yield {"type": "stream", "object_id": object_id, "content": full_response}
             yield {"type": "done", "object_id": object_id, "content": ""}
-            await memory.add_message(session_id, "assistant", f"[{object_title}]: {fallback}")
+            await self._commit_turn(
+                memory,
+                key,
+                [user_entry, {"role": "assistant", "content": f"[{object_title}]: {full_response}"}],
+            )
+            committed = True
+
+        finally:
+            if not committed:
+                partial = f"[{object_title}]: {full_response}" if full_response else ""
+                self._commit_interrupted_turn(memory, key, user_entry, partial)
+
+    async def prefetch_object(
+        self,
+        session_id: str,
+        object_id: str,
+        object_title: str = "Unknown Object",
+    ) -> None:
+        """
+        Warm up an object chat before its first message (Career Game prefetch).
+
+        Loads the object's persona off the event loop, reads the object
+        channel's history and summary (cached memory backends keep them) and
+        opens a connection to the LLM endpoint. Nothing is sent to the
+        visitor; failures are logged and ignored.
+
+        Args:
+            session_id: Session identifier
+            object_id: The objectPersonaId from careerTimeline
+            object_title: Display title for fallback
+        """
+        try:
+            memory = await self._get_memory()
+            key = channel_key(session_id, object_channel(object_id))
+            await asyncio.gather(
+                asyncio.to_thread(get_object_persona, object_id, object_title),
+                memory.get_history(key, limit=HISTORY_LIMIT - 1),
+                memory.get_summary(key),
+                get_llm_manager().warm_up(),
+            )
+            logger.debug("object_prefetched", session_id=session_id, object_id=object_id)
+        except Exception as e:
+            logger.warning(
+                "object_prefetch_failed",
+                session_id=session_id,
+                object_id=object_id,
+                error=str(e),
+            )
 
     def _build_object_system_prompt(self, object_persona: str, object_title: str) -> str:
         """Build system prompt for an object persona."""
@@ -413,7 +635,7 @@ Remember: You are NOT an assistant. You ARE the object speaking about yourself!
             "or contact me directly at timucinutkan@gmail.com."
         )
 
-    async def clear_history(self, session_id: str) -> None:
-        """Clear conversation history for a session."""
+    async def clear_history(self, session_id: str, channel: str = PERSONA_CHANNEL) -> None:
+        """Clear one conversation channel of a session (the main chat by default)."""
         memory = await self._get_memory()
-        await memory.clear(session_id)
+        await memory.clear(channel_key(session_id, channel))
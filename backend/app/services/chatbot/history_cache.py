@@ -0,0 +1,278 @@
+"""
+Conversation History Cache
+
+Per-worker LRU cache of recent conversation histories in front of Redis.
+
+Entries are kept correct across workers with Redis keyspace notifications:
+any change to a ``conversation:*`` key made elsewhere (another worker's
+append, a clear, expiry or eviction) drops the cached entry. This worker's
+own writes update the cache in place (write-through) and the notifications
+they trigger are recognised and skipped.
+
+If notifications cannot be enabled or the subscription drops, the cache is
+emptied and bypassed until it is re-established, so reads never serve data
+that might have missed an invalidation.
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Optional
+
+import redis.asyncio as aioredis
+from redis.exceptions import ResponseError
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Configuration
+DEFAULT_CACHE_SIZE = 1000  # Sessions cached per worker
+RESUBSCRIBE_DELAY_SECONDS = 1.0  # Wait before re-subscribing after a dropped connection
+
+# Keyspace notification classes we rely on: K (keyspace channel), g (DEL,
+# EXPIRE, RENAME), $ (strings), l (lists), x (expired), e (evicted)
+REQUIRED_NOTIFY_FLAGS = "Kg$lxe"
+# Events that do not change a conversation's content
+IGNORED_EVENTS = frozenset({"expire", "persist"})
+
+# Content events caused by one of our own appends, per storage mode:
+# list mode runs RPUSH + LTRIM (+ EXPIRE), string mode runs SETEX
+SELF_WRITE_EVENTS = {"list": 2, "string": 1}
+
+
+class HistoryCache:
+    """
+    LRU cache of conversation histories keyed by Redis key.
+
+    Histories are stored as tuples of ``(role, content)`` and always hold
+    the full stored conversation, so any ``limit`` can be served from it.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, list[tuple[str, str]]] = OrderedDict()
+        # Notifications still expected from this worker's own writes, per key
+        self._self_events: dict[str, int] = {}
+        # Per-key version, tracked only while a cache fill is in flight
+        self._versions: dict[str, int] = {}
+        self._fills_in_flight: dict[str, int] = {}
+        self._enabled = False
+        self._listener_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache is currently serving reads."""
+        return self._enabled
+
+    async def start(self, redis: aioredis.Redis, key_pattern: str) -> None:
+        """
+        Enable keyspace notifications and start the invalidation listener.
+
+        Args:
+            redis: Client used for the notification subscription
+            key_pattern: Glob of the keys to watch (e.g. ``conversation:*``)
+        """
+        if self._listener_task is not None:
+            return
+
+        if not await _ensure_keyspace_notifications(redis):
+            logger.warning("history_cache_disabled", reason="keyspace notifications unavailable")
+            return
+
+        db = redis.connection_pool.connection_kwargs.get("db", 0)
+        prefix = f"__keyspace@{db}__:"
+        self._listener_task = asyncio.create_task(
+            self._listen(redis, prefix, prefix + key_pattern)
+        )
+
+    async def stop(self) -> None:
+        """Stop the listener and drop all entries."""
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        self._disable()
+
+    def get(self, key: str) -> Optional[list[tuple[str, str]]]:
+        """Get a cached history (None on miss or while the cache is bypassed)."""
+        if not self._enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def begin_fill(self, key: str) -> int:
+        """
+        Mark the start of a Redis read that will populate ``key``.
+
+        Returns:
+            Version token to pass to ``finish_fill``
+        """
+        self._fills_in_flight[key] = self._fills_in_flight.get(key, 0) + 1
+        return self._versions.setdefault(key, 0)
+
+    def finish_fill(
+        self, key: str, version: int, history: Optional[list[tuple[str, str]]]
+    ) -> None:
+        """
+        Store a history read from Redis, unless the key changed meanwhile.
+
+        Args:
+            key: Redis key
+            version: Token from ``begin_fill``
+            history: History read, or None if the read failed
+        """
+        current = self._versions.get(key)
+        remaining = self._fills_in_flight.get(key, 1) - 1
+        if remaining:
+            self._fills_in_flight[key] = remaining
+        else:
+            self._fills_in_flight.pop(key, None)
+            self._versions.pop(key, None)
+
+        if history is None or current != version or not self._enabled:
+            return
+
+        self._entries[key] = history
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def expect_self_write(self, key: str, storage_mode: str) -> None:
+        """Register an own write before sending it, so its notifications are skipped."""
+        self._self_events[key] = self._self_events.get(key, 0) + SELF_WRITE_EVENTS[storage_mode]
+        self._bump_version(key)
+
+    def apply_self_write(
+        self, key: str, messages: list[tuple[str, str]], max_history: int
+    ) -> None:
+        """Append this worker's own write to a cached entry (write-through)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.extend(messages)
+            del entry[:-max_history]
+
+    def abort_self_write(self, key: str) -> None:
+        """Forget a failed own write; its effect on Redis is unknown."""
+        self._self_events.pop(key, None)
+        self.invalidate(key)
+
+    def invalidate(self, key: str) -> None:
+        """Drop a cached entry and any fill in flight for it."""
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+        self._bump_version(key)
+
+    def handle_event(self, key: str, event: str) -> None:
+        """Process one keyspace notification for ``key``."""
+        if event in IGNORED_EVENTS:
+            return
+
+        expected = self._self_events.get(key, 0)
+        if expected:
+            # Own events arrive in order; a foreign event in between still
+            # leaves one of ours unmatched, which invalidates the entry.
+            if expected == 1:
+                del self._self_events[key]
+            else:
+                self._self_events[key] = expected - 1
+            return
+
+        self.invalidate(key)
+
+    def get_stats(self) -> dict[str, int | bool]:
+        """Get cache statistics."""
+        return {
+            "enabled": self._enabled,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+    def _bump_version(self, key: str) -> None:
+        """Invalidate fills in flight for a key."""
+        if key in self._versions:
+            self._versions[key] += 1
+
+    def _disable(self) -> None:
+        """Stop serving reads and drop everything that may have missed an invalidation."""
+        self._enabled = False
+        self._entries.clear()
+        self._self_events.clear()
+        for key in self._versions:
+            self._versions[key] += 1
+
+    async def _listen(self, redis: aioredis.Redis, prefix: str, pattern: str) -> None:
+        """Apply keyspace notifications, re-subscribing after connection loss."""
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.psubscribe(pattern)
+                # Anything written before the subscription is not cached yet
+                self._enabled = True
+                logger.info("history_cache_listening", pattern=pattern)
+
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    channel = message["channel"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    event = message["data"]
+                    if isinstance(event, bytes):
+                        event = event.decode()
+                    self.handle_event(channel[len(prefix):], event)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("history_cache_subscription_lost", error=str(e))
+            finally:
+                self._disable()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+            await asyncio.sleep(RESUBSCRIBE_DELAY_SECONDS)
+
+
+async def _ensure_keyspace_notifications(redis: aioredis.Redis) -> bool:
+    """Enable the keyspace notification classes the cache needs, if possible."""
+    try:
+        config = await redis.config_get("notify-keyspace-events")
+        current = next(iter(config.values()), "")
+    except ResponseError:
+        # CONFIG is often disabled on managed Redis; we cannot verify the setting
+        return False
+
+    if isinstance(current, bytes):
+        current = current.decode()
+
+    # "A" is an alias for every event class except K, E, m and n
+    flags = set(current.replace("A", "g$lshzxetd"))
+    missing = set(REQUIRED_NOTIFY_FLAGS) - flags
+    if not missing:
+        return True
+
+    try:
+        await redis.config_set("notify-keyspace-events", current + "".join(sorted(missing)))
+    except ResponseError as e:
+        logger.warning("keyspace_notifications_enable_failed", error=str(e))
+        return False
+
+    logger.info("keyspace_notifications_enabled", flags=current + "".join(sorted(missing)))
+    return True
@@ -2,48 +2,89 @@
 Conversation Memory Management
 
 Handles short-term and long-term conversation memory.
+
+The in-memory store is bounded: conversations expire after DEFAULT_TTL
+seconds without being read or written (like their Redis counterparts), and the least
+recently used ones are evicted beyond ``max_sessions`` or ``max_bytes``.
 """
 
+import sys
+import time
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, List, Optional
 
 from app.core.logging import get_logger
+from app.services.chatbot.redis_memory import DEFAULT_TTL, covered_head_length
 
 logger = get_logger(__name__)
 
+# Configuration
+MAX_SESSIONS = 10000  # Conversations kept before LRU eviction
+MAX_BYTES = 64 * 1024 * 1024  # Approximate memory cap across all conversations
+MESSAGE_OVERHEAD_BYTES = 120  # Approximate per-message cost besides its text
+
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     """Single conversation message."""
 
-    role: str  # "user" or "assistant"
+    role: str  # "user" or "assistant" (interned)
     content: str
-    timestamp: datetime = field(default_factory=datetime.utcnow)
+    timestamp: float = field(default_factory=time.time)  # Unix epoch seconds
 
+    @property
+    def size(self) -> int:
+        """Approximate memory footprint in bytes."""
+        return len(self.content) + MESSAGE_OVERHEAD_BYTES
 
-@dataclass
+
+@dataclass(slots=True)
 class Conversation:
     """A conversation thread with message history."""
 
     session_id: str
-    messages: List[Message] = field(default_factory=list)
+    max_history: int = 20
+    messages: deque[Message] = field(init=False)
     created_at: datetime = field(default_factory=datetime.utcnow)
     updated_at: datetime = field(default_factory=datetime.utcnow)
+    size: int = 0  # Approximate bytes held by messages and the summary
+    summary: Optional[str] = None  # Running summary of messages no longer kept
+    expires_at: float = 0.0  # time.monotonic() deadline, refreshed on write
+
+    def __post_init__(self) -> None:
+        self.messages = deque(maxlen=self.max_history)
 
     def add_message(self, role: str, content: str) -> None:
-        """Add a message to the conversation."""
-        self.messages.append(Message(role=role, content=content))
+        """Add a message to the conversation, dropping the oldest beyond max_history."""
+        if self.messages and len(self.messages) == self.max_history:
+            self.size -= self.messages[0].size
+        message = Message(role=sys.intern(role), content=content)
+        self.messages.append(message)
+        self.size += message.size
         self.updated_at = datetime.utcnow()
 
     def get_history(self, limit: Optional[int] = None) -> List[Dict[str, str]]:
         """Get conversation history in LangChain format."""
-        messages = self.messages[-limit:] if limit else self.messages
+        messages = self.messages
+        if limit and limit < len(messages):
+            messages = list(messages)[-limit:]
         return [{"role": msg.role, "content": msg.content} for msg in messages]
 
+    def set_summary(self, summary: str, covered: List[Dict[str, str]]) -> None:
+        """Replace the running summary and drop the oldest messages it covers."""
+        drop = covered_head_length(self.get_history()[: len(covered)], covered)
+        for _ in range(drop):
+            self.size -= self.messages.popleft().size
+        self.size += len(summary) - len(self.summary or "")
+        self.summary = summary
+
     def clear(self) -> None:
         """Clear conversation history."""
-        self.messages = []
+        self.messages.clear()
+        self.summary = None
+        self.size = 0
         self.updated_at = datetime.utcnow()
 
 
@@ -54,48 +95,138 @@ class ConversationMemory:
     For production, this should be replaced with Redis or database storage.
     """
 
-    def __init__(self, max_history: int = 20) -> None:
-        self.conversations: Dict[str, Conversation] = {}
+    def __init__(
+        self,
+        max_history: int = 20,
+        max_sessions: int = MAX_SESSIONS,
+        ttl: int = DEFAULT_TTL,
+        max_bytes: int = MAX_BYTES,
+    ) -> None:
+        # Least recently used first
+        self.conversations: OrderedDict[str, Conversation] = OrderedDict()
         self.max_history = max_history
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evictions: Dict[str, int] = {"expired": 0, "sessions": 0, "memory": 0}
+
+    def _get(self, session_id: str) -> Optional[Conversation]:
+        """Get a live conversation (dropping it if expired) and mark it recently used."""
+        conversation = self.conversations.get(session_id)
+        if conversation is None:
+            return None
+
+        if conversation.expires_at <= time.monotonic():
+            self._remove(session_id, "expired")
+            return None
+
+        self.conversations.move_to_end(session_id)
+        return conversation
 
     def get_or_create(self, session_id: str) -> Conversation:
         """Get existing conversation or create new one."""
-        if session_id not in self.conversations:
-            self.conversations[session_id] = Conversation(session_id=session_id)
+        conversation = self._get(session_id)
+        if conversation is None:
+            # Make room before inserting so the new conversation is never the one evicted
+            self._evict()
+            conversation = Conversation(session_id=session_id, max_history=self.max_history)
+            conversation.expires_at = time.monotonic() + self.ttl
+            self.conversations[session_id] = conversation
             logger.info("conversation_created", session_id=session_id)
-        return self.conversations[session_id]
+        return conversation
 
     def add_message(self, session_id: str, role: str, content: str) -> None:
         """Add a message to a conversation."""
+        self.add_messages(session_id, [{"role": role, "content": content}])
+
+    def add_messages(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        """Add several messages to a conversation, oldest first."""
         conversation = self.get_or_create(session_id)
-        conversation.add_message(role, content)
 
-        # Trim history if needed
-        if len(conversation.messages) > self.max_history:
-            conversation.messages = conversation.messages[-self.max_history :]
+        previous_size = conversation.size
+        for message in messages:
+            conversation.add_message(message["role"], message["content"])
+        self.total_bytes += conversation.size - previous_size
+        conversation.expires_at = time.monotonic() + self.ttl
+        self._evict()
 
         logger.debug(
             "message_added",
             session_id=session_id,
-            role=role,
+            roles=[message["role"] for message in messages],
             message_count=len(conversation.messages),
         )
 
     def get_history(
         self, session_id: str, limit: Optional[int] = None
     ) -> List[Dict[str, str]]:
-        """Get conversation history."""
-        conversation = self.get_or_create(session_id)
+        """Get conversation history (empty for unknown or expired sessions)."""
+        conversation = self._get(session_id)
+        if conversation is None:
+            return []
+        conversation.expires_at = time.monotonic() + self.ttl
         return conversation.get_history(limit)
 
+    def get_summary(self, session_id: str) -> Optional[str]:
+        """Get the running summary of a conversation (None if there is none)."""
+        conversation = self._get(session_id)
+        return conversation.summary if conversation is not None else None
+
+    def set_summary(self, session_id: str, summary: str, covered: List[Dict[str, str]]) -> None:
+        """Store a conversation's running summary, dropping the oldest messages it covers."""
+        conversation = self._get(session_id)
+        if conversation is None:
+            return
+
+        previous_size = conversation.size
+        conversation.set_summary(summary, covered)
+        self.total_bytes += conversation.size - previous_size
+        self._evict()
+
     def clear(self, session_id: str) -> None:
         """Clear a conversation."""
-        if session_id in self.conversations:
-            self.conversations[session_id].clear()
+        conversation = self.conversations.get(session_id)
+        if conversation is not None:
+            self.total_bytes -= conversation.size
+            conversation.clear()
             logger.info("conversation_cleared", session_id=session_id)
 
     def delete(self, session_id: str) -> None:
         """Delete a conversation entirely."""
         if session_id in self.conversations:
-            del self.conversations[session_id]
+            self._remove(session_id)
             logger.info("conversation_deleted", session_id=session_id)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get store size and eviction counters."""
+        return {
+            "sessions": len(self.conversations),
+            "bytes": self.total_bytes,
+            "evicted_expired": self.evictions["expired"],
+            "evicted_sessions": self.evictions["sessions"],
+            "evicted_memory": self.evictions["memory"],
+        }
+
+    def _remove(self, session_id: str, reason: Optional[str] = None) -> None:
+        """Remove a conversation, counting it as an eviction if ``reason`` is given."""
+        conversation = self.conversations.pop(session_id)
+        self.total_bytes -= conversation.size
+        if reason:
+            self.evictions[reason] += 1
+            logger.debug("conversation_evicted", session_id=session_id, reason=reason)
+
+    def _evict(self) -> None:
+        """Evict expired conversations, then least recently used ones beyond the limits."""
+        now = time.monotonic()
+        while self.conversations:
+            session_id, conversation = next(iter(self.conversations.items()))
+            if conversation.expires_at <= now:
+                reason = "expired"
+            elif len(self.conversations) > self.max_sessions:
+                reason = "sessions"
+            elif self.total_bytes > self.max_bytes and len(self.conversations) > 1:
+                reason = "memory"
+            else:
+                break
+            self._remove(session_id, reason)
@@ -1,18 +1,14 @@
 """
 Conversation Memory Factory
 
-Creates appropriate memory instance based on configuration.
+Provides the shared memory instance for the configured backend.
 Supports dependency injection pattern.
 """
 
 from typing import Protocol
 
-from app.core.config import settings
-from app.core.logging import get_logger
 from app.services.chatbot.memory import ConversationMemory
-from app.services.chatbot.redis_memory import RedisConversationMemory, get_redis_memory
-
-logger = get_logger(__name__)
+from app.services.chatbot.memory_service import get_memory_service
 
 
 class ConversationMemoryProtocol(Protocol):
@@ -26,10 +22,24 @@ class ConversationMemoryProtocol(Protocol):
         """Add a message to conversation."""
         ...
 
+    async def add_messages(self, session_id: str, messages: list[dict[str, str]]) -> None:
+        """Add several messages (oldest first) in a single write."""
+        ...
+
     async def get_history(self, session_id: str, limit: int | None = None) -> list[dict[str, str]]:
         """Get conversation history."""
         ...
 
+    async def get_summary(self, session_id: str) -> str | None:
+        """Get the running summary of older messages."""
+        ...
+
+    async def set_summary(
+        self, session_id: str, summary: str, covered: list[dict[str, str]]
+    ) -> None:
+        """Store the running summary and drop the oldest messages it covers."""
+        ...
+
     async def clear(self, session_id: str) -> None:
         """Clear conversation."""
         ...
@@ -49,28 +59,42 @@ class InMemoryMemoryAdapter:
         """Add a message (async wrapper)."""
         self._memory.add_message(session_id, role, content)
 
+    async def add_messages(self, session_id: str, messages: list[dict[str, str]]) -> None:
+        """Add several messages (async wrapper)."""
+        self._memory.add_messages(session_id, messages)
+
     async def get_history(self, session_id: str, limit: int | None = None) -> list[dict[str, str]]:
         """Get history (async wrapper)."""
         return self._memory.get_history(session_id, limit)
 
+    async def get_summary(self, session_id: str) -> str | None:
+        """Get running summary (async wrapper)."""
+        return self._memory.get_summary(session_id)
+
+    async def set_summary(
+        self, session_id: str, summary: str, covered: list[dict[str, str]]
+    ) -> None:
+        """Store running summary (async wrapper)."""
+        self._memory.set_summary(session_id, summary, covered)
+
     async def clear(self, session_id: str) -> None:
         """Clear conversation (async wrapper)."""
         self._memory.clear(session_id)
 
+    def get_stats(self) -> dict[str, int]:
+        """Get store size and eviction counters."""
+        return self._memory.get_stats()
+
 
 def create_memory() -> ConversationMemoryProtocol:
     """
-    Factory function to create appropriate memory instance based on config.
+    Factory function to get the memory instance for the configured backend.
 
     Returns:
-        ConversationMemoryProtocol: Memory implementation (Redis or in-memory)
+        ConversationMemoryProtocol: The process-wide memory service (Redis with
+        local fallback, or local only)
     """
-    if settings.REDIS_USE_FOR_MEMORY:
-        logger.info("memory_factory_creating_redis_backend")
-        return get_redis_memory()
-    else:
-        logger.info("memory_factory_creating_in_memory_backend")
-        return InMemoryMemoryAdapter(ConversationMemory())
+    return get_memory_service()
 
 
 async def get_memory() -> ConversationMemoryProtocol:
@@ -80,10 +104,10 @@ async def get_memory() -> ConversationMemoryProtocol:
     Returns:
         ConversationMemoryProtocol: Initialized memory instance
     """
-    memory = create_memory()
+    memory = get_memory_service()
 
-    # Initialize if it's Redis
-    if isinstance(memory, RedisConversationMemory) and memory._redis is None:
+    # Normally initialized in the application lifespan
+    if not memory.initialized:
         await memory.initialize()
 
     return memory
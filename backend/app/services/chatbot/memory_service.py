@@ -0,0 +1,349 @@
+"""
+Conversation Memory Service
+
+Process-wide conversation memory shared by every agent.
+
+The persistent backend is chosen by MEMORY_BACKEND:
+- "redis": RedisConversationMemory
+- "sqlite": SQLiteConversationMemory on DATABASE_URL
+- "memory": the bounded local store only
+
+Calls to the persistent backend go through its circuit breaker (and, for
+Redis, the retry policy) from ``app.core.resilience``; when it is
+unavailable conversations are kept in the bounded local store instead.
+
+Sessions written locally during an outage are marked dirty and copied back
+once the backend recovers: lazily before the session's next backend
+operation (so its messages stay in order) and in the background for the
+rest.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Protocol
+
+from tenacity import AsyncRetrying
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.resilience import (
+    CircuitBreaker,
+    CircuitBreakerError,
+    get_redis_circuit_breaker,
+    get_redis_retry_config,
+    get_sqlite_circuit_breaker,
+)
+from app.services.chatbot.memory import ConversationMemory
+from app.services.chatbot.redis_memory import get_redis_memory
+from app.services.chatbot.sqlite_memory import get_sqlite_memory
+
+logger = get_logger(__name__)
+
+MEMORY_BACKENDS = ("redis", "sqlite", "memory")
+
+
+class PersistentMemoryBackend(Protocol):
+    """Persistent conversation storage wrapped by the memory service."""
+
+    async def initialize(self) -> None:
+        """Connect (idempotent)."""
+        ...
+
+    async def close(self) -> None:
+        """Disconnect."""
+        ...
+
+    async def add_messages(self, session_id: str, messages: list[dict[str, str]]) -> None:
+        """Add several messages (oldest first) in a single write."""
+        ...
+
+    async def get_history(self, session_id: str, limit: int | None = None) -> list[dict[str, str]]:
+        """Get conversation history."""
+        ...
+
+    async def get_summary(self, session_id: str) -> str | None:
+        """Get the running summary of older messages."""
+        ...
+
+    async def set_summary(
+        self, session_id: str, summary: str, covered: list[dict[str, str]]
+    ) -> None:
+        """Store the running summary and drop the oldest messages it covers in one write."""
+        ...
+
+    async def clear(self, session_id: str) -> None:
+        """Clear conversation."""
+        ...
+
+
+class MemoryService:
+    """Conversation memory on a persistent backend, degrading to a local store."""
+
+    def __init__(
+        self,
+        primary: Optional[PersistentMemoryBackend] = None,
+        local_memory: Optional[ConversationMemory] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        retry_config: Optional[Callable[[], AsyncRetrying]] = None,
+        backend: str = "memory",
+    ) -> None:
+        """
+        Initialize the memory service.
+
+        Args:
+            primary: Persistent backend (None keeps everything local)
+            local_memory: Fallback store (defaults to a bounded ConversationMemory)
+            breaker: Circuit breaker for backend calls (defaults to the Redis one)
+            retry_config: Factory for the backend retry policy (None = no retries)
+            backend: Backend name for stats
+        """
+        self._primary = primary
+        self._local = local_memory or ConversationMemory()
+        self._breaker = breaker or get_redis_circuit_breaker()
+        self._retry_config = retry_config
+        self.backend = backend
+        # Sessions with messages only in the local store
+        self._dirty: set[str] = set()
+        self._resync_locks: dict[str, asyncio.Lock] = {}
+        self._resync_task: Optional[asyncio.Task] = None
+        self.initialized = False
+
+    async def initialize(self) -> None:
+        """
+        Connect the persistent backend (if configured).
+
+        Never raises: if the backend is unreachable the service starts
+        degraded and reconnects through the circuit breaker.
+        """
+        if self.initialized:
+            return
+        self.initialized = True
+
+        if self._primary is None:
+            logger.info("memory_service_initialized", backend=self.backend)
+            return
+
+        try:
+            await self._breaker.call(self._primary.initialize)
+            logger.info("memory_service_initialized", backend=self.backend)
+        except Exception as e:
+            logger.warning("memory_service_degraded_at_startup", backend=self.backend, error=str(e))
+
+    async def close(self) -> None:
+        """Stop background resync and close the persistent backend."""
+        if self._resync_task:
+            self._resync_task.cancel()
+            try:
+                await self._resync_task
+            except asyncio.CancelledError:
+                pass
+            self._resync_task = None
+
+        if self._primary is not None:
+            await self._primary.close()
+
+        if self._dirty:
+            logger.warning("memory_service_closed_with_unsynced_sessions", count=len(self._dirty))
+
+    async def add_message(self, session_id: str, role: str, content: str) -> None:
+        """Add a message to a conversation."""
+        await self.add_messages(session_id, [{"role": role, "content": content}])
+
+    async def add_messages(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        """Add several messages (oldest first) in a single write."""
+        if self._primary is not None:
+            try:
+                await self._resync_if_dirty(session_id)
+                await self._call_primary(self._primary.add_messages, session_id, messages)
+                return
+            except Exception as e:
+                self._log_fallback("add_messages", session_id, e)
+
+        self._local.add_messages(session_id, messages)
+        if self._primary is not None:
+            self._dirty.add(session_id)
+
+    async def get_history(
+        self, session_id: str, limit: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """Get conversation history."""
+        if self._primary is not None:
+            try:
+                await self._resync_if_dirty(session_id)
+                return await self._call_primary(self._primary.get_history, session_id, limit)
+            except Exception as e:
+                self._log_fallback("get_history", session_id, e)
+
+        return self._local.get_history(session_id, limit)
+
+    async def get_summary(self, session_id: str) -> Optional[str]:
+        """Get the running summary of a conversation's older messages."""
+        if self._primary is not None:
+            try:
+                return await self._call_primary(self._primary.get_summary, session_id)
+            except Exception as e:
+                self._log_fallback("get_summary", session_id, e)
+
+        return self._local.get_summary(session_id)
+
+    async def set_summary(
+        self, session_id: str, summary: str, covered: list[dict[str, str]]
+    ) -> None:
+        """
+        Store a running summary and drop the oldest messages it covers.
+
+        Summaries are an optimisation: with a persistent backend they are only
+        written to it, and skipped while it is unavailable (the messages stay).
+        """
+        if self._primary is None:
+            self._local.set_summary(session_id, summary, covered)
+            return
+
+        try:
+            await self._resync_if_dirty(session_id)
+            await self._call_primary(self._primary.set_summary, session_id, summary, covered)
+        except Exception as e:
+            self._log_fallback("set_summary", session_id, e)
+
+    async def clear(self, session_id: str) -> None:
+        """Clear a conversation in both stores."""
+        self._local.delete(session_id)
+        self._dirty.discard(session_id)
+
+        if self._primary is not None:
+            try:
+                await self._call_primary(self._primary.clear, session_id)
+            except Exception as e:
+                self._log_fallback("clear", session_id, e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get backend state and local store statistics."""
+        return {
+            "backend": self.backend,
+            "circuit_state": self._breaker.state.value,
+            "unsynced_sessions": len(self._dirty),
+            "local": self._local.get_stats(),
+        }
+
+    async def _call_primary(self, func: Callable, *args, **kwargs) -> Any:
+        """Call a persistent backend method through the circuit breaker."""
+        result = await self._breaker.call(self._with_retry, func, *args, **kwargs)
+
+        # The backend is answering again: copy back sessions written locally
+        if self._dirty and (self._resync_task is None or self._resync_task.done()):
+            self._resync_task = asyncio.create_task(self._resync_all())
+
+        return result
+
+    async def _with_retry(self, func: Callable, *args, **kwargs) -> Any:
+        """Call a backend method with the retry policy, reconnecting if needed."""
+        await self._primary.initialize()
+
+        if self._retry_config is None:
+            return await func(*args, **kwargs)
+
+        async for attempt in self._retry_config():
+            with attempt:
+                return await func(*args, **kwargs)
+
+    async def _resync_if_dirty(self, session_id: str) -> None:
+        """Copy a session's locally stored messages back before using the backend for it."""
+        if session_id in self._dirty:
+            await self._resync_session(session_id)
+
+    async def _resync_session(self, session_id: str) -> None:
+        """
+        Append a dirty session's local messages to the backend and drop them locally.
+
+        Raises:
+            Exception: If the backend is still unavailable (the session stays dirty)
+        """
+        lock = self._resync_locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            if session_id not in self._dirty:
+                return
+
+            messages = self._local.get_history(session_id)
+            if messages:
+                await self._call_primary(self._primary.add_messages, session_id, messages)
+
+            # Keep anything written locally while the copy was in flight
+            remaining = self._local.get_history(session_id)[len(messages):]
+            self._local.delete(session_id)
+            if remaining:
+                self._local.add_messages(session_id, remaining)
+            else:
+                self._dirty.discard(session_id)
+                # Waiters holding this lock see the session is clean and return
+                self._resync_locks.pop(session_id, None)
+
+        logger.info("memory_session_resynced", session_id=session_id, message_count=len(messages))
+
+    async def _resync_all(self) -> None:
+        """Copy every dirty session back, stopping at the first failure."""
+        for session_id in list(self._dirty):
+            try:
+                await self._resync_session(session_id)
+            except Exception as e:
+                logger.warning("memory_resync_interrupted", remaining=len(self._dirty), error=str(e))
+                return
+
+    def _log_fallback(self, operation: str, session_id: str, error: Exception) -> None:
+        """Log a backend failure handled by the local store."""
+        if isinstance(error, CircuitBreakerError):
+            # Expected while the circuit is open; the breaker already logged the outage
+            logger.debug("memory_using_local_store", operation=operation, session_id=session_id)
+        else:
+            logger.warning(
+                "memory_backend_call_failed_using_local_store",
+                backend=self.backend,
+                operation=operation,
+                session_id=session_id,
+                error=str(error),
+            )
+
+
+def create_memory_service(backend: str) -> MemoryService:
+    """
+    Build a memory service for a backend name.
+
+    Args:
+        backend: "redis", "sqlite" or "memory" ("redis" runs as "memory"
+            when REDIS_USE_FOR_MEMORY is off)
+
+    Returns:
+        MemoryService: A new, uninitialized service
+    """
+    if backend not in MEMORY_BACKENDS:
+        raise ValueError(f"Unsupported memory backend: {backend}")
+
+    if backend == "redis" and settings.REDIS_USE_FOR_MEMORY:
+        return MemoryService(
+            primary=get_redis_memory(),
+            breaker=get_redis_circuit_breaker(),
+            retry_config=get_redis_retry_config,
+            backend="redis",
+        )
+    if backend == "sqlite":
+        return MemoryService(
+            primary=get_sqlite_memory(),
+            breaker=get_sqlite_circuit_breaker(),
+            backend="sqlite",
+        )
+    return MemoryService(backend="memory")
+
+
+# Global instance
+_memory_service: Optional[MemoryService] = None
+
+
+def get_memory_service() -> MemoryService:
+    """
+    Get the global memory service.
+
+    Returns:
+        MemoryService: The singleton instance
+    """
+    global _memory_service
+    if _memory_service is None:
+        _memory_service = create_memory_service(settings.MEMORY_BACKEND)
+    return _memory_service
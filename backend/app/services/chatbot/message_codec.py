@@ -0,0 +1,97 @@
+"""
+Stored Message Codec
+
+Compact, versioned encoding for conversation messages at rest (Redis list
+elements and SQLite rows).
+
+Formats (first byte):
+- ``0x01``: MessagePack ``[role, content, timestamp]`` where ``role`` is a
+  small integer for known roles (see ROLE_CODES) and ``timestamp`` is
+  integer Unix epoch seconds
+- ``0x02``: the same payload, zlib-compressed (used for messages above
+  COMPRESS_THRESHOLD_BYTES when it actually saves space)
+- ``{``: legacy JSON object ``{"role", "content", "timestamp"}`` with an
+  ISO timestamp; still decoded, and written when the "json" codec is
+  configured (e.g. while older workers are still running)
+"""
+
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Optional
+
+import msgpack
+import orjson
+
+# Configuration
+COMPRESS_THRESHOLD_BYTES = 1024  # Payloads smaller than this are never compressed
+COMPRESSION_LEVEL = 1  # zlib level: favour CPU over the last few percent
+CODECS = ("compact", "json")
+
+FORMAT_MSGPACK = 0x01
+FORMAT_MSGPACK_ZLIB = 0x02
+
+ROLE_CODES = {"user": 0, "assistant": 1, "system": 2}
+_ROLES_BY_CODE = {code: role for role, code in ROLE_CODES.items()}
+
+
+def encode_message(
+    role: str, content: str, timestamp: Optional[float] = None, codec: str = "compact"
+) -> bytes:
+    """
+    Encode a message for storage.
+
+    Args:
+        role: Message role
+        content: Message text
+        timestamp: Unix epoch seconds (defaults to now)
+        codec: "compact" (MessagePack, optionally compressed) or "json" (legacy)
+
+    Returns:
+        The stored representation
+    """
+    if timestamp is None:
+        timestamp = time.time()
+
+    if codec == "json":
+        return _encode_json(role, content, timestamp)
+
+    payload = msgpack.packb([ROLE_CODES.get(role, role), content, int(timestamp)], use_bin_type=True)
+    if len(payload) >= COMPRESS_THRESHOLD_BYTES:
+        compressed = zlib.compress(payload, COMPRESSION_LEVEL)
+        if len(compressed) < len(payload):
+            return bytes((FORMAT_MSGPACK_ZLIB,)) + compressed
+    return bytes((FORMAT_MSGPACK,)) + payload
+
+
+def decode_message(data: bytes | str) -> dict[str, Any]:
+    """
+    Decode a stored message in any supported format.
+
+    Args:
+        data: Stored representation
+
+    Returns:
+        Dict with "role", "content" and "timestamp" (epoch seconds for
+        compact records, the original ISO string for legacy JSON)
+
+    Raises:
+        ValueError: If the data is not a supported format
+    """
+    if isinstance(data, str) or data[:1] == b"{":
+        return orjson.loads(data)
+
+    fmt, payload = data[0], data[1:]
+    if fmt == FORMAT_MSGPACK_ZLIB:
+        payload = zlib.decompress(payload)
+    elif fmt != FORMAT_MSGPACK:
+        raise ValueError(f"Unknown stored message format: {fmt:#04x}")
+
+    role, content, timestamp = msgpack.unpackb(payload, raw=False)
+    return {"role": _ROLES_BY_CODE.get(role, role), "content": content, "timestamp": timestamp}
+
+
+def _encode_json(role: str, content: str, timestamp: float) -> bytes:
+    """Encode in the legacy JSON format."""
+    iso = datetime.utcfromtimestamp(timestamp).isoformat()
+    return orjson.dumps({"role": role, "content": content, "timestamp": iso})
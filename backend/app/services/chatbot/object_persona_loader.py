@@ -156,8 +156,10 @@ class ObjectPersonaManager:
         content = load_object_persona(object_id)
 
         if content is None:
-            content = get_default_object_persona(object_id, object_title)
+            # Not cached: it embeds the caller's title, and unknown ids would
+            # grow the cache without bound
             logger.info("using_default_object_persona", object_id=object_id)
+            return get_default_object_persona(object_id, object_title)
 
         self._cache[object_id] = content
         return content
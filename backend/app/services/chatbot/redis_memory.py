@@ -2,22 +2,123 @@
 Redis-Based Conversation Memory
 
 Persistent conversation storage using Redis with TTL support.
+
+Storage modes:
+- "list" (default): one Redis list per conversation, one encoded message
+  per element (see ``message_codec``; legacy JSON elements are still read).
+  Appends are a single atomic RPUSH + LTRIM + EXPIRE transaction and reads
+  fetch only the requested tail with LRANGE.
+- "string": legacy mode storing the whole history as one JSON blob that is
+  read, modified and written back on every append.
+
+Legacy string keys are converted to lists in place the first time list
+mode touches them (or in bulk via ``migrate_legacy_keys``).
+
+A conversation's running summary (see ``summarizer``) is a separate string
+key, ``conversation_summary:<session>``, and its metadata (created,
+last_seen, total messages written) a small hash, ``conversation_meta:<session>``,
+so tooling can inspect sessions without decoding histories. Both expire
+with the conversation.
+
+The TTL slides: writes reset it in their transaction and reads reset it in
+the same script call that fetches the history, so neither costs an extra
+round trip. Reads served by the local cache refresh it in the background,
+at most once per TOUCH_INTERVAL_SECONDS per session.
+
+Recent histories are cached per worker (see ``history_cache``) so repeated
+reads of a session skip Redis; the cache is invalidated through keyspace
+notifications.
 """
 
+import asyncio
 import json
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
 
 import redis.asyncio as aioredis
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import ResponseError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+from redis.exceptions import WatchError
 
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.services.chatbot.history_cache import HistoryCache
+from app.services.chatbot.message_codec import CODECS, decode_message, encode_message
 
 logger = get_logger(__name__)
 
 # Configuration
 DEFAULT_TTL = 3600  # 1 hour in seconds
 MAX_HISTORY = 20  # Maximum messages to keep per conversation
+STORAGE_MODES = ("list", "string")
+TOUCH_INTERVAL_SECONDS = 60  # Minimum gap between TTL refreshes for cache-served reads
+
+# Read a conversation and, if it exists, slide the TTL of its keys and
+# record the access. ARGV[1] is "list" (LRANGE from ARGV[2]), "string" (GET)
+# or "touch" (no read).
+READ_AND_TOUCH_SCRIPT = """
+local result = false
+if ARGV[1] == 'list' then
+    result = redis.call('LRANGE', KEYS[1], ARGV[2], -1)
+elseif ARGV[1] == 'string' then
+    result = redis.call('GET', KEYS[1])
+end
+if redis.call('EXPIRE', KEYS[1], ARGV[3]) == 1 then
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+    redis.call('HSET', KEYS[3], 'last_seen', ARGV[4])
+    redis.call('EXPIRE', KEYS[3], ARGV[3])
+end
+return result
+"""
+
+# Atomically convert a legacy JSON string key into a list, keeping its TTL.
+# No-op if another worker already converted it.
+MIGRATE_LEGACY_KEY_SCRIPT = """
+if redis.call('TYPE', KEYS[1]).ok ~= 'string' then
+    return 0
+end
+local messages = cjson.decode(redis.call('GET', KEYS[1]))
+local ttl = redis.call('TTL', KEYS[1])
+redis.call('DEL', KEYS[1])
+local first = math.max(1, #messages - tonumber(ARGV[1]) + 1)
+for i = first, #messages do
+    redis.call('RPUSH', KEYS[1], cjson.encode(messages[i]))
+end
+if ttl > 0 then
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+return #messages - first + 1
+"""
+
+
+def covered_head_length(head: List[Dict[str, str]], covered: List[Dict[str, str]]) -> int:
+    """
+    Count the messages at the head of a history that a summary covered.
+
+    ``covered`` was read from the head of the history before summarizing.
+    Turns appended since then may have made the message cap trim part of
+    it, so the current head starts with a suffix of ``covered``; this is the
+    length of the longest such suffix. Messages are compared by role and
+    content; a repeated message is indistinguishable, but its text is then
+    covered by the summary either way.
+
+    Args:
+        head: The oldest messages of the history now (at least ``len(covered)`` if there are)
+        covered: The messages folded into the summary, oldest first
+    """
+    head_pairs = [(msg["role"], msg["content"]) for msg in head[: len(covered)]]
+    covered_pairs = [(msg["role"], msg["content"]) for msg in covered]
+    for start in range(len(covered_pairs)):
+        if head_pairs[: len(covered_pairs) - start] == covered_pairs[start:]:
+            return len(covered_pairs) - start
+    return 0
+
+
+def _is_wrong_type(error: ResponseError) -> bool:
+    """Check whether a Redis error is a WRONGTYPE error (legacy string key)."""
+    return "WRONGTYPE" in str(error)
 
 
 class RedisConversationMemory:
@@ -25,7 +126,8 @@ class RedisConversationMemory:
     Redis-based conversation storage with TTL support.
 
     Stores conversation history in Redis with automatic expiration.
-    Each conversation is stored as a JSON list of messages.
+    Each conversation is stored as a Redis list of JSON messages (or as a
+    single JSON blob in legacy "string" mode).
     """
 
     def __init__(
@@ -33,6 +135,9 @@ class RedisConversationMemory:
         redis_url: Optional[str] = None,
         ttl: int = DEFAULT_TTL,
         max_history: int = MAX_HISTORY,
+        storage_mode: Optional[str] = None,
+        cache_size: Optional[int] = None,
+        storage_codec: Optional[str] = None,
     ) -> None:
         """
         Initialize Redis conversation memory.
@@ -41,13 +146,31 @@ class RedisConversationMemory:
             redis_url: Redis connection URL (defaults to settings)
             ttl: Time-to-live for conversations in seconds
             max_history: Maximum number of messages to keep per conversation
+            storage_mode: "list" or "string" (defaults to settings)
+            cache_size: Sessions kept in the local history cache (0 disables,
+                defaults to settings)
+            storage_codec: "compact" or "json" encoding for list elements
+                (defaults to settings)
         """
         self.redis_url = redis_url or getattr(
             settings, "REDIS_URL", "redis://localhost:6379/0"
         )
         self.ttl = ttl
         self.max_history = max_history
+        self.storage_mode = storage_mode or settings.REDIS_MEMORY_STORAGE_MODE
+        if self.storage_mode not in STORAGE_MODES:
+            raise ValueError(f"Unsupported Redis storage mode: {self.storage_mode}")
+        self.storage_codec = storage_codec or settings.MEMORY_STORAGE_CODEC
+        if self.storage_codec not in CODECS:
+            raise ValueError(f"Unsupported storage codec: {self.storage_codec}")
         self._redis: Optional[aioredis.Redis] = None
+        if cache_size is None:
+            cache_size = settings.REDIS_MEMORY_CACHE_SIZE
+        self._cache = HistoryCache(cache_size) if cache_size > 0 else None
+        # Sessions whose TTL was refreshed for a cached read in the current window
+        self._touched: set[str] = set()
+        self._touch_window_start = 0.0
+        self._touch_tasks: set[asyncio.Task] = set()
 
     async def initialize(self) -> None:
         """
@@ -61,21 +184,31 @@ class RedisConversationMemory:
         try:
             self._redis = await aioredis.from_url(
                 self.redis_url,
-                encoding="utf-8",
-                decode_responses=True,
+                # Raw bytes: list elements may be binary (see message_codec)
+                decode_responses=False,
                 socket_connect_timeout=5,
                 socket_keepalive=True,
             )
             # Test connection
             await self._redis.ping()
+            self._migrate_script = self._redis.register_script(MIGRATE_LEGACY_KEY_SCRIPT)
+            self._read_script = self._redis.register_script(READ_AND_TOUCH_SCRIPT)
+            if self._cache is not None:
+                await self._cache.start(self._redis, self._get_key("*"))
             logger.info(
                 "redis_memory_initialized",
                 url=self.redis_url,
                 ttl=self.ttl,
                 max_history=self.max_history,
+                storage_mode=self.storage_mode,
+                storage_codec=self.storage_codec,
             )
         except Exception as e:
             logger.error("redis_memory_initialization_failed", error=str(e))
+            # Leave the instance uninitialized so a later initialize() can retry
+            if self._redis is not None:
+                await self._redis.aclose()
+                self._redis = None
             raise
 
     async def close(self) -> None:
@@ -84,6 +217,12 @@ class RedisConversationMemory:
 
         Should be called during application shutdown.
         """
+        if self._cache is not None:
+            await self._cache.stop()
+
+        if self._touch_tasks:
+            await asyncio.gather(*self._touch_tasks, return_exceptions=True)
+
         if self._redis:
             await self._redis.aclose()
             self._redis = None
@@ -93,6 +232,25 @@ class RedisConversationMemory:
         """Get Redis key for a conversation."""
         return f"conversation:{session_id}"
 
+    def _get_summary_key(self, session_id: str) -> str:
+        """Get Redis key for a conversation's running summary."""
+        # Outside the conversation:* namespace, so legacy migration and the cache skip it
+        return f"conversation_summary:{session_id}"
+
+    def _get_meta_key(self, session_id: str) -> str:
+        """Get Redis key for a conversation's metadata hash."""
+        return f"conversation_meta:{session_id}"
+
+    def _queue_meta_update(self, pipe, session_id: str, timestamp: float, added: int) -> None:
+        """Queue the metadata and TTL updates that accompany a write."""
+        meta_key = self._get_meta_key(session_id)
+        now = int(timestamp)
+        pipe.hsetnx(meta_key, "created", now)
+        pipe.hset(meta_key, "last_seen", now)
+        pipe.hincrby(meta_key, "messages", added)
+        pipe.expire(meta_key, self.ttl)
+        pipe.expire(self._get_summary_key(session_id), self.ttl)
+
     async def add_message(self, session_id: str, role: str, content: str) -> None:
         """
         Add a message to a conversation.
@@ -102,45 +260,62 @@ class RedisConversationMemory:
             role: Message role ("user" or "assistant")
             content: Message content
         """
+        await self.add_messages(session_id, [{"role": role, "content": content}])
+
+    async def add_messages(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        """
+        Add several messages to a conversation in a single write.
+
+        Args:
+            session_id: Conversation session identifier
+            messages: Messages with "role" and "content", oldest first
+        """
         if not self._redis:
             raise RuntimeError("Redis not initialized. Call initialize() first.")
 
-        key = self._get_key(session_id)
-
-        # Create message object
-        message = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.utcnow().isoformat(),
-        }
+        if not messages:
+            return
 
-        try:
-            # Get existing messages
-            existing = await self._redis.get(key)
-            messages = json.loads(existing) if existing else []
+        key = self._get_key(session_id)
 
-            # Add new message
-            messages.append(message)
+        timestamp = time.time()
 
-            # Trim history if needed
-            if len(messages) > self.max_history:
-                messages = messages[-self.max_history :]
+        if self._cache is not None:
+            self._cache.expect_self_write(key, self.storage_mode)
 
-            # Store back to Redis with TTL
-            await self._redis.setex(
-                key,
-                self.ttl,
-                json.dumps(messages),
-            )
+        try:
+            if self.storage_mode == "list":
+                message_count = await self._append_list(
+                    session_id,
+                    timestamp,
+                    [
+                        encode_message(msg["role"], msg["content"], timestamp, self.storage_codec)
+                        for msg in messages
+                    ],
+                )
+            else:
+                iso_timestamp = datetime.utcfromtimestamp(timestamp).isoformat()
+                records = [
+                    {"role": msg["role"], "content": msg["content"], "timestamp": iso_timestamp}
+                    for msg in messages
+                ]
+                message_count = await self._append_string(session_id, timestamp, records)
+
+            if self._cache is not None:
+                self._cache.apply_self_write(
+                    key, [(msg["role"], msg["content"]) for msg in messages], self.max_history
+                )
 
             logger.debug(
                 "message_added_to_redis",
                 session_id=session_id,
-                role=role,
-                message_count=len(messages),
+                roles=[msg["role"] for msg in messages],
+                message_count=message_count,
             )
 
         except Exception as e:
+            if self._cache is not None:
+                self._cache.abort_self_write(key)
             logger.error(
                 "add_message_failed",
                 session_id=session_id,
@@ -148,6 +323,130 @@ class RedisConversationMemory:
             )
             raise
 
+    async def _append_list(self, session_id: str, timestamp: float, payloads: List[bytes]) -> int:
+        """
+        Append to a list key with RPUSH + LTRIM + EXPIRE (and metadata) in one transaction.
+
+        A legacy string key is converted first, inside the same transaction,
+        so the append never half-applies on a WRONGTYPE error.
+        """
+        key = self._get_key(session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            await self._migrate_script(keys=[key], args=[self.max_history], client=pipe)
+            pipe.rpush(key, *payloads)
+            pipe.ltrim(key, -self.max_history, -1)
+            pipe.expire(key, self.ttl)
+            self._queue_meta_update(pipe, session_id, timestamp, len(payloads))
+            migrated, length, *_ = await pipe.execute()
+
+        if migrated:
+            logger.info("legacy_conversation_key_migrated", key=key, message_count=migrated)
+            if self._cache is not None:
+                # The conversion's notifications were not expected; drop the entry
+                self._cache.abort_self_write(key)
+        return min(length, self.max_history)
+
+    async def _append_string(self, session_id: str, timestamp: float, records: List[dict]) -> int:
+        """Append to a legacy JSON blob key (read-modify-write)."""
+        key = self._get_key(session_id)
+
+        # Get existing messages
+        existing = await self._redis.get(key)
+        messages = json.loads(existing) if existing else []
+
+        # Add new messages
+        messages.extend(records)
+
+        # Trim history if needed
+        if len(messages) > self.max_history:
+            messages = messages[-self.max_history :]
+
+        # Store back to Redis with TTL
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.setex(key, self.ttl, json.dumps(messages))
+            self._queue_meta_update(pipe, session_id, timestamp, len(records))
+            await pipe.execute()
+        return len(messages)
+
+    async def _read_and_touch(self, session_id: str, mode: str, start: int = 0):
+        """Run READ_AND_TOUCH_SCRIPT for a conversation."""
+        return await self._read_script(
+            keys=[
+                self._get_key(session_id),
+                self._get_summary_key(session_id),
+                self._get_meta_key(session_id),
+            ],
+            args=[mode, start, self.ttl, int(time.time())],
+        )
+
+    async def _read_messages(self, session_id: str, limit: Optional[int]) -> list[dict]:
+        """Read the newest ``limit`` messages (all if None), sliding the TTL."""
+        if self.storage_mode == "string":
+            existing = await self._read_and_touch(session_id, "string")
+            messages = json.loads(existing) if existing else []
+            return messages[-limit:] if limit else messages
+
+        start = -limit if limit else 0
+        try:
+            raw_messages = await self._read_and_touch(session_id, "list", start)
+        except ResponseError as e:
+            if not _is_wrong_type(e):
+                raise
+            await self._migrate_key(self._get_key(session_id))
+            raw_messages = await self._read_and_touch(session_id, "list", start)
+
+        return [decode_message(raw) for raw in raw_messages]
+
+    def _touch_in_background(self, session_id: str) -> None:
+        """Slide the TTL of a session read from the cache, at most once per window."""
+        now = time.monotonic()
+        if now - self._touch_window_start >= TOUCH_INTERVAL_SECONDS:
+            self._touched.clear()
+            self._touch_window_start = now
+        if session_id in self._touched:
+            return
+        self._touched.add(session_id)
+
+        task = asyncio.create_task(self._touch(session_id))
+        self._touch_tasks.add(task)
+        task.add_done_callback(self._touch_tasks.discard)
+
+    async def _touch(self, session_id: str) -> None:
+        """Slide a session's TTL without reading it, logging failures."""
+        try:
+            await self._read_and_touch(session_id, "touch")
+        except Exception as e:
+            logger.debug("conversation_touch_failed", session_id=session_id, error=str(e))
+
+    async def _migrate_key(self, key: str) -> None:
+        """Convert a legacy JSON string key into a list."""
+        migrated = await self._migrate_script(keys=[key], args=[self.max_history])
+        if isinstance(key, bytes):
+            key = key.decode()
+        logger.info("legacy_conversation_key_migrated", key=key, message_count=migrated)
+
+    async def migrate_legacy_keys(self, batch_size: int = 500) -> int:
+        """
+        Convert every legacy ``conversation:*`` string key into a list.
+
+        Safe to run while the application is serving traffic.
+
+        Returns:
+            Number of keys migrated
+        """
+        if not self._redis:
+            raise RuntimeError("Redis not initialized. Call initialize() first.")
+
+        migrated = 0
+        async for key in self._redis.scan_iter(
+            match=self._get_key("*"), count=batch_size, _type="string"
+        ):
+            await self._migrate_key(key)
+            migrated += 1
+
+        logger.info("legacy_conversation_keys_migrated", count=migrated)
+        return migrated
+
     async def get_history(
         self, session_id: str, limit: Optional[int] = None
     ) -> List[Dict[str, str]]:
@@ -167,17 +466,21 @@ class RedisConversationMemory:
         key = self._get_key(session_id)
 
         try:
-            # Get messages from Redis
-            existing = await self._redis.get(key)
-            messages = json.loads(existing) if existing else []
+            if self._cache is not None and self._cache.enabled:
+                history = await self._get_cached_history(session_id, key)
+                if limit:
+                    history = history[-limit:]
+                return [{"role": role, "content": content} for role, content in history]
 
-            # Apply limit if specified
-            if limit:
-                messages = messages[-limit:]
+            # Get only the requested tail from Redis
+            messages = await self._read_messages(session_id, limit)
 
             # Convert to LangChain format (remove timestamp)
             return [{"role": msg["role"], "content": msg["content"]} for msg in messages]
 
+        except (RedisConnectionError, RedisTimeoutError):
+            # Redis is unreachable: let the caller fall back instead of reporting no history
+            raise
         except Exception as e:
             logger.error(
                 "get_history_failed",
@@ -187,6 +490,107 @@ class RedisConversationMemory:
             # Return empty history on error
             return []
 
+    async def _get_cached_history(self, session_id: str, key: str) -> list[tuple[str, str]]:
+        """Get a full history from the local cache, reading through to Redis on a miss."""
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._touch_in_background(session_id)
+            return cached
+
+        version = self._cache.begin_fill(key)
+        history = None
+        try:
+            messages = await self._read_messages(session_id, None)
+            history = [(msg["role"], msg["content"]) for msg in messages]
+            return history
+        finally:
+            self._cache.finish_fill(key, version, history)
+
+    async def get_summary(self, session_id: str) -> Optional[str]:
+        """
+        Get the running summary of a conversation's older messages.
+
+        Args:
+            session_id: Conversation session identifier
+
+        Returns:
+            The summary, or None if the conversation has none
+        """
+        if not self._redis:
+            raise RuntimeError("Redis not initialized. Call initialize() first.")
+
+        try:
+            summary = await self._redis.get(self._get_summary_key(session_id))
+        except (RedisConnectionError, RedisTimeoutError):
+            raise
+        except Exception as e:
+            logger.error("get_summary_failed", session_id=session_id, error=str(e))
+            return None
+
+        return summary.decode() if summary is not None else None
+
+    async def set_summary(
+        self, session_id: str, summary: str, covered: List[Dict[str, str]]
+    ) -> None:
+        """
+        Store a running summary and drop the oldest messages it covers.
+
+        The head is checked and trimmed in one WATCH transaction, so turns
+        appended (and cap trims) while the summary was written never drop
+        messages the summary did not see.
+
+        Args:
+            session_id: Conversation session identifier
+            summary: Summary of everything before the messages kept
+            covered: The oldest messages folded into the summary, as read
+        """
+        if not self._redis:
+            raise RuntimeError("Redis not initialized. Call initialize() first.")
+
+        key = self._get_key(session_id)
+        summary_key = self._get_summary_key(session_id)
+
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                while True:
+                    try:
+                        await pipe.watch(key)
+                        if self.storage_mode == "list":
+                            head = [
+                                decode_message(raw)
+                                for raw in await pipe.lrange(key, 0, len(covered) - 1)
+                            ]
+                        else:
+                            existing = await pipe.get(key)
+                            messages = json.loads(existing) if existing else []
+                            head = messages[: len(covered)]
+                        drop = covered_head_length(head, covered)
+
+                        pipe.multi()
+                        pipe.set(summary_key, summary, ex=self.ttl)
+                        if self.storage_mode == "list":
+                            pipe.ltrim(key, drop, -1)
+                        else:
+                            pipe.setex(key, self.ttl, json.dumps(messages[drop:]))
+                        await pipe.execute()
+                        break
+                    except WatchError:
+                        # A turn landed in between: re-read the head
+                        continue
+
+            logger.debug("conversation_summarized", session_id=session_id, dropped=drop)
+
+        except Exception as e:
+            logger.error("set_summary_failed", session_id=session_id, error=str(e))
+            raise
+        finally:
+            if self._cache is not None:
+                self._cache.invalidate(key)
+
+    def get_cache_stats(self) -> Optional[dict[str, int | bool]]:
+        """Get local history cache statistics (None if the cache is disabled)."""
+        return self._cache.get_stats() if self._cache is not None else None
+
     async def clear(self, session_id: str) -> None:
         """
         Clear a conversation (delete all messages).
@@ -200,7 +604,11 @@ class RedisConversationMemory:
         key = self._get_key(session_id)
 
         try:
-            await self._redis.delete(key)
+            await self._redis.delete(
+                key, self._get_summary_key(session_id), self._get_meta_key(session_id)
+            )
+            if self._cache is not None:
+                self._cache.invalidate(key)
             logger.info("conversation_cleared", session_id=session_id)
         except Exception as e:
             logger.error("clear_conversation_failed", session_id=session_id, error=str(e))
@@ -238,9 +646,28 @@ class RedisConversationMemory:
         key = self._get_key(session_id)
         return await self._redis.ttl(key)
 
+    async def get_metadata(self, session_id: str) -> Optional[Dict[str, int]]:
+        """
+        Get a conversation's metadata without reading its history.
+
+        Args:
+            session_id: Conversation session identifier
+
+        Returns:
+            Dict with "created" and "last_seen" (Unix epoch seconds) and
+            "messages" (total written), or None if the conversation has none
+        """
+        if not self._redis:
+            raise RuntimeError("Redis not initialized. Call initialize() first.")
+
+        meta = await self._redis.hgetall(self._get_meta_key(session_id))
+        if not meta:
+            return None
+        return {field.decode(): int(value) for field, value in meta.items()}
+
     async def extend_ttl(self, session_id: str, ttl: Optional[int] = None) -> None:
         """
-        Extend TTL for a conversation.
+        Extend TTL for a conversation (reads and writes already slide it).
 
         Args:
             session_id: Conversation session identifier
@@ -249,8 +676,14 @@ class RedisConversationMemory:
         if not self._redis:
             raise RuntimeError("Redis not initialized. Call initialize() first.")
 
-        key = self._get_key(session_id)
-        await self._redis.expire(key, ttl or self.ttl)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            for key in (
+                self._get_key(session_id),
+                self._get_summary_key(session_id),
+                self._get_meta_key(session_id),
+            ):
+                pipe.expire(key, ttl or self.ttl)
+            await pipe.execute()
         logger.debug("conversation_ttl_extended", session_id=session_id, ttl=ttl or self.ttl)
 
 
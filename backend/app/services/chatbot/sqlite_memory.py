@@ -0,0 +1,461 @@
+"""
+SQLite-Based Conversation Memory
+
+Persistent conversation storage on the configured DATABASE_URL
+(``sqlite+aiosqlite``) for single-node deployments without Redis.
+
+- WAL journal mode, so reads never wait for the writer
+- Pooled connections shared by all sessions
+- Messages indexed by ``(session_id, seq)``; a turn is inserted in one batch
+- Message rows hold the compact encoding from ``message_codec``
+- Running summaries (see ``summarizer``) have their own table
+- Conversations expire DEFAULT_TTL seconds after their last write, like
+  their Redis counterparts, and expired rows are pruned periodically
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import (
+    Column,
+    Float,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    Text,
+    delete,
+    event,
+    insert,
+    select,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.chatbot.message_codec import CODECS, decode_message, encode_message
+from app.services.chatbot.redis_memory import DEFAULT_TTL, MAX_HISTORY, covered_head_length
+
+logger = get_logger(__name__)
+
+# Configuration
+POOL_SIZE = 5  # Pooled SQLite connections
+PRUNE_INTERVAL_SECONDS = 300  # How often expired conversations are deleted
+BUSY_TIMEOUT_MS = 5000  # Wait for the write lock instead of failing with SQLITE_BUSY
+
+metadata = MetaData()
+
+conversation_sessions = Table(
+    "conversation_sessions",
+    metadata,
+    Column("session_id", String(255), primary_key=True),
+    Column("updated_at", Float, nullable=False, index=True),  # Unix epoch seconds
+)
+
+conversation_messages = Table(
+    "conversation_messages",
+    metadata,
+    # Monotonic across all sessions; orders the messages of each session
+    Column("seq", Integer, primary_key=True, autoincrement=True),
+    Column("session_id", String(255), nullable=False),
+    Column("payload", LargeBinary, nullable=False),  # Role, content and timestamp
+    Index("ix_conversation_messages_session_seq", "session_id", "seq"),
+)
+
+conversation_summaries = Table(
+    "conversation_summaries",
+    metadata,
+    Column("session_id", String(255), primary_key=True),
+    Column("summary", Text, nullable=False),
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Configure each new SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+class SQLiteConversationMemory:
+    """
+    SQLite-based conversation storage with TTL support.
+
+    Stores one row per message and one row per conversation (for expiry).
+    """
+
+    def __init__(
+        self,
+        database_url: Optional[str] = None,
+        ttl: int = DEFAULT_TTL,
+        max_history: int = MAX_HISTORY,
+        storage_codec: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize SQLite conversation memory.
+
+        Args:
+            database_url: SQLAlchemy URL (defaults to settings.DATABASE_URL)
+            ttl: Seconds after the last write before a conversation expires
+            max_history: Maximum number of messages to keep per conversation
+            storage_codec: "compact" or "json" message encoding (defaults to settings)
+        """
+        self.database_url = database_url or settings.DATABASE_URL
+        self.ttl = ttl
+        self.max_history = max_history
+        self.storage_codec = storage_codec or settings.MEMORY_STORAGE_CODEC
+        if self.storage_codec not in CODECS:
+            raise ValueError(f"Unsupported storage codec: {self.storage_codec}")
+        self._engine: Optional[AsyncEngine] = None
+        self._prune_task: Optional[asyncio.Task] = None
+
+    async def initialize(self) -> None:
+        """
+        Open the connection pool, create tables and start pruning.
+
+        Should be called during application startup.
+        """
+        if self._engine is not None:
+            return
+
+        url = make_url(self.database_url)
+        in_memory = url.database in (None, "", ":memory:")
+        if not in_memory:
+            os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+
+        pool_options = {} if in_memory else {"pool_size": POOL_SIZE, "max_overflow": 0}
+        engine = create_async_engine(url, **pool_options)
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(metadata.create_all)
+        except Exception as e:
+            logger.error("sqlite_memory_initialization_failed", error=str(e))
+            await engine.dispose()
+            raise
+
+        self._engine = engine
+        self._prune_task = asyncio.create_task(self._prune_loop())
+        logger.info(
+            "sqlite_memory_initialized",
+            database=url.database,
+            ttl=self.ttl,
+            max_history=self.max_history,
+        )
+
+    async def close(self) -> None:
+        """
+        Stop pruning and close the connection pool.
+
+        Should be called during application shutdown.
+        """
+        if self._prune_task:
+            self._prune_task.cancel()
+            try:
+                await self._prune_task
+            except asyncio.CancelledError:
+                pass
+            self._prune_task = None
+
+        if self._engine:
+            await self._engine.dispose()
+            self._engine = None
+            logger.info("sqlite_memory_closed")
+
+    async def add_message(self, session_id: str, role: str, content: str) -> None:
+        """
+        Add a message to a conversation.
+
+        Args:
+            session_id: Conversation session identifier
+            role: Message role ("user" or "assistant")
+            content: Message content
+        """
+        await self.add_messages(session_id, [{"role": role, "content": content}])
+
+    async def add_messages(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        """
+        Add several messages to a conversation in a single transaction.
+
+        Args:
+            session_id: Conversation session identifier
+            messages: Messages with "role" and "content", oldest first
+        """
+        if not self._engine:
+            raise RuntimeError("SQLite not initialized. Call initialize() first.")
+
+        if not messages:
+            return
+
+        now = time.time()
+        rows = [
+            {
+                "session_id": session_id,
+                "payload": encode_message(msg["role"], msg["content"], now, self.storage_codec),
+            }
+            for msg in messages
+        ]
+
+        # Oldest message still kept after this write; everything before it is trimmed
+        keep_from = (
+            select(conversation_messages.c.seq)
+            .where(conversation_messages.c.session_id == session_id)
+            .order_by(conversation_messages.c.seq.desc())
+            .limit(1)
+            .offset(self.max_history - 1)
+            .scalar_subquery()
+        )
+
+        try:
+            async with self._engine.begin() as conn:
+                expired = await conn.scalar(
+                    select(conversation_sessions.c.updated_at).where(
+                        conversation_sessions.c.session_id == session_id,
+                        conversation_sessions.c.updated_at < now - self.ttl,
+                    )
+                )
+                if expired is not None:
+                    # Expired but not pruned yet: start over, like an expired Redis key
+                    await self._delete_session_rows(conn, session_id, keep_session=True)
+
+                upsert = sqlite_insert(conversation_sessions).values(
+                    session_id=session_id, updated_at=now
+                )
+                await conn.execute(
+                    upsert.on_conflict_do_update(
+                        index_elements=["session_id"], set_={"updated_at": now}
+                    )
+                )
+                await conn.execute(insert(conversation_messages), rows)
+                await conn.execute(
+                    delete(conversation_messages).where(
+                        conversation_messages.c.session_id == session_id,
+                        conversation_messages.c.seq < keep_from,
+                    )
+                )
+
+            logger.debug(
+                "message_added_to_sqlite",
+                session_id=session_id,
+                roles=[msg["role"] for msg in messages],
+            )
+
+        except Exception as e:
+            logger.error("add_message_failed", session_id=session_id, error=str(e))
+            raise
+
+    async def get_history(
+        self, session_id: str, limit: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Get conversation history.
+
+        Args:
+            session_id: Conversation session identifier
+            limit: Maximum number of messages to return (None = all)
+
+        Returns:
+            List of messages in LangChain format
+        """
+        if not self._engine:
+            raise RuntimeError("SQLite not initialized. Call initialize() first.")
+
+        query = (
+            select(conversation_messages.c.payload)
+            .join(
+                conversation_sessions,
+                conversation_sessions.c.session_id == conversation_messages.c.session_id,
+            )
+            .where(
+                conversation_messages.c.session_id == session_id,
+                conversation_sessions.c.updated_at >= time.time() - self.ttl,
+            )
+            .order_by(conversation_messages.c.seq.desc())
+            .limit(limit or self.max_history)
+        )
+
+        async with self._engine.connect() as conn:
+            payloads = (await conn.execute(query)).scalars().all()
+
+        messages = [decode_message(payload) for payload in reversed(payloads)]
+        return [{"role": msg["role"], "content": msg["content"]} for msg in messages]
+
+    async def get_summary(self, session_id: str) -> Optional[str]:
+        """
+        Get the running summary of a conversation's older messages.
+
+        Args:
+            session_id: Conversation session identifier
+
+        Returns:
+            The summary, or None if the conversation has none
+        """
+        if not self._engine:
+            raise RuntimeError("SQLite not initialized. Call initialize() first.")
+
+        query = (
+            select(conversation_summaries.c.summary)
+            .join(
+                conversation_sessions,
+                conversation_sessions.c.session_id == conversation_summaries.c.session_id,
+            )
+            .where(
+                conversation_summaries.c.session_id == session_id,
+                conversation_sessions.c.updated_at >= time.time() - self.ttl,
+            )
+        )
+        async with self._engine.connect() as conn:
+            return await conn.scalar(query)
+
+    async def set_summary(
+        self, session_id: str, summary: str, covered: List[Dict[str, str]]
+    ) -> None:
+        """
+        Store a running summary and drop the oldest messages it covers.
+
+        Messages are deleted by seq after matching the current head against
+        ``covered``, so turns appended (and cap trims) while the summary was
+        written never drop messages the summary did not see.
+
+        Args:
+            session_id: Conversation session identifier
+            summary: Summary of everything before the messages kept
+            covered: The oldest messages folded into the summary, as read
+        """
+        if not self._engine:
+            raise RuntimeError("SQLite not initialized. Call initialize() first.")
+
+        head_query = (
+            select(conversation_messages.c.seq, conversation_messages.c.payload)
+            .where(conversation_messages.c.session_id == session_id)
+            .order_by(conversation_messages.c.seq)
+            .limit(len(covered))
+        )
+        upsert = sqlite_insert(conversation_summaries).values(
+            session_id=session_id, summary=summary
+        )
+
+        try:
+            async with self._engine.begin() as conn:
+                rows = (await conn.execute(head_query)).all()
+                drop = covered_head_length([decode_message(row.payload) for row in rows], covered)
+                await conn.execute(
+                    upsert.on_conflict_do_update(
+                        index_elements=["session_id"], set_={"summary": summary}
+                    )
+                )
+                if drop:
+                    await conn.execute(
+                        delete(conversation_messages).where(
+                            conversation_messages.c.seq.in_([row.seq for row in rows[:drop]])
+                        )
+                    )
+            logger.debug("conversation_summarized", session_id=session_id, dropped=drop)
+        except Exception as e:
+            logger.error("set_summary_failed", session_id=session_id, error=str(e))
+            raise
+
+    async def clear(self, session_id: str) -> None:
+        """
+        Clear a conversation (delete all messages).
+
+        Args:
+            session_id: Conversation session identifier
+        """
+        if not self._engine:
+            raise RuntimeError("SQLite not initialized. Call initialize() first.")
+
+        try:
+            async with self._engine.begin() as conn:
+                await self._delete_session_rows(conn, session_id)
+            logger.info("conversation_cleared", session_id=session_id)
+        except Exception as e:
+            logger.error("clear_conversation_failed", session_id=session_id, error=str(e))
+            raise
+
+    async def prune_expired(self) -> int:
+        """
+        Delete conversations whose TTL has passed.
+
+        Returns:
+            Number of conversations deleted
+        """
+        if not self._engine:
+            raise RuntimeError("SQLite not initialized. Call initialize() first.")
+
+        expired = select(conversation_sessions.c.session_id).where(
+            conversation_sessions.c.updated_at < time.time() - self.ttl
+        )
+        async with self._engine.begin() as conn:
+            await conn.execute(
+                delete(conversation_messages).where(
+                    conversation_messages.c.session_id.in_(expired)
+                )
+            )
+            await conn.execute(
+                delete(conversation_summaries).where(
+                    conversation_summaries.c.session_id.in_(expired)
+                )
+            )
+            result = await conn.execute(
+                delete(conversation_sessions).where(
+                    conversation_sessions.c.session_id.in_(expired)
+                )
+            )
+
+        if result.rowcount:
+            logger.info("expired_conversations_pruned", count=result.rowcount)
+        return result.rowcount
+
+    async def _delete_session_rows(
+        self, conn: AsyncConnection, session_id: str, keep_session: bool = False
+    ) -> None:
+        """Delete a conversation's messages and summary (and its session row)."""
+        await conn.execute(
+            delete(conversation_messages).where(conversation_messages.c.session_id == session_id)
+        )
+        await conn.execute(
+            delete(conversation_summaries).where(conversation_summaries.c.session_id == session_id)
+        )
+        if not keep_session:
+            await conn.execute(
+                delete(conversation_sessions).where(conversation_sessions.c.session_id == session_id)
+            )
+
+    async def _prune_loop(self) -> None:
+        """Periodically delete expired conversations."""
+        try:
+            while True:
+                await asyncio.sleep(PRUNE_INTERVAL_SECONDS)
+                try:
+                    await self.prune_expired()
+                except Exception as e:
+                    logger.error("conversation_prune_failed", error=str(e))
+        except asyncio.CancelledError:
+            pass
+
+
+# Global instance
+_sqlite_memory: Optional[SQLiteConversationMemory] = None
+
+
+def get_sqlite_memory() -> SQLiteConversationMemory:
+    """
+    Get the global SQLite memory instance.
+
+    Returns:
+        SQLiteConversationMemory: The singleton instance
+    """
+    global _sqlite_memory
+    if _sqlite_memory is None:
+        _sqlite_memory = SQLiteConversationMemory()
+    return _sqlite_memory
@@ -0,0 +1,173 @@
+"""
+Rolling Conversation Summarizer
+
+Keeps prompt size flat for long conversations.
+
+After a turn is committed the agent schedules the conversation here. Once
+its stored history passes MEMORY_SUMMARY_TRIGGER_TOKENS (estimated), or
+gets close to the backend's message cap, everything but the last few
+messages is folded into a running summary stored with the conversation;
+the agent then sends summary + recent turns instead of raw history.
+
+Summaries run in the background on a cheap model
+(MEMORY_SUMMARY_DEPLOYMENT_NAME) within a fixed budget: bounded concurrency,
+a capped input and output size, a timeout, and at most one pending run per
+conversation. Anything over budget is skipped and retried after a later turn.
+"""
+
+import asyncio
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.chatbot.memory_factory import ConversationMemoryProtocol
+from app.services.llm.client import get_summary_llm_client
+
+logger = get_logger(__name__)
+
+# Configuration
+KEEP_RECENT_MESSAGES = 4  # Messages left verbatim after summarizing (two turns)
+SUMMARIZE_AT_MESSAGES = 16  # Summarize before the backends' 20-message cap drops turns
+CHARS_PER_TOKEN = 4  # Rough token estimate for English/Turkish text
+MAX_CONCURRENT_SUMMARIES = 2  # LLM calls in flight per worker
+MAX_PENDING_SUMMARIES = 100  # Conversations waiting for a summary per worker
+MAX_INPUT_CHARS = 12000  # Transcript sent to the summarizer per run
+SUMMARY_MAX_TOKENS = 300  # Summary length cap
+SUMMARY_TIMEOUT_SECONDS = 30.0
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a chat between a visitor and Kazım Timuçin Utkan's AI personas.
+
+Update the existing summary with the new messages. Keep facts the visitor shared, \
+their questions and interests, and what was already answered. Write at most 150 words \
+of plain prose in the language of the conversation. Output only the summary."""
+
+
+def estimate_tokens(messages: list[dict[str, str]]) -> int:
+    """Roughly estimate the prompt tokens taken by messages."""
+    return sum(len(msg["content"]) for msg in messages) // CHARS_PER_TOKEN
+
+
+class ConversationSummarizer:
+    """Background summarizer for long conversations."""
+
+    def __init__(self) -> None:
+        # Model override; the shared summary client is used when None
+        self._llm = None
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_SUMMARIES)
+        # One pending run per conversation key
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.summaries = 0
+        self.skipped = 0
+
+    async def _get_llm(self):
+        """Get the summary model: the shared summary client (retries, circuit breaker)."""
+        if self._llm is not None:
+            return self._llm
+        return await get_summary_llm_client()
+
+    def schedule(self, memory: ConversationMemoryProtocol, key: str) -> None:
+        """Summarize a conversation in the background if it has grown too long."""
+        if key in self._tasks:
+            return
+        if len(self._tasks) >= MAX_PENDING_SUMMARIES:
+            self.skipped += 1
+            return
+
+        task = asyncio.create_task(self._run(memory, key))
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+
+    async def stop(self) -> None:
+        """Cancel pending summaries (their messages are simply kept)."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, memory: ConversationMemoryProtocol, key: str) -> None:
+        """Summarize within the concurrency and time budget, logging failures."""
+        try:
+            async with self._semaphore:
+                await asyncio.wait_for(self.summarize(memory, key), SUMMARY_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("conversation_summary_failed", key=key, error=str(e))
+
+    async def summarize(self, memory: ConversationMemoryProtocol, key: str) -> bool:
+        """
+        Fold a conversation's older messages into its running summary.
+
+        Returns:
+            True if a summary was written
+        """
+        history = await memory.get_history(key)
+        if len(history) <= KEEP_RECENT_MESSAGES:
+            return False
+        if (
+            estimate_tokens(history) < settings.MEMORY_SUMMARY_TRIGGER_TOKENS
+            and len(history) < SUMMARIZE_AT_MESSAGES
+        ):
+            return False
+
+        older = history[:-KEEP_RECENT_MESSAGES]
+        previous = await memory.get_summary(key)
+        summary = await self._summarize(previous, older)
+        if not summary:
+            return False
+
+        # Drops only those of the messages read above that are still stored: turns
+        # added during the LLM call may have made the message cap trim some
+        await memory.set_summary(key, summary, older)
+        self.summaries += 1
+        logger.info(
+            "conversation_summarized",
+            key=key,
+            messages=len(older),
+            tokens_before=estimate_tokens(older),
+            summary_length=len(summary),
+        )
+        return True
+
+    async def _summarize(self, previous: Optional[str], messages: list[dict[str, str]]) -> str:
+        """Ask the summary model for an updated summary."""
+        per_message = MAX_INPUT_CHARS // len(messages)
+        transcript = "\n".join(f"{msg['role']}: {msg['content'][:per_message]}" for msg in messages)
+
+        llm = await self._get_llm()
+        response = await llm.ainvoke(
+            [
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {
+                    "role": "user",
+                    "content": f"Existing summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript}",
+                },
+            ],
+            max_tokens=SUMMARY_MAX_TOKENS,
+        )
+        return response.content.strip()
+
+    def get_stats(self) -> dict[str, int]:
+        """Get summarizer counters."""
+        return {
+            "pending": len(self._tasks),
+            "summaries": self.summaries,
+            "skipped": self.skipped,
+        }
+
+
+# Global instance
+_summarizer: Optional[ConversationSummarizer] = None
+
+
+def get_summarizer() -> ConversationSummarizer:
+    """
+    Get the global conversation summarizer.
+
+    Returns:
+        ConversationSummarizer: The singleton instance
+    """
+    global _summarizer
+    if _summarizer is None:
+        _summarizer = ConversationSummarizer()
+    return _summarizer
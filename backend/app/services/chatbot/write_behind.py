@@ -0,0 +1,148 @@
+"""
+Write-Behind Memory Flusher
+
+Optional background writer for end-of-turn conversation commits.
+
+When enabled (MEMORY_WRITE_BEHIND), the agent hands a finished turn to the
+flusher and returns immediately; the flusher writes queued turns in small
+batches, merging consecutive turns of the same session into one write.
+"""
+
+import asyncio
+from typing import Optional
+
+from app.core.logging import get_logger
+from app.services.chatbot.memory_factory import ConversationMemoryProtocol
+
+logger = get_logger(__name__)
+
+# Configuration
+FLUSH_INTERVAL_SECONDS = 0.05  # Batching window before writing queued turns
+MAX_PENDING_TURNS = 10000  # Turns buffered before falling back to direct writes
+
+
+class MemoryWriteBehind:
+    """Background flusher for conversation turn commits."""
+
+    def __init__(self) -> None:
+        self._queue: asyncio.Queue[
+            tuple[ConversationMemoryProtocol, str, list[dict[str, str]]]
+        ] = asyncio.Queue(maxsize=MAX_PENDING_TURNS)
+        self._task: Optional[asyncio.Task] = None
+        # Turns taken off the queue but not yet written (stop() writes them)
+        self._pending: list[tuple[ConversationMemoryProtocol, str, list[dict[str, str]]]] = []
+        # Batch writes in flight; cancelling the flusher does not abort them
+        self._flushes: set[asyncio.Task] = set()
+        # Direct writes scheduled while the flusher is stopped or full
+        self._overflow_tasks: set[asyncio.Task] = set()
+
+    @property
+    def is_running(self) -> bool:
+        """Check if the flusher task is running."""
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the background flusher."""
+        if self.is_running:
+            return
+
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info("memory_write_behind_started")
+
+    async def stop(self) -> None:
+        """Stop the flusher and write everything still queued."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self._flush_pending()
+        if self._flushes or self._overflow_tasks:
+            await asyncio.gather(*self._flushes, *self._overflow_tasks, return_exceptions=True)
+        logger.info("memory_write_behind_stopped")
+
+    def submit(
+        self,
+        memory: ConversationMemoryProtocol,
+        session_id: str,
+        messages: list[dict[str, str]],
+    ) -> None:
+        """Queue a turn for writing without waiting for storage."""
+        if self.is_running:
+            try:
+                self._queue.put_nowait((memory, session_id, messages))
+                return
+            except asyncio.QueueFull:
+                logger.warning("memory_write_behind_full", session_id=session_id)
+
+        # Never drop a turn: write it directly in the background
+        task = asyncio.create_task(_write_turn(memory, session_id, messages))
+        self._overflow_tasks.add(task)
+        task.add_done_callback(self._overflow_tasks.discard)
+
+    async def _flush_loop(self) -> None:
+        """Wait for queued turns and write them in batches."""
+        try:
+            while True:
+                self._pending.append(await self._queue.get())
+                await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+                await self._flush_pending()
+        except asyncio.CancelledError:
+            pass
+
+    async def _flush_pending(self) -> None:
+        """Write every taken and queued turn, one write per session."""
+        pending, self._pending = self._pending, []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+
+        batches: dict[tuple[int, str], tuple[ConversationMemoryProtocol, list[dict[str, str]]]] = {}
+        for memory, session_id, messages in pending:
+            key = (id(memory), session_id)
+            if key in batches:
+                batches[key][1].extend(messages)
+            else:
+                batches[key] = (memory, list(messages))
+
+        if batches:
+            flush = asyncio.ensure_future(
+                asyncio.gather(
+                    *(
+                        _write_turn(memory, session_id, messages)
+                        for (_, session_id), (memory, messages) in batches.items()
+                    )
+                )
+            )
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+            await asyncio.shield(flush)
+
+
+async def _write_turn(
+    memory: ConversationMemoryProtocol, session_id: str, messages: list[dict[str, str]]
+) -> None:
+    """Write a turn, logging (not raising) failures."""
+    try:
+        await memory.add_messages(session_id, messages)
+    except Exception as e:
+        logger.error("turn_commit_failed", session_id=session_id, error=str(e))
+
+
+# Global instance
+_write_behind: Optional[MemoryWriteBehind] = None
+
+
+def get_write_behind() -> MemoryWriteBehind:
+    """
+    Get the global write-behind flusher.
+
+    Returns:
+        MemoryWriteBehind: The singleton instance
+    """
+    global _write_behind
+    if _write_behind is None:
+        _write_behind = MemoryWriteBehind()
+    return _write_behind
@@ -5,8 +5,10 @@ Provides a singleton LLM client that is safely shared across all requests.
 """
 
 import asyncio
+import time
 from typing import Any, Optional
 
+import openai
 from langchain_openai import AzureChatOpenAI
 
 from app.core.config import settings
@@ -19,6 +21,10 @@ from app.core.resilience import (
 
 logger = get_logger(__name__)
 
+# Connection warm-up: the OpenAI SDK keeps idle pooled connections for 5 s
+WARM_UP_INTERVAL_SECONDS = 2.0  # At most one warm-up request per interval
+WARM_UP_TIMEOUT_SECONDS = 5.0
+
 
 class LLMClientManager:
     """
@@ -31,7 +37,9 @@ class LLMClientManager:
     _instance: Optional["LLMClientManager"] = None
     _lock: asyncio.Lock = asyncio.Lock()
     _client: Optional[AzureChatOpenAI] = None
+    _summary_client: Optional[AzureChatOpenAI] = None
     _initialized: bool = False
+    _last_warm_up: float = 0.0
 
     def __new__(cls) -> "LLMClientManager":
         """Ensure only one instance exists (singleton pattern)."""
@@ -57,16 +65,14 @@ class LLMClientManager:
             try:
                 logger.info("llm_client_initializing")
 
-                self._client = AzureChatOpenAI(
-                    azure_endpoint=settings.AZURE_AI_ENDPOINT.rstrip("/"),
-                    azure_deployment=settings.DEEPSEEK_DEPLOYMENT_NAME,
-                    api_version=settings.AZURE_API_VERSION,
-                    api_key=settings.AZURE_AI_CREDENTIAL,
-                    temperature=0.7,
-                    streaming=True,
-                    # Connection pooling settings
-                    max_retries=3,
-                    request_timeout=60.0,
+                self._client = self._create_client(
+                    settings.DEEPSEEK_DEPLOYMENT_NAME, temperature=0.7, streaming=True
+                )
+                # Background conversation summaries (see chatbot.summarizer)
+                self._summary_client = self._create_client(
+                    settings.MEMORY_SUMMARY_DEPLOYMENT_NAME or settings.DEEPSEEK_DEPLOYMENT_NAME,
+                    temperature=0.2,
+                    streaming=False,
                 )
 
                 self._initialized = True
@@ -80,6 +86,19 @@ class LLMClientManager:
                 logger.error("llm_client_initialization_failed", error=str(e))
                 raise
 
+    def _create_client(self, deployment: str, **options: Any) -> AzureChatOpenAI:
+        """Create a client for a deployment of the configured endpoint."""
+        return AzureChatOpenAI(
+            azure_endpoint=settings.AZURE_AI_ENDPOINT.rstrip("/"),
+            azure_deployment=deployment,
+            api_version=settings.AZURE_API_VERSION,
+            api_key=settings.AZURE_AI_CREDENTIAL,
+            # Connection pooling settings
+            max_retries=3,
+            request_timeout=60.0,
+            **options,
+        )
+
     async def get_client(self) -> AzureChatOpenAI:
         """
         Get the shared LLM client instance.
@@ -100,6 +119,50 @@ class LLMClientManager:
 
         return self._client
 
+    async def get_summary_client(self) -> AzureChatOpenAI:
+        """
+        Get the shared client for conversation summaries.
+
+        Uses MEMORY_SUMMARY_DEPLOYMENT_NAME when set, else the chat deployment.
+
+        Returns:
+            AzureChatOpenAI: The shared summary client
+
+        Raises:
+            RuntimeError: If initialization fails
+        """
+        if not self._initialized:
+            await self.initialize()
+
+        if self._summary_client is None:
+            raise RuntimeError("LLM client not initialized properly")
+
+        return self._summary_client
+
+    async def warm_up(self) -> None:
+        """
+        Open (or keep open) a pooled connection to the LLM endpoint.
+
+        Sends a cheap request and ignores its response, so a generation
+        started shortly after skips DNS, TCP and TLS setup. Runs at most once
+        per WARM_UP_INTERVAL_SECONDS; failures are logged, never raised.
+        """
+        now = time.monotonic()
+        if now - self._last_warm_up < WARM_UP_INTERVAL_SECONDS:
+            return
+        self._last_warm_up = now
+
+        try:
+            client = await self.get_client()
+            await client.root_async_client.with_options(
+                max_retries=0, timeout=WARM_UP_TIMEOUT_SECONDS
+            ).models.list()
+        except openai.APIStatusError:
+            # Any HTTP response leaves the connection in the pool
+            pass
+        except Exception as e:
+            logger.warning("llm_warm_up_failed", error=str(e))
+
     async def shutdown(self) -> None:
         """
         Shutdown the LLM client and cleanup resources.
@@ -112,6 +175,7 @@ class LLMClientManager:
                 # AzureChatOpenAI doesn't have an explicit close method,
                 # but we set to None to release resources
                 self._client = None
+                self._summary_client = None
                 self._initialized = False
                 logger.info("llm_client_shutdown_complete")
 
@@ -231,3 +295,15 @@ async def get_llm_client() -> ResilientLLMClient:
     manager = get_llm_manager()
     base_client = await manager.get_client()
     return ResilientLLMClient(base_client)
+
+
+async def get_summary_llm_client() -> ResilientLLMClient:
+    """
+    Convenience function to get the resilient summary LLM client.
+
+    Returns:
+        ResilientLLMClient: The wrapped summary client with retry and circuit breaker
+    """
+    manager = get_llm_manager()
+    base_client = await manager.get_summary_client()
+    return ResilientLLMClient(base_client)
@@ -1,9 +1,14 @@
 """Integration tests for API endpoints."""
 
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 
+from app.api.v1.endpoints import chat
+from app.api.v1.endpoints.chat import init_manager
 from app.main import app
+from app.services.chatbot.agent import ChatAgent
 
 
 client = TestClient(app)
@@ -21,6 +26,26 @@ class TestHealthEndpoint:
         assert data["status"] == "healthy"
         assert "version" in data
 
+    def test_websocket_health(self):
+        """Test that the WebSocket health endpoint reports connection figures."""
+        response = client.get("/api/v1/health/websocket")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["connections"] >= 0
+        assert "p95_ms" in data
+        assert data["active_turns"] >= 0
+
+
+class TestAdminEndpoint:
+    """Test admin endpoints."""
+
+    def test_disabled_without_token(self):
+        """Test that admin endpoints are hidden unless ADMIN_TOKEN is set."""
+        response = client.post("/api/v1/admin/drain")
+
+        assert response.status_code == 404
+
 
 class TestContactEndpoint:
     """Test contact info endpoint."""
@@ -36,3 +61,131 @@ class TestContactEndpoint:
         assert "github" in data
         assert "website" in data
         assert data["email"] == "timucinutkan@gmail.com"
+
+
+class TestChatMessages:
+    """Test validation of chat WebSocket messages."""
+
+    def test_rejects_malformed_messages(self):
+        """Test that non-string content, persona or id get an error."""
+        init_manager()
+        with client.websocket_connect("/api/v1/chat?session_id=bad-messages") as ws:
+            assert ws.receive_json()["type"] == "system"
+
+            for message in (
+                {"content": ["Hi"]},
+                {"content": "Hi", "persona": ["engineer"]},
+                {"content": "Hi", "id": {"n": 1}},
+            ):
+                ws.send_json(message)
+                assert ws.receive_json()["content"] == "Invalid message format"
+
+        assert not chat.get_manager()._generations
+
+
+class TestChatChannels:
+    """Test channels multiplexed over one chat WebSocket."""
+
+    def test_open_and_close_object_channel(self):
+        """Test that object channels are opened and closed by messages."""
+        init_manager()
+        with client.websocket_connect("/api/v1/chat?session_id=channels") as ws:
+            assert ws.receive_json()["type"] == "system"
+
+            ws.send_json({"type": "open", "channel": "object:project", "title": "Project"})
+            welcome = ws.receive_json()
+            assert welcome["channel"] == "object:project"
+            assert welcome["object_id"] == "project"
+
+            ws.send_json({"type": "close", "channel": "object:project"})
+            ws.send_json({"content": "Hi", "channel": "object:project"})
+            error = ws.receive_json()
+            assert error["type"] == "error"
+            assert error["channel"] == "object:project"
+
+    def test_rejects_malformed_channels(self):
+        """Test that malformed channels get an error instead of dropping the connection."""
+        init_manager()
+        with client.websocket_connect("/api/v1/chat?session_id=bad-channels") as ws:
+            assert ws.receive_json()["type"] == "system"
+
+            ws.send_json({"type": "close", "channel": ["object:project"]})
+            ws.send_json({"content": "Hi", "channel": {"object": "project"}})
+            assert ws.receive_json()["content"] == "Invalid channel"
+
+            ws.send_json({"type": "open", "channel": "object:../secrets"})
+            error = ws.receive_json()
+            assert error["content"] == "Invalid channel"
+            assert error["channel"] == "object:../secrets"
+
+    def test_prefetch_is_silent_and_deduplicated(self, monkeypatch):
+        """Test that prefetches get no reply, and unknown or repeated ones are dropped."""
+        prefetched: list[str] = []
+
+        async def prefetch_object(self, session_id, object_id, object_title="Unknown Object"):
+            prefetched.append(object_id)
+
+        monkeypatch.setattr(ChatAgent, "prefetch_object", prefetch_object)
+        init_manager()
+        with client.websocket_connect("/api/v1/chat?session_id=prefetch") as ws:
+            assert ws.receive_json()["type"] == "system"
+
+            for object_id in (
+                "project_apa_citation",
+                "project_apa_citation",
+                "../secrets",
+                "project_unknown",
+                "thesis_msc_llm",
+            ):
+                ws.send_json({"type": "prefetch", "object_id": object_id})
+            # The next reply is the welcome of this channel: prefetches sent none
+            ws.send_json({"type": "open", "channel": "object:project"})
+            assert ws.receive_json()["channel"] == "object:project"
+
+        assert prefetched == ["project_apa_citation", "thesis_msc_llm"]
+
+    def test_prefetch_counts_against_message_limit(self, monkeypatch):
+        """Test that a prefetch over the message rate limits is dropped."""
+        prefetched: list[str] = []
+        acquired: list[str] = []
+
+        async def prefetch_object(self, session_id, object_id, object_title="Unknown Object"):
+            prefetched.append(object_id)
+
+        async def acquire_message(connection_id):
+            acquired.append(connection_id)
+            return 5.0
+
+        monkeypatch.setattr(ChatAgent, "prefetch_object", prefetch_object)
+        mgr = init_manager()
+        monkeypatch.setattr(mgr, "acquire_message", acquire_message)
+        with client.websocket_connect("/api/v1/chat?session_id=prefetch-limit") as ws:
+            assert ws.receive_json()["type"] == "system"
+
+            ws.send_json({"type": "prefetch", "object_id": "project_apa_citation"})
+            ws.send_json({"type": "open", "channel": "object:project"})
+            assert ws.receive_json()["channel"] == "object:project"
+
+        assert len(acquired) == 1
+        assert prefetched == []
+
+    def test_prefetch_tasks_are_capped(self, monkeypatch):
+        """Test that prefetches beyond MAX_PREFETCH_TASKS running are dropped."""
+        prefetched: list[str] = []
+
+        async def prefetch_object(self, session_id, object_id, object_title="Unknown Object"):
+            prefetched.append(object_id)
+            await asyncio.sleep(0.5)
+
+        monkeypatch.setattr(ChatAgent, "prefetch_object", prefetch_object)
+        monkeypatch.setattr(chat, "MAX_PREFETCH_TASKS", 2)
+        init_manager()
+        with client.websocket_connect("/api/v1/chat?session_id=prefetch-cap") as ws:
+            assert ws.receive_json()["type"] == "system"
+
+            for object_id in ("project_apa_citation", "thesis_msc_llm", "edu_trakya_bsc"):
+                ws.send_json({"type": "prefetch", "object_id": object_id})
+            ws.send_json({"type": "open", "channel": "object:project"})
+            assert ws.receive_json()["channel"] == "object:project"
+
+        assert prefetched == ["project_apa_citation", "thesis_msc_llm"]
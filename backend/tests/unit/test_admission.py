@@ -0,0 +1,81 @@
+"""Tests for LLM turn admission control."""
+
+import asyncio
+
+from app.core import admission as admission_module
+from app.core.admission import AdmissionController
+
+
+class TestAdmissionController:
+    """Test AdmissionController class."""
+
+    async def test_queues_beyond_capacity(self, monkeypatch):
+        """Test that turns over capacity wait in order and are told their position."""
+        monkeypatch.setattr(admission_module, "MAX_ACTIVE_TURNS", 1)
+        controller = AdmissionController()
+        positions: dict[str, list[int]] = {"b": [], "c": []}
+        started: list[str] = []
+
+        def on_queued(name):
+            async def callback(position, eta_seconds):
+                positions[name].append(position)
+            return callback
+
+        async def turn(name):
+            assert await controller.acquire(on_queued(name))
+            started.append(name)
+
+        assert await controller.acquire(on_queued("a"))
+        waiting = [asyncio.create_task(turn("b")), asyncio.create_task(turn("c"))]
+        await asyncio.sleep(0.01)
+
+        assert positions == {"b": [1], "c": [2]}
+        assert controller.get_stats()["queued_turns"] == 2
+
+        controller.release(1.0)
+        await asyncio.sleep(0.01)
+        assert started == ["b"]
+
+        controller.release(1.0)
+        await asyncio.gather(*waiting)
+        assert started == ["b", "c"]
+        assert controller.active == 1
+
+    async def test_rejects_when_queue_full(self, monkeypatch):
+        """Test that a turn is rejected once the queue is full."""
+        monkeypatch.setattr(admission_module, "MAX_ACTIVE_TURNS", 1)
+        monkeypatch.setattr(admission_module, "MAX_QUEUED_TURNS", 1)
+        controller = AdmissionController()
+
+        async def on_queued(position, eta_seconds):
+            pass
+
+        assert await controller.acquire(on_queued)
+        waiting = asyncio.create_task(controller.acquire(on_queued))
+        await asyncio.sleep(0.01)
+
+        assert await controller.acquire(on_queued) is False
+        assert controller.rejected == 1
+
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert controller.get_stats()["queued_turns"] == 0
+
+    async def test_lag_holds_turns_back(self):
+        """Test that event-loop lag over the limit queues new turns."""
+        controller = AdmissionController()
+        controller.loop_lag = 1.0
+        queued: list[int] = []
+
+        async def on_queued(position, eta_seconds):
+            queued.append(position)
+
+        waiting = asyncio.create_task(controller.acquire(on_queued))
+        await asyncio.sleep(0.01)
+        assert queued == [1] and controller.active == 0
+
+        # The lag monitor admits waiting turns once the loop recovers
+        controller.loop_lag = 0.0
+        controller._admit_waiters()
+        assert await waiting
+        assert controller.active == 1
@@ -0,0 +1,85 @@
+"""Tests for WebSocket frame encoding."""
+
+import json
+
+import msgpack
+import pytest
+
+from app.core.frames import (
+    DEFAULT_CODEC,
+    JSON_SUBPROTOCOL,
+    MSGPACK_SUBPROTOCOL,
+    FrameDecodeError,
+    MsgPackFrameCodec,
+    decode_frame,
+    encode_frame,
+    negotiate_codec,
+)
+
+
+class TestFrameEncoding:
+    """Test frame encode/decode helpers."""
+
+    def test_encode_matches_json(self):
+        """Test that encoded frames are plain JSON."""
+        message = {"type": "stream", "persona": "engineer", "content": "Merhaba ğüş"}
+
+        assert json.loads(encode_frame(message)) == message
+
+    def test_ping_frame_is_pre_encoded(self):
+        """Test the static ping frame."""
+        assert json.loads(DEFAULT_CODEC.ping_frame) == {"type": "ping"}
+
+    def test_decode_frame(self):
+        """Test decoding a valid frame."""
+        assert decode_frame('{"content": "hi"}') == {"content": "hi"}
+
+    @pytest.mark.parametrize("data", ["not json", '"text"', "[1, 2]"])
+    def test_decode_rejects_invalid_frames(self, data):
+        """Test that non-object frames are rejected."""
+        with pytest.raises(FrameDecodeError):
+            decode_frame(data)
+
+
+class TestMsgPackCodec:
+    """Test the binary MessagePack subprotocol."""
+
+    def test_negotiate_codec(self):
+        """Test subprotocol negotiation."""
+        assert negotiate_codec([]) == (None, DEFAULT_CODEC)
+        assert negotiate_codec(["unknown", JSON_SUBPROTOCOL])[0] == JSON_SUBPROTOCOL
+
+        subprotocol, codec = negotiate_codec([MSGPACK_SUBPROTOCOL, JSON_SUBPROTOCOL])
+        assert subprotocol == MSGPACK_SUBPROTOCOL
+        assert isinstance(codec, MsgPackFrameCodec)
+
+    def test_encode_persona_stream_frame(self):
+        """Test the compact envelope for persona frames."""
+        codec = MsgPackFrameCodec()
+        frame = {"type": "stream", "persona": "researcher", "content": "token"}
+
+        encoded = codec.encode(frame)
+
+        assert msgpack.unpackb(encoded) == [2, 1, "token"]
+        assert len(encoded) < len(encode_frame(frame))
+
+    def test_encode_keeps_extra_fields(self):
+        """Test that object targets and unknown fields survive encoding."""
+        codec = MsgPackFrameCodec()
+        frame = {
+            "type": "system",
+            "content": "Hi",
+            "object_id": "thesis_msc_llm",
+            "session_id": "abc",
+        }
+
+        assert msgpack.unpackb(codec.encode(frame)) == [0, "thesis_msc_llm", "Hi", None, {"session_id": "abc"}]
+
+    def test_decode_incoming_map(self):
+        """Test decoding client frames."""
+        codec = MsgPackFrameCodec()
+
+        assert codec.decode(msgpack.packb({"content": "hi"})) == {"content": "hi"}
+        assert codec.decode('{"content": "hi"}') == {"content": "hi"}
+        with pytest.raises(FrameDecodeError):
+            codec.decode(msgpack.packb([1, 2]))
@@ -0,0 +1,116 @@
+"""Tests for the conversation history cache."""
+
+from app.services.chatbot.history_cache import HistoryCache
+
+
+def _enabled_cache(maxsize: int = 10) -> HistoryCache:
+    """Create a cache that serves reads without a Redis subscription."""
+    cache = HistoryCache(maxsize=maxsize)
+    cache._enabled = True
+    return cache
+
+
+def _fill(cache: HistoryCache, key: str, history: list[tuple[str, str]]) -> None:
+    """Populate a key through the fill protocol."""
+    version = cache.begin_fill(key)
+    cache.finish_fill(key, version, history)
+
+
+class TestHistoryCache:
+    """Test HistoryCache class."""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used session is evicted first."""
+        cache = _enabled_cache(maxsize=2)
+        _fill(cache, "a", [("user", "1")])
+        _fill(cache, "b", [("user", "2")])
+        cache.get("a")
+        _fill(cache, "c", [("user", "3")])
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+    def test_disabled_cache_bypasses_reads(self):
+        """Test that nothing is served or stored before the listener is up."""
+        cache = HistoryCache()
+        _fill(cache, "a", [("user", "1")])
+
+        cache._enabled = True
+        assert cache.get("a") is None
+
+    def test_foreign_write_invalidates(self):
+        """Test that a notification from another worker drops the entry."""
+        cache = _enabled_cache()
+        _fill(cache, "a", [("user", "1")])
+
+        cache.handle_event("a", "rpush")
+
+        assert cache.get("a") is None
+        assert cache.invalidations == 1
+
+    def test_ttl_refresh_does_not_invalidate(self):
+        """Test that EXPIRE notifications keep the entry."""
+        cache = _enabled_cache()
+        _fill(cache, "a", [("user", "1")])
+
+        cache.handle_event("a", "expire")
+
+        assert cache.get("a") is not None
+
+    def test_own_write_is_applied_and_its_events_skipped(self):
+        """Test write-through for this worker's appends."""
+        cache = _enabled_cache()
+        _fill(cache, "a", [("user", "1"), ("assistant", "2")])
+
+        cache.expect_self_write("a", "list")
+        cache.apply_self_write("a", [("user", "3"), ("assistant", "4")], max_history=3)
+        for event in ("rpush", "ltrim", "expire"):
+            cache.handle_event("a", event)
+
+        assert cache.get("a") == [("assistant", "2"), ("user", "3"), ("assistant", "4")]
+
+    def test_foreign_write_during_own_write_invalidates(self):
+        """Test that an interleaved foreign write is not mistaken for our own."""
+        cache = _enabled_cache()
+        _fill(cache, "a", [("user", "1")])
+
+        cache.expect_self_write("a", "list")
+        cache.apply_self_write("a", [("user", "2")], max_history=10)
+        for event in ("rpush", "ltrim", "rpush", "ltrim"):
+            cache.handle_event("a", event)
+
+        assert cache.get("a") is None
+
+    def test_stale_fill_is_discarded(self):
+        """Test that a read racing with an invalidation is not cached."""
+        cache = _enabled_cache()
+        version = cache.begin_fill("a")
+
+        cache.handle_event("a", "rpush")
+        cache.finish_fill("a", version, [("user", "stale")])
+
+        assert cache.get("a") is None
+
+    def test_fill_racing_own_write_is_discarded(self):
+        """Test that a read started before our own write is not cached."""
+        cache = _enabled_cache()
+        version = cache.begin_fill("a")
+
+        cache.expect_self_write("a", "list")
+        cache.finish_fill("a", version, [("user", "before write")])
+
+        assert cache.get("a") is None
+
+    def test_failed_own_write_invalidates(self):
+        """Test that an aborted write does not swallow later notifications."""
+        cache = _enabled_cache()
+        _fill(cache, "a", [("user", "1")])
+
+        cache.expect_self_write("a", "list")
+        cache.abort_self_write("a")
+        assert cache.get("a") is None
+
+        _fill(cache, "a", [("user", "1")])
+        cache.handle_event("a", "rpush")
+        assert cache.get("a") is None
@@ -1,8 +1,13 @@
 """Tests for conversation memory."""
 
+import asyncio
+import time
+
 import pytest
 
 from app.services.chatbot.memory import ConversationMemory
+from app.services.chatbot.memory_factory import InMemoryMemoryAdapter
+from app.services.chatbot.write_behind import MemoryWriteBehind
 
 
 class TestConversationMemory:
@@ -29,6 +34,19 @@ class TestConversationMemory:
         assert history[0]["content"] == "Hello"
         assert history[1]["role"] == "assistant"
 
+    def test_add_messages(self):
+        """Test adding a whole turn at once."""
+        memory = ConversationMemory()
+        memory.add_messages(
+            "test-session",
+            [{"role": "user", "content": "Hello"}, {"role": "assistant", "content": "Hi there!"}],
+        )
+
+        history = memory.get_history("test-session")
+
+        assert [m["role"] for m in history] == ["user", "assistant"]
+        assert history[1]["content"] == "Hi there!"
+
     def test_max_history_limit(self):
         """Test that history is trimmed to max limit."""
         memory = ConversationMemory(max_history=3)
@@ -59,3 +77,138 @@ class TestConversationMemory:
         # Should create new empty conversation
         history = memory.get_history("test-session")
         assert len(history) == 0
+
+    def test_get_history_does_not_create(self):
+        """Test that reading an unknown session does not store anything."""
+        memory = ConversationMemory()
+
+        assert memory.get_history("unknown") == []
+        assert "unknown" not in memory.conversations
+
+    def test_evicts_least_recently_used_session(self):
+        """Test LRU eviction beyond max_sessions."""
+        memory = ConversationMemory(max_sessions=2)
+        memory.add_message("a", "user", "Hello")
+        memory.add_message("b", "user", "Hello")
+        memory.get_history("a")
+        memory.add_message("c", "user", "Hello")
+
+        assert list(memory.conversations) == ["a", "c"]
+        assert memory.get_stats()["evicted_sessions"] == 1
+
+    def test_expires_idle_sessions(self):
+        """Test that conversations unused for ttl seconds are dropped."""
+        memory = ConversationMemory(ttl=0)
+        memory.add_message("a", "user", "Hello")
+
+        assert memory.get_history("a") == []
+        assert memory.get_stats()["evicted_expired"] == 1
+
+    def test_reads_refresh_expiry(self):
+        """Test that reading a conversation keeps it alive."""
+        memory = ConversationMemory(ttl=60)
+        memory.add_message("a", "user", "Hello")
+        memory.conversations["a"].expires_at = time.monotonic() + 1
+
+        memory.get_history("a")
+
+        assert memory.conversations["a"].expires_at > time.monotonic() + 30
+
+    def test_memory_cap(self):
+        """Test eviction when the approximate byte budget is exceeded."""
+        memory = ConversationMemory(max_bytes=1000)
+        memory.add_message("a", "user", "x" * 600)
+        memory.add_message("b", "user", "x" * 600)
+
+        assert list(memory.conversations) == ["b"]
+        assert memory.get_stats()["evicted_memory"] == 1
+
+    def test_size_tracks_trimmed_messages(self):
+        """Test that byte accounting follows max_history trimming and clear."""
+        memory = ConversationMemory(max_history=2)
+        for content in ["aaaa", "bb", "c"]:
+            memory.add_message("a", "user", content)
+
+        conversation = memory.conversations["a"]
+        assert memory.total_bytes == conversation.size == sum(m.size for m in conversation.messages)
+
+        memory.clear("a")
+        assert memory.total_bytes == 0
+
+    def test_set_summary(self):
+        """Test that a summary replaces the oldest messages it covers."""
+        memory = ConversationMemory()
+        for content in ["1", "2", "3"]:
+            memory.add_message("a", "user", content)
+
+        memory.set_summary("a", "Earlier: 1 and 2", memory.get_history("a")[:2])
+
+        assert memory.get_summary("a") == "Earlier: 1 and 2"
+        assert memory.get_history("a") == [{"role": "user", "content": "3"}]
+        assert memory.total_bytes == memory.conversations["a"].size
+        assert memory.get_summary("other") is None
+
+class TestMemoryWriteBehind:
+    """Test MemoryWriteBehind class."""
+
+    async def test_merges_turns_per_session(self):
+        """Test that queued turns of one session are written in order, in one call."""
+        calls = []
+
+        class RecordingMemory(InMemoryMemoryAdapter):
+            async def add_messages(self, session_id, messages):
+                calls.append((session_id, len(messages)))
+                await super().add_messages(session_id, messages)
+
+        memory = RecordingMemory(ConversationMemory())
+        write_behind = MemoryWriteBehind()
+        await write_behind.start()
+
+        write_behind.submit(memory, "s", [{"role": "user", "content": "1"}])
+        write_behind.submit(memory, "s", [{"role": "user", "content": "2"}])
+        await write_behind.stop()
+
+        assert calls == [("s", 2)]
+        assert [m["content"] for m in await memory.get_history("s")] == ["1", "2"]
+
+    async def test_stop_writes_turn_being_batched(self):
+        """Test that stopping during the batching window still writes the taken turn."""
+        memory = InMemoryMemoryAdapter(ConversationMemory())
+        write_behind = MemoryWriteBehind()
+        await write_behind.start()
+
+        write_behind.submit(memory, "s", [{"role": "user", "content": "Hello"}])
+        await asyncio.sleep(0.01)
+        await write_behind.stop()
+
+        assert [m["content"] for m in await memory.get_history("s")] == ["Hello"]
+
+    async def test_stop_waits_for_writes_in_flight(self):
+        """Test that stopping does not abort a batch already being written."""
+        started = asyncio.Event()
+
+        class SlowMemory(InMemoryMemoryAdapter):
+            async def add_messages(self, session_id, messages):
+                started.set()
+                await asyncio.sleep(0.05)
+                await super().add_messages(session_id, messages)
+
+        memory = SlowMemory(ConversationMemory())
+        write_behind = MemoryWriteBehind()
+        await write_behind.start()
+
+        write_behind.submit(memory, "s", [{"role": "user", "content": "Hello"}])
+        await started.wait()
+        await write_behind.stop()
+
+        assert [m["content"] for m in await memory.get_history("s")] == ["Hello"]
+
+    async def test_writes_directly_when_stopped(self):
+        """Test that turns submitted without a running flusher are not dropped."""
+        memory = InMemoryMemoryAdapter(ConversationMemory())
+        write_behind = MemoryWriteBehind()
+
+        write_behind.submit(memory, "s", [{"role": "user", "content": "Hello"}])
+        await write_behind.stop()
+
+        assert len(await memory.get_history("s")) == 1
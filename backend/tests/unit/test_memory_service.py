@@ -0,0 +1,97 @@
+"""Tests for the conversation memory service."""
+
+import asyncio
+
+from app.core.resilience import CircuitBreaker, CircuitState
+from app.services.chatbot.memory_service import MemoryService
+
+
+class FlakyRedisMemory:
+    """Stand-in for RedisConversationMemory that can be switched off."""
+
+    def __init__(self) -> None:
+        self.available = True
+        self.conversations: dict[str, list[dict[str, str]]] = {}
+
+    def _check(self) -> None:
+        if not self.available:
+            raise RuntimeError("redis down")
+
+    async def initialize(self):
+        pass
+
+    async def add_messages(self, session_id, messages):
+        self._check()
+        self.conversations.setdefault(session_id, []).extend(messages)
+
+    async def get_history(self, session_id, limit=None):
+        self._check()
+        messages = self.conversations.get(session_id, [])
+        return messages[-limit:] if limit else list(messages)
+
+    async def clear(self, session_id):
+        self._check()
+        self.conversations.pop(session_id, None)
+
+    async def close(self):
+        pass
+
+
+def _turn(content: str) -> list[dict[str, str]]:
+    return [{"role": "user", "content": content}]
+
+
+def _make_service() -> tuple[MemoryService, FlakyRedisMemory, CircuitBreaker]:
+    redis_memory = FlakyRedisMemory()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0, name="test")
+    return MemoryService(primary=redis_memory, breaker=breaker), redis_memory, breaker
+
+
+class TestMemoryService:
+    """Test MemoryService class."""
+
+    async def test_local_only(self):
+        """Test that without Redis every call uses the shared local store."""
+        service = MemoryService()
+        await service.add_messages("s", _turn("Hello"))
+
+        assert await service.get_history("s") == _turn("Hello")
+        assert service.get_stats()["unsynced_sessions"] == 0
+
+    async def test_degrades_to_local_store(self):
+        """Test that writes and reads keep working while Redis is down."""
+        service, redis_memory, breaker = _make_service()
+        redis_memory.available = False
+
+        await service.add_messages("s", _turn("1"))
+
+        assert breaker.state == CircuitState.OPEN
+        assert await service.get_history("s") == _turn("1")
+        assert service.get_stats()["unsynced_sessions"] == 1
+
+    async def test_resyncs_in_order_when_redis_recovers(self):
+        """Test that locally stored messages are copied back before new ones."""
+        service, redis_memory, _ = _make_service()
+        await service.add_messages("s", _turn("1"))
+        redis_memory.available = False
+        await service.add_messages("s", _turn("2"))
+
+        redis_memory.available = True
+        await service.add_messages("s", _turn("3"))
+
+        assert [m["content"] for m in redis_memory.conversations["s"]] == ["1", "2", "3"]
+        assert service.get_stats()["unsynced_sessions"] == 0
+
+    async def test_background_resync(self):
+        """Test that other dirty sessions are copied back once Redis answers."""
+        service, redis_memory, _ = _make_service()
+        redis_memory.available = False
+        await service.add_messages("a", _turn("offline"))
+
+        redis_memory.available = True
+        await service.get_history("b")
+        await asyncio.sleep(0)
+        await service._resync_task
+
+        assert redis_memory.conversations["a"] == _turn("offline")
+        assert service.get_stats()["unsynced_sessions"] == 0
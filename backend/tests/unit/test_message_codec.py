@@ -0,0 +1,60 @@
+"""Tests for the stored message codec."""
+
+import pytest
+
+from app.services.chatbot.message_codec import (
+    COMPRESS_THRESHOLD_BYTES,
+    FORMAT_MSGPACK,
+    FORMAT_MSGPACK_ZLIB,
+    decode_message,
+    encode_message,
+)
+
+
+class TestMessageCodec:
+    """Test encode_message and decode_message."""
+
+    def test_round_trip(self):
+        """Test that a compact record decodes to the original message."""
+        data = encode_message("assistant", "Hello", timestamp=1700000000.5)
+
+        assert data[0] == FORMAT_MSGPACK
+        assert decode_message(data) == {
+            "role": "assistant",
+            "content": "Hello",
+            "timestamp": 1700000000,
+        }
+
+    def test_unknown_role_round_trip(self):
+        """Test that roles without a code are stored by name."""
+        data = encode_message("tool", "result", timestamp=0)
+
+        assert decode_message(data)["role"] == "tool"
+
+    def test_compresses_large_messages(self):
+        """Test that long content is compressed and still decodes."""
+        content = "The same sentence again. " * (COMPRESS_THRESHOLD_BYTES // 10)
+        data = encode_message("assistant", content, timestamp=0)
+
+        assert data[0] == FORMAT_MSGPACK_ZLIB
+        assert len(data) < len(content)
+        assert decode_message(data)["content"] == content
+
+    def test_decodes_legacy_json(self):
+        """Test that records written before the compact format still decode."""
+        legacy = b'{"role": "user", "content": "Hi", "timestamp": "2024-01-01T00:00:00"}'
+
+        assert decode_message(legacy)["content"] == "Hi"
+        assert decode_message(legacy.decode())["role"] == "user"
+
+    def test_json_codec(self):
+        """Test that the json codec writes the legacy format."""
+        data = encode_message("user", "Hi", timestamp=0, codec="json")
+
+        assert data.startswith(b"{")
+        assert decode_message(data)["timestamp"] == "1970-01-01T00:00:00"
+
+    def test_unknown_format(self):
+        """Test that an unknown format byte is rejected."""
+        with pytest.raises(ValueError):
+            decode_message(b"\x7fdata")
@@ -0,0 +1,104 @@
+"""Tests for WebSocket rate limiting."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import rate_limit as rate_limit_module
+from app.core.rate_limit import (
+    WS_CONNECTION_MESSAGE_LIMIT,
+    WS_HANDSHAKE_LIMIT,
+    MemoryTokenBucketStore,
+    TokenBucketLimit,
+    WebSocketRateLimiter,
+    get_identifier,
+)
+
+
+class TestMemoryTokenBucketStore:
+    """Test MemoryTokenBucketStore class."""
+
+    async def test_burst_then_wait(self):
+        """Test that a full bucket allows its burst, then asks the caller to wait."""
+        store = MemoryTokenBucketStore()
+        limit = TokenBucketLimit(rate=10.0, burst=2)
+
+        assert await store.take("k", limit, max_wait=1.0) == (True, 0.0)
+        assert await store.take("k", limit, max_wait=1.0) == (True, 0.0)
+        taken, wait = await store.take("k", limit, max_wait=1.0)
+
+        assert taken and 0.09 < wait <= 0.1
+
+    async def test_rejects_beyond_max_wait(self):
+        """Test that a take needing a longer wait is rejected and takes nothing."""
+        store = MemoryTokenBucketStore()
+        limit = TokenBucketLimit(rate=1.0, burst=1)
+
+        assert await store.take("k", limit, max_wait=0) == (True, 0.0)
+        taken, wait = await store.take("k", limit, max_wait=0)
+        assert not taken and 0.99 < wait <= 1.0
+        # The rejected take did not borrow: the next wait is still under a second
+        assert (await store.take("k", limit, max_wait=1.0))[1] <= 1.0
+
+    async def test_evicts_least_recently_used(self):
+        """Test that the store stays within its size."""
+        store = MemoryTokenBucketStore(maxsize=2)
+        limit = TokenBucketLimit(rate=1.0, burst=1)
+        for key in ("a", "b", "c"):
+            await store.take(key, limit, max_wait=0)
+
+        # "a" was dropped, so it starts again with a full bucket
+        assert await store.take("a", limit, max_wait=0) == (True, 0.0)
+        assert not (await store.take("c", limit, max_wait=0))[0]
+
+
+class TestWebSocketRateLimiter:
+    """Test WebSocketRateLimiter class."""
+
+    async def test_handshake_storm(self):
+        """Test that handshakes beyond the burst are rejected per IP."""
+        limiter = WebSocketRateLimiter(MemoryTokenBucketStore())
+        for _ in range(WS_HANDSHAKE_LIMIT.burst):
+            assert await limiter.allow_handshake("10.0.0.1")
+
+        assert not await limiter.allow_handshake("10.0.0.1")
+        assert await limiter.allow_handshake("10.0.0.2")
+        assert limiter.rejected_handshakes == 1
+
+    async def test_message_flood_rejected(self):
+        """Test that a connection flooding messages is rejected with a retry time."""
+        limiter = WebSocketRateLimiter(MemoryTokenBucketStore())
+        for _ in range(WS_CONNECTION_MESSAGE_LIMIT.burst):
+            assert await limiter.acquire_message("c1", "s", "10.0.0.1") is None
+
+        # A bucket in debt: the next message would have to wait 4 s, over the limit
+        limiter.store._buckets["conn:c1"] = (-1.0, limiter.store._buckets["conn:c1"][1])
+        retry_after = await limiter.acquire_message("c1", "s", "10.0.0.1")
+
+        # Retry time follows the deficit (2 tokens at 0.5/s), not a fixed interval
+        assert retry_after == 4.0
+        assert limiter.rejected_messages == 1
+
+
+class TestGetIdentifier:
+    """Test client identification for rate limits."""
+
+    @staticmethod
+    def _request(peer: str, forwarded_for: str | None = None) -> SimpleNamespace:
+        headers = {"X-Forwarded-For": forwarded_for} if forwarded_for else {}
+        return SimpleNamespace(client=SimpleNamespace(host=peer), headers=headers)
+
+    @pytest.fixture
+    def trusted_proxy(self, monkeypatch):
+        monkeypatch.setattr(rate_limit_module.settings, "TRUSTED_PROXIES", "10.0.0.0/8")
+
+    def test_ignores_forwarded_for_from_clients(self):
+        """Test that a client cannot pick its identifier with a spoofed header."""
+        assert get_identifier(self._request("203.0.113.7", "1.2.3.4")) == "203.0.113.7"
+
+    def test_takes_rightmost_untrusted_hop(self, trusted_proxy):
+        """Test that behind trusted proxies the address they saw is used."""
+        request = self._request("10.0.0.2", "1.2.3.4, 198.51.100.9, 10.0.0.1")
+
+        assert get_identifier(request) == "198.51.100.9"
+        assert get_identifier(self._request("10.0.0.2")) == "10.0.0.2"
@@ -0,0 +1,97 @@
+"""Tests for resumable WebSocket streams."""
+
+from app.core.replay import ReplayBuffer, ReplayStore
+
+
+class TestReplayBuffer:
+    """Test ReplayBuffer class."""
+
+    def test_sequence_numbers_increase(self):
+        """Test that frames are stamped with increasing sequence numbers."""
+        buffer = ReplayBuffer()
+
+        first = buffer.append({"type": "typing", "persona": "engineer", "content": ""})
+        second = buffer.append({"type": "stream", "persona": "engineer", "content": "Hi"})
+
+        assert (first["seq"], second["seq"]) == (1, 2)
+
+    def test_frames_after(self):
+        """Test getting missed frames."""
+        buffer = ReplayBuffer()
+        for i in range(5):
+            buffer.append({"type": "typing", "persona": str(i), "content": ""})
+
+        missed, complete = buffer.frames_after(3)
+
+        assert [f["seq"] for f in missed] == [4, 5]
+        assert complete is True
+
+    def test_frames_after_evicted_gap(self):
+        """Test that a gap older than the ring buffer is reported as incomplete."""
+        buffer = ReplayBuffer(maxlen=2)
+        for i in range(5):
+            buffer.append({"type": "typing", "persona": str(i), "content": ""})
+
+        missed, complete = buffer.frames_after(1)
+
+        assert [f["seq"] for f in missed] == [4, 5]
+        assert complete is False
+
+    def test_stream_deltas_share_one_slot(self):
+        """Test that a long answer does not evict the frames before it."""
+        buffer = ReplayBuffer(maxlen=4)
+        buffer.append({"type": "typing", "persona": "engineer", "content": ""})
+        for i in range(1000):
+            buffer.append({"type": "stream", "persona": "engineer", "content": str(i % 10)})
+
+        missed, complete = buffer.frames_after(0)
+
+        assert len(buffer.frames) == 2
+        assert complete is True
+        assert [f["seq"] for f in missed] == [1, 1001]
+        assert missed[1]["content"] == "0123456789" * 100
+
+    def test_resume_inside_merged_deltas(self):
+        """Test that resuming within a merged run sends only the unseen deltas."""
+        buffer = ReplayBuffer()
+        for content in ("Hel", "lo", " world"):
+            buffer.append({"type": "stream", "persona": "engineer", "content": content})
+        buffer.append({"type": "stream", "persona": "researcher", "content": "Hi"})
+
+        missed, complete = buffer.frames_after(2)
+
+        assert [(f["persona"], f["content"], f["seq"]) for f in missed] == [
+            ("engineer", " world", 3),
+            ("researcher", "Hi", 4),
+        ]
+        assert complete is True
+
+
+class TestReplayStore:
+    """Test ReplayStore class."""
+
+    async def test_replay_after_disconnect(self):
+        """Test that frames recorded while disconnected can be replayed."""
+        store = ReplayStore()
+        await store.acquire("s")
+        store.record("s", {"type": "stream", "content": "a"})
+        store.release("s")
+        store.record("s", {"type": "stream", "content": "b"})
+
+        missed, complete = await store.frames_after("s", 1)
+
+        assert [f["content"] for f in missed] == ["b"]
+        assert complete is True
+
+    async def test_unknown_session(self):
+        """Test replay for a session without a buffer."""
+        assert await ReplayStore().frames_after("missing", 10) == ([], True)
+
+    async def test_observed_frames_continue_sequence(self):
+        """Test that frames stamped by another worker advance the local sequence."""
+        store = ReplayStore()
+        store.observe("s", {"type": "stream", "content": "remote", "seq": 7})
+
+        assert store.record("s", {"type": "stream", "content": "local"})["seq"] == 8
+        missed, _ = await store.frames_after("s", 6)
+        assert [f["content"] for f in missed] == ["remotelocal"]
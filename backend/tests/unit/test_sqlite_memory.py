@@ -0,0 +1,79 @@
+"""Tests for SQLite conversation memory."""
+
+import pytest
+
+from app.services.chatbot.sqlite_memory import SQLiteConversationMemory
+
+
+@pytest.fixture
+async def memory(tmp_path):
+    """Create an initialized SQLite memory on a temporary database."""
+    sqlite_memory = SQLiteConversationMemory(
+        database_url=f"sqlite+aiosqlite:///{tmp_path}/conversations.db", max_history=3
+    )
+    await sqlite_memory.initialize()
+    yield sqlite_memory
+    await sqlite_memory.close()
+
+
+class TestSQLiteConversationMemory:
+    """Test SQLiteConversationMemory class."""
+
+    async def test_add_and_get_history(self, memory):
+        """Test that a turn is stored and read back in order."""
+        await memory.add_messages(
+            "s",
+            [{"role": "user", "content": "Hello"}, {"role": "assistant", "content": "Hi there!"}],
+        )
+
+        assert await memory.get_history("s") == [
+            {"role": "user", "content": "Hello"},
+            {"role": "assistant", "content": "Hi there!"},
+        ]
+        assert await memory.get_history("other") == []
+
+    async def test_trims_to_max_history(self, memory):
+        """Test that only the newest max_history messages are kept."""
+        for i in range(5):
+            await memory.add_message("s", "user", f"Message {i}")
+
+        history = await memory.get_history("s")
+
+        assert [m["content"] for m in history] == ["Message 2", "Message 3", "Message 4"]
+        assert await memory.get_history("s", limit=1) == [{"role": "user", "content": "Message 4"}]
+
+    async def test_expired_conversations(self, memory):
+        """Test that expired conversations are hidden and pruned."""
+        await memory.add_message("s", "user", "Hello")
+        memory.ttl = -1
+
+        assert await memory.get_history("s") == []
+        assert await memory.prune_expired() == 1
+
+    async def test_persists_across_restarts(self, memory):
+        """Test that history survives closing and reopening the database."""
+        await memory.add_message("s", "user", "Hello")
+        await memory.close()
+        await memory.initialize()
+
+        assert await memory.get_history("s") == [{"role": "user", "content": "Hello"}]
+
+    async def test_clear(self, memory):
+        """Test clearing a conversation."""
+        await memory.add_message("s", "user", "Hello")
+        await memory.clear("s")
+
+        assert await memory.get_history("s") == []
+
+    async def test_set_summary(self, memory):
+        """Test that a summary replaces the oldest messages and is cleared with them."""
+        for content in ["1", "2", "3"]:
+            await memory.add_message("s", "user", content)
+
+        await memory.set_summary("s", "Earlier: 1 and 2", (await memory.get_history("s"))[:2])
+
+        assert await memory.get_summary("s") == "Earlier: 1 and 2"
+        assert await memory.get_history("s") == [{"role": "user", "content": "3"}]
+
+        await memory.clear("s")
+        assert await memory.get_summary("s") is None
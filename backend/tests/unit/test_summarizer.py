@@ -0,0 +1,99 @@
+"""Tests for the rolling conversation summarizer."""
+
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.services.chatbot.memory import ConversationMemory
+from app.services.chatbot.memory_factory import InMemoryMemoryAdapter
+from app.services.chatbot.summarizer import KEEP_RECENT_MESSAGES, ConversationSummarizer
+
+
+class StubLLM:
+    """Summary model stand-in that records its prompts."""
+
+    def __init__(self) -> None:
+        self.prompts: list[list[dict[str, str]]] = []
+
+    async def ainvoke(self, messages, **kwargs):
+        self.prompts.append(messages)
+        return SimpleNamespace(content=f"summary {len(self.prompts)}")
+
+
+def _make_summarizer() -> tuple[ConversationSummarizer, StubLLM]:
+    summarizer = ConversationSummarizer()
+    summarizer._llm = StubLLM()
+    return summarizer, summarizer._llm
+
+
+async def _add_turns(memory: InMemoryMemoryAdapter, count: int, content: str = "hello") -> None:
+    for _ in range(count):
+        await memory.add_messages(
+            "s", [{"role": "user", "content": content}, {"role": "assistant", "content": content}]
+        )
+
+
+class TestConversationSummarizer:
+    """Test ConversationSummarizer class."""
+
+    async def test_short_history_is_left_alone(self):
+        """Test that nothing happens below the thresholds."""
+        memory = InMemoryMemoryAdapter(ConversationMemory())
+        summarizer, llm = _make_summarizer()
+        await _add_turns(memory, 3)
+
+        assert await summarizer.summarize(memory, "s") is False
+        assert llm.prompts == []
+
+    async def test_folds_older_messages_into_summary(self):
+        """Test that a long history keeps only recent messages next to a summary."""
+        memory = InMemoryMemoryAdapter(ConversationMemory())
+        summarizer, llm = _make_summarizer()
+        await _add_turns(memory, 3, content="x" * settings.MEMORY_SUMMARY_TRIGGER_TOKENS)
+
+        assert await summarizer.summarize(memory, "s") is True
+        assert await memory.get_summary("s") == "summary 1"
+        assert len(await memory.get_history("s")) == KEEP_RECENT_MESSAGES
+
+    async def test_turn_during_summary_is_kept(self):
+        """Test that messages trimmed by the cap during the LLM call are not dropped twice."""
+        memory = InMemoryMemoryAdapter(ConversationMemory(max_history=6))
+        summarizer, llm = _make_summarizer()
+        for turn in range(3):
+            await _add_turns(memory, 1, content=f"{turn}" * settings.MEMORY_SUMMARY_TRIGGER_TOKENS)
+
+        async def ainvoke(messages, **kwargs):
+            # A turn lands meanwhile: the cap trims the two messages being summarized
+            await _add_turns(memory, 1, content="new")
+            return SimpleNamespace(content="summary")
+
+        llm.ainvoke = ainvoke
+        assert await summarizer.summarize(memory, "s") is True
+
+        history = await memory.get_history("s")
+        assert len(history) == KEEP_RECENT_MESSAGES + 2
+        assert history[-1]["content"] == "new"
+
+    async def test_extends_previous_summary(self):
+        """Test that the previous summary is passed to the model."""
+        memory = InMemoryMemoryAdapter(ConversationMemory())
+        summarizer, llm = _make_summarizer()
+        await _add_turns(memory, 8)
+        await summarizer.summarize(memory, "s")
+        await _add_turns(memory, 6)
+
+        assert await summarizer.summarize(memory, "s") is True
+        assert "summary 1" in llm.prompts[-1][1]["content"]
+        assert await memory.get_summary("s") == "summary 2"
+
+    async def test_schedule_runs_once_per_key(self):
+        """Test that a conversation is not summarized twice concurrently."""
+        memory = InMemoryMemoryAdapter(ConversationMemory())
+        summarizer, llm = _make_summarizer()
+        await _add_turns(memory, 8)
+
+        summarizer.schedule(memory, "s")
+        summarizer.schedule(memory, "s")
+        await summarizer._tasks["s"]
+
+        assert len(llm.prompts) == 1
+        assert summarizer.get_stats()["summaries"] == 1
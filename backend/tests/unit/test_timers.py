@@ -0,0 +1,51 @@
+"""Tests for the timer scheduler."""
+
+import asyncio
+
+from app.core.timers import TimerHeap
+
+
+class TestTimerHeap:
+    """Test TimerHeap class."""
+
+    async def test_fires_in_deadline_order(self):
+        """Test that timers fire earliest first from a single task."""
+        timers = TimerHeap()
+        await timers.start()
+        fired: list[str] = []
+
+        timers.call_later(0.03, fired.append, "late")
+        timers.call_later(0.01, fired.append, "early")
+        await asyncio.sleep(0.08)
+
+        assert fired == ["early", "late"]
+        await timers.stop()
+
+    async def test_cancelled_timer_does_not_fire(self):
+        """Test that a cancelled timer is skipped."""
+        timers = TimerHeap()
+        await timers.start()
+        fired: list[str] = []
+
+        timers.call_later(0.01, fired.append, "cancelled").cancel()
+        timers.call_later(0.02, fired.append, "kept")
+        await asyncio.sleep(0.06)
+
+        assert fired == ["kept"]
+        assert timers.fired == 1
+        assert len(timers) == 0
+        await timers.stop()
+
+    async def test_earlier_timer_wakes_scheduler(self):
+        """Test that a new earliest deadline interrupts a longer sleep."""
+        timers = TimerHeap()
+        await timers.start()
+        fired: list[str] = []
+
+        timers.call_later(10, fired.append, "far")
+        await asyncio.sleep(0.01)
+        timers.call_later(0.01, fired.append, "near")
+        await asyncio.sleep(0.05)
+
+        assert fired == ["near"]
+        await timers.stop()
@@ -0,0 +1,456 @@
+"""Tests for WebSocket connection management."""
+
+import asyncio
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+from app.core import websocket as websocket_module
+from app.core.fanout import RedisFanout
+from app.core.websocket import (
+    MAX_COALESCE_WINDOW_MS,
+    MAX_CONNECTIONS_PER_SESSION,
+    ConnectionInfo,
+    ConnectionManager,
+    SendQueue,
+    resolve_coalesce_window,
+)
+
+
+class FakeWebSocket:
+    """Minimal stand-in for a Starlette WebSocket."""
+
+    def __init__(self, host: str = "10.0.0.1") -> None:
+        self.scope = {"subprotocols": []}
+        self.headers: dict[str, str] = {}
+        self.client = SimpleNamespace(host=host, port=1234)
+        self.accepted = False
+        self.close_code: int | None = None
+        self.sent: list[str | bytes] = []
+        self.incoming: asyncio.Queue[dict] = asyncio.Queue()
+
+    async def accept(self, subprotocol=None):
+        self.accepted = True
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000, reason=None):
+        self.close_code = code
+
+
+class TestSendQueue:
+    """Test SendQueue class."""
+
+    async def test_fifo_order(self):
+        """Test that frames are delivered in order."""
+        queue = SendQueue(maxsize=4)
+        await queue.put({"type": "typing", "persona": "engineer", "content": ""})
+        await queue.put({"type": "stream", "persona": "engineer", "content": "Hi"})
+
+        assert (await queue.get())["type"] == "typing"
+        assert (await queue.get())["content"] == "Hi"
+
+    async def test_coalesces_stream_deltas_when_full(self):
+        """Test that a stream delta continuing the last frame merges when full."""
+        queue = SendQueue(maxsize=2)
+        await queue.put({"type": "typing", "persona": "engineer", "content": ""})
+        await queue.put({"type": "stream", "persona": "engineer", "content": "Hel", "seq": 2})
+
+        assert await queue.put({"type": "stream", "persona": "engineer", "content": "lo", "seq": 3})
+
+        assert len(queue) == 2
+        assert queue.coalesced_count == 1
+        await queue.get()
+        assert await queue.get() == {"type": "stream", "persona": "engineer", "content": "Hello", "seq": 3}
+
+    async def test_does_not_merge_across_other_personas(self):
+        """Test that interleaved personas are not merged (seq ranges stay contiguous)."""
+        queue = SendQueue(maxsize=2)
+        await queue.put({"type": "stream", "persona": "engineer", "content": "Hel"})
+        await queue.put({"type": "stream", "persona": "researcher", "content": "A"})
+
+        accepted = await queue.put(
+            {"type": "stream", "persona": "engineer", "content": "lo"}, timeout=0.01
+        )
+
+        assert accepted is False
+
+    async def test_does_not_merge_across_done(self):
+        """Test that a full queue times out instead of merging past a done frame."""
+        queue = SendQueue(maxsize=2)
+        await queue.put({"type": "stream", "persona": "engineer", "content": "Hi"})
+        await queue.put({"type": "done", "persona": "engineer", "content": ""})
+
+        accepted = await queue.put(
+            {"type": "stream", "persona": "engineer", "content": "again"}, timeout=0.01
+        )
+
+        assert accepted is False
+        assert len(queue) == 2
+
+    @pytest.mark.parametrize("frame_type", ["typing", "done"])
+    async def test_control_frames_wait_for_space(self, frame_type):
+        """Test that non-stream frames are never coalesced."""
+        queue = SendQueue(maxsize=1)
+        await queue.put({"type": "stream", "persona": "engineer", "content": "Hi"})
+
+        accepted = await queue.put(
+            {"type": frame_type, "persona": "engineer", "content": ""}, timeout=0.01
+        )
+
+        assert accepted is False
+
+
+class TestFrameCoalescing:
+    """Test stream frame coalescing in the writer."""
+
+    def test_resolve_coalesce_window(self):
+        """Test that client hints are clamped and converted to seconds."""
+        assert resolve_coalesce_window(0) == 0
+        assert resolve_coalesce_window(50) == 0.05
+        assert resolve_coalesce_window(10_000) == MAX_COALESCE_WINDOW_MS / 1000
+        assert resolve_coalesce_window(-5) == 0
+
+    async def test_collect_batch_merges_consecutive_deltas(self):
+        """Test that consecutive deltas within the window merge per persona."""
+        conn_info = ConnectionInfo(websocket=None, session_id="s", coalesce_window=0.05)
+        for persona, content in [("engineer", "lo"), ("researcher", "A"), ("researcher", "B")]:
+            await conn_info.send_queue.put({"type": "stream", "persona": persona, "content": content})
+        await conn_info.send_queue.put({"type": "done", "persona": "engineer", "content": ""})
+
+        first = {"type": "stream", "persona": "engineer", "content": "Hel"}
+        batch = await ConnectionManager()._collect_batch(conn_info, first)
+
+        assert [(f["type"], f["persona"], f["content"]) for f in batch] == [
+            ("stream", "engineer", "Hello"),
+            ("stream", "researcher", "AB"),
+            ("done", "engineer", ""),
+        ]
+
+    async def test_collect_batch_disabled(self):
+        """Test that a zero window sends frames as they are."""
+        conn_info = ConnectionInfo(websocket=None, session_id="s", coalesce_window=0)
+        await conn_info.send_queue.put({"type": "stream", "persona": "engineer", "content": "lo"})
+
+        first = {"type": "stream", "persona": "engineer", "content": "Hel"}
+        batch = await ConnectionManager()._collect_batch(conn_info, first)
+
+        assert batch == [first]
+        assert len(conn_info.send_queue) == 1
+
+
+class TestConnectionManager:
+    """Test ConnectionManager connection indexes."""
+
+    async def test_several_sockets_per_session(self):
+        """Test that a second socket for a session does not replace the first."""
+        manager = ConnectionManager()
+        sockets = [FakeWebSocket(), FakeWebSocket()]
+        first = await manager.connect(sockets[0], "s")
+        second = await manager.connect(sockets[1], "s")
+
+        assert first != second
+        assert manager.get_session_connection_count("s") == 2
+
+        assert await manager.send_message("s", {"type": "system", "content": "Hi"})
+        await asyncio.sleep(0.01)
+        assert all(len(websocket.sent) == 1 for websocket in sockets)
+
+        await manager.stop()
+
+    async def test_fanout_delivers_remote_frames(self):
+        """Test that frames published by another worker reach local sockets."""
+        manager = ConnectionManager()
+        # Redis is not needed to publish locally or to handle received messages
+        manager.fanout = fanout = RedisFanout()
+        fanout._handler = manager._on_remote_frame
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "s")
+
+        frame = {"type": "stream", "persona": "engineer", "content": "Hi", "seq": 5}
+        fanout.handle_message(b"ws:session:s", orjson.dumps({"w": "other", "f": frame}))
+        # Frames this worker published come back and are skipped
+        fanout.handle_message(b"ws:session:s", orjson.dumps({"w": fanout.worker_id, "f": frame}))
+        await asyncio.sleep(0.05)
+
+        assert len(websocket.sent) == 1 and '"Hi"' in websocket.sent[0]
+        assert fanout.received == 1
+        # Local frames continue the remote sequence and are published in turn
+        assert await manager.send_message("s", {"type": "done", "content": ""})
+        assert orjson.loads(fanout._pending[-1][1])["f"]["seq"] == 6
+
+        await manager.stop()
+
+    async def test_generations_shared_per_session(self):
+        """Test that a session runs one generation at a time and skips duplicates."""
+        manager = ConnectionManager()
+        tabs = [FakeWebSocket(), FakeWebSocket()]
+        for websocket in tabs:
+            await manager.connect(websocket, "s")
+        runs: list[str] = []
+
+        def generation(text: str):
+            async def stream():
+                runs.append(text)
+                for char in text:
+                    await asyncio.sleep(0.01)
+                    yield {"type": "stream", "persona": "engineer", "content": char}
+            return stream
+
+        results = await asyncio.gather(
+            manager.run_generation("s", "ab", generation("ab")),
+            manager.run_generation("s", "ab", generation("ab")),
+            manager.run_generation("s", "cd", generation("cd")),
+        )
+        await asyncio.sleep(0.1)
+
+        assert results == [True, False, True]
+        assert runs == ["ab", "cd"]
+        # Both tabs got both answers, in order
+        for websocket in tabs:
+            assert "".join(orjson.loads(data)["content"] for data in websocket.sent) == "abcd"
+        assert manager.duplicate_generations == 1
+
+        await manager.stop()
+
+    async def test_generations_without_key_are_not_duplicates(self):
+        """Test that messages without an id run even if their text repeats."""
+        manager = ConnectionManager()
+        await manager.connect(FakeWebSocket(), "s")
+        runs: list[str] = []
+
+        async def stream():
+            runs.append("Hi")
+            await asyncio.sleep(0.01)
+            yield {"type": "stream", "persona": "engineer", "content": "Hi"}
+
+        results = await asyncio.gather(
+            manager.run_generation("s", None, stream),
+            manager.run_generation("s", None, stream),
+        )
+
+        assert results == [True, True]
+        assert runs == ["Hi", "Hi"]
+        assert not manager._generations
+
+        await manager.stop()
+
+    async def test_conversation_shares_lock_across_channels(self):
+        """Test that two channels writing one conversation do not run concurrently."""
+        manager = ConnectionManager()
+        await manager.connect(FakeWebSocket(), "s")
+        running: list[str] = []
+        overlaps: list[bool] = []
+
+        def generation(name: str):
+            async def stream():
+                overlaps.append(bool(running))
+                running.append(name)
+                await asyncio.sleep(0.02)
+                running.remove(name)
+                yield {"type": "done", "content": ""}
+
+            return stream
+
+        await asyncio.gather(
+            manager.run_generation("s", "a", generation("a"), conversation="persona-group"),
+            manager.run_generation(
+                "s", "b", generation("b"), "persona-group", conversation="persona-group"
+            ),
+        )
+
+        assert overlaps == [False, False]
+
+        await manager.stop()
+
+    async def test_channels_generate_side_by_side(self):
+        """Test that generations of different channels run concurrently and are tagged."""
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "s")
+        running: list[str] = []
+
+        def generation(channel: str):
+            async def stream():
+                running.append(channel)
+                await asyncio.sleep(0.05)
+                yield {"type": "done", "content": ""}
+            return stream
+
+        tasks = [
+            asyncio.create_task(manager.run_generation("s", "k", generation(c), c))
+            for c in ("persona-group", "object:project")
+        ]
+        await asyncio.sleep(0.01)
+        # The same key in another channel is not a duplicate, nor does it wait
+        assert running == ["persona-group", "object:project"]
+
+        assert await asyncio.gather(*tasks) == [True, True]
+        await asyncio.sleep(0.05)
+        assert sorted(orjson.loads(data)["channel"] for data in websocket.sent) == [
+            "object:project",
+            "persona-group",
+        ]
+        assert manager.duplicate_generations == 0
+
+        await manager.stop()
+
+    async def test_generation_queued_over_capacity(self, monkeypatch):
+        """Test that a session waiting for LLM capacity gets a queued frame."""
+        monkeypatch.setattr("app.core.admission.MAX_ACTIVE_TURNS", 1)
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "s")
+
+        async def turn():
+            return
+            yield
+
+        # Another session holds the only slot
+        assert await manager.admission.acquire(None)
+        waiting = asyncio.create_task(manager.run_generation("s", "k", turn))
+        await asyncio.sleep(0.05)
+
+        frame = orjson.loads(websocket.sent[0])
+        assert frame["type"] == "queued" and frame["position"] == 1
+
+        manager.admission.release(1.0)
+        assert await waiting
+        assert manager.admission.active == 0
+
+        await manager.stop()
+
+    async def test_drain_finishes_generations(self):
+        """Test that draining refuses new work and lets running generations finish."""
+        manager = ConnectionManager()
+        idle, busy = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(idle, "idle")
+        await manager.connect(busy, "busy")
+
+        async def answer():
+            for char in "abc":
+                await asyncio.sleep(0.02)
+                yield {"type": "stream", "persona": "engineer", "content": char}
+
+        running = asyncio.create_task(manager.run_generation("busy", "k", answer))
+        await asyncio.sleep(0.01)
+        drain = asyncio.create_task(manager.drain(timeout=1.0))
+        await asyncio.sleep(0.01)
+
+        assert manager.draining
+        assert await manager.connect(FakeWebSocket(), "new") is None
+        assert not await manager.run_generation("idle", "k2", answer)
+
+        await drain
+        assert await running
+        await asyncio.sleep(0.05)
+
+        types = [orjson.loads(data)["type"] for data in busy.sent]
+        assert types[-1] == "reconnect" and "stream" in types
+        idle_frames = [orjson.loads(data) for data in idle.sent]
+        assert idle_frames[0] == {"type": "reconnect", "content": "", "seq": 1}
+        assert idle_frames[1]["content"]  # Resend hint for the refused turn
+
+        await manager.stop()
+        assert busy.close_code == 1012
+
+    async def test_session_limit(self):
+        """Test that the per-session limit is enforced."""
+        manager = ConnectionManager()
+        for _ in range(MAX_CONNECTIONS_PER_SESSION):
+            assert await manager.connect(FakeWebSocket(), "s") is not None
+
+        rejected = FakeWebSocket()
+        assert await manager.connect(rejected, "s") is None
+        assert rejected.close_code == 1008
+
+        await manager.stop()
+
+    async def test_disconnect_updates_indexes(self):
+        """Test that closing a socket frees its session and address slots."""
+        manager = ConnectionManager()
+        first = await manager.connect(FakeWebSocket(), "s")
+        second = await manager.connect(FakeWebSocket(), "s")
+
+        await manager.disconnect(first)
+        assert manager.is_connected("s")
+        assert manager._ip_connections == {"10.0.0.1": 1}
+
+        await manager.disconnect(second)
+        assert not manager.is_connected("s")
+        assert manager._ip_connections == {}
+        assert manager.get_connection_count() == 0
+
+        await manager.stop()
+
+    async def test_heartbeat_pings_and_times_out(self, monkeypatch):
+        """Test that the scheduler pings live sockets and closes stalled ones."""
+        monkeypatch.setattr(websocket_module, "HEARTBEAT_INTERVAL_SECONDS", 0.03)
+        monkeypatch.setattr(websocket_module, "HEARTBEAT_TIMEOUT_SECONDS", 0.02)
+
+        class PongingWebSocket(FakeWebSocket):
+            async def send_text(self, data):
+                await super().send_text(data)
+                if '"ping"' in data:
+                    self.incoming.put_nowait({"type": "websocket.receive", "text": '{"type":"pong"}'})
+
+        class StalledWebSocket(FakeWebSocket):
+            async def send_text(self, data):
+                await asyncio.sleep(10)
+
+        manager = ConnectionManager()
+        await manager.start()
+        # A half-open socket accepts writes but never answers
+        live, half_open, stalled = PongingWebSocket(), FakeWebSocket(), StalledWebSocket()
+        connection_ids = [
+            await manager.connect(websocket, session_id)
+            for websocket, session_id in ((live, "a"), (half_open, "b"), (stalled, "c"))
+        ]
+        live_id = connection_ids[0]
+        # Pongs are consumed by receive_message, which keeps waiting for a real frame
+        readers = [
+            asyncio.create_task(manager.receive_message(connection_id))
+            for connection_id in connection_ids
+        ]
+        await asyncio.sleep(0.15)
+
+        assert '"ping"' in live.sent[0]
+        assert manager.connections[live_id].rtt_ms is not None
+        assert manager.get_rtt_stats()["measured"] == 1
+        assert half_open.close_code == 1002 and stalled.close_code == 1002
+        assert manager.is_connected("a")
+        assert not manager.is_connected("b") and not manager.is_connected("c")
+
+        for reader in readers:
+            reader.cancel()
+        await manager.stop()
+
+    async def test_heartbeat_waits_for_busy_endpoint(self, monkeypatch):
+        """Test that a pong left unread while the endpoint handles a message is not a timeout."""
+        monkeypatch.setattr(websocket_module, "HEARTBEAT_INTERVAL_SECONDS", 0.03)
+        monkeypatch.setattr(websocket_module, "HEARTBEAT_TIMEOUT_SECONDS", 0.02)
+
+        manager = ConnectionManager()
+        await manager.start()
+        websocket = FakeWebSocket()
+        connection_id = await manager.connect(websocket, "s")
+        # The client answers, but nothing reads until the endpoint is done
+        websocket.incoming.put_nowait({"type": "websocket.receive", "text": '{"type":"pong"}'})
+        await asyncio.sleep(0.1)
+
+        assert manager.is_connected("s") and websocket.close_code is None
+
+        reader = asyncio.create_task(manager.receive_message(connection_id))
+        await asyncio.sleep(0.01)
+        assert manager.connections[connection_id].pong_received_at > 0
+
+        reader.cancel()
+        await manager.stop()
@@ -12,7 +12,7 @@ import type { PersonaType } from '@/store/chatStore'
 export function ChatWidget() {
   const { t } = useTranslation()
   const [isOpen, setIsOpen] = useState(false)
-  const { messages, isConnected, sendMessage, typingPersona, drainBuffer, typewriterBuffer } = useChatStore()
+  const { messages, isConnected, sendMessage, typingPersona, queueStatus, drainBuffer, typewriterBuffer } = useChatStore()
   const messagesEndRef = useRef<HTMLDivElement>(null)
 
   // Typewriter effect - drain buffer at consistent speed
@@ -122,6 +122,12 @@ export function ChatWidget() {
               ))}
               {/* Typing indicator */}
               {typingPersona && <TypingIndicator persona={typingPersona} />}
+              {/* Waiting for server capacity */}
+              {queueStatus && (
+                <p className="text-center text-gray-400 text-xs">
+                  {t('chat.queued', { position: queueStatus.position, seconds: queueStatus.etaSeconds })}
+                </p>
+              )}
               <div ref={messagesEndRef} />
             </>
           )}
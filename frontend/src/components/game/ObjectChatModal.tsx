@@ -11,6 +11,8 @@ import { motion, AnimatePresence } from 'framer-motion'
 import { X, Send } from 'lucide-react'
 import { cn } from '@/utils'
 import { useGameStore } from '@/store/gameStore'
+import { useChatStore } from '@/store/chatStore'
+import type { WebSocketMessage } from '@/lib/schemas'
 
 interface ObjectMessage {
   id: string
@@ -20,8 +22,6 @@ interface ObjectMessage {
   isStreaming?: boolean
 }
 
-const WS_URL = import.meta.env.VITE_WS_URL || 'ws://localhost:8000/api/v1/chat'
-
 export function ObjectChatModal() {
   const { i18n } = useTranslation()
   const lang = i18n.language === 'tr' ? 'tr' : 'en'
@@ -36,7 +36,12 @@ export function ObjectChatModal() {
   const [inputValue, setInputValue] = useState('')
   const [isConnected, setIsConnected] = useState(false)
   const [isTyping, setIsTyping] = useState(false)
-  const wsRef = useRef<WebSocket | null>(null)
+  // Object chats are channels of the chat store's socket
+  const socketConnected = useChatStore((state) => state.isConnected)
+  const openChannel = useChatStore((state) => state.openChannel)
+  const closeChannel = useChatStore((state) => state.closeChannel)
+  const sendChannelMessage = useChatStore((state) => state.sendChannelMessage)
+  const channel = chattingWithObject ? `object:${chattingWithObject.objectPersonaId}` : null
   const messagesEndRef = useRef<HTMLDivElement>(null)
 
   // Add message helper
@@ -65,119 +70,99 @@ export function ObjectChatModal() {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
   }, [messages, isTyping])
 
-  // Connect to WebSocket when modal opens
+  // A dropped socket closes the channel; the store reopens it on reconnect
   useEffect(() => {
-    if (!isChatting || !chattingWithObject) {
-      // Clean up when modal closes
-      if (wsRef.current) {
-        wsRef.current.close()
-        wsRef.current = null
-      }
+    if (!socketConnected) setIsConnected(false)
+  }, [socketConnected])
+
+  // Open the object's channel on the shared socket when the modal opens
+  useEffect(() => {
+    if (!isChatting || !chattingWithObject || !channel) {
       setIsConnected(false)
       return
     }
 
-    // Build WebSocket URL with object_id parameter
-    const objectTitle = chattingWithObject.title[lang]
-    const wsUrl = `${WS_URL}?object_id=${encodeURIComponent(chattingWithObject.objectPersonaId)}&object_title=${encodeURIComponent(objectTitle)}`
-
-    const socket = new WebSocket(wsUrl)
-    wsRef.current = socket
+    // The welcome is repeated each time the channel is reopened
+    let welcomed = false
 
-    socket.onopen = () => {
-      setIsConnected(true)
-      if (import.meta.env.DEV) {
-        console.log(`Object chat connected: ${chattingWithObject.objectPersonaId}`)
-      }
-    }
-
-    socket.onmessage = (event) => {
-      try {
-        const data = JSON.parse(event.data)
-
-        if (data.type === 'system') {
-          // Welcome message from object
-          addMessage({
-            id: crypto.randomUUID(),
-            content: data.content,
-            role: 'assistant',
-            timestamp: new Date(),
-          })
-        } else if (data.type === 'typing') {
-          // Object is typing
-          setIsTyping(true)
-          // Add placeholder message if not already streaming
-          setMessages((prev) => {
-            const lastMsg = prev[prev.length - 1]
-            if (!lastMsg || lastMsg.role !== 'assistant' || !lastMsg.isStreaming) {
-              return [
-                ...prev,
-                {
-                  id: crypto.randomUUID(),
-                  content: '',
-                  role: 'assistant',
-                  timestamp: new Date(),
-                  isStreaming: true,
-                },
-              ]
-            }
-            return prev
-          })
-        } else if (data.type === 'stream') {
-          // Streaming content
-          setIsTyping(false)
-          updateLastMessage(data.content)
-        } else if (data.type === 'done') {
-          // Object finished
-          setIsTyping(false)
-          setMessages((prev) => {
-            if (prev.length === 0) return prev
-            const lastMsg = prev[prev.length - 1]
-            if (lastMsg && lastMsg.isStreaming) {
-              // Create new array with new last message object to avoid mutation
-              return [
-                ...prev.slice(0, -1),
-                { ...lastMsg, isStreaming: false }
-              ]
-            }
-            return prev
-          })
-        } else if (data.type === 'error') {
-          addMessage({
-            id: crypto.randomUUID(),
-            content: data.content,
-            role: 'assistant',
-            timestamp: new Date(),
-          })
-        }
-      } catch (err) {
+    const handleFrame = (data: WebSocketMessage) => {
+      if (data.type === 'system') {
+        // Channel open: welcome message from object
+        setIsConnected(true)
         if (import.meta.env.DEV) {
-          console.error('Failed to parse object chat message:', err)
+          console.log(`Object chat opened: ${channel}`)
         }
+        if (welcomed) return
+        welcomed = true
+        addMessage({
+          id: crypto.randomUUID(),
+          content: data.content,
+          role: 'assistant',
+          timestamp: new Date(),
+        })
+      } else if (data.type === 'typing') {
+        // Object is typing
+        setIsTyping(true)
+        // Add placeholder message if not already streaming
+        setMessages((prev) => {
+          const lastMsg = prev[prev.length - 1]
+          if (!lastMsg || lastMsg.role !== 'assistant' || !lastMsg.isStreaming) {
+            return [
+              ...prev,
+              {
+                id: crypto.randomUUID(),
+                content: '',
+                role: 'assistant',
+                timestamp: new Date(),
+                isStreaming: true,
+              },
+            ]
+          }
+          return prev
+        })
+      } else if (data.type === 'stream') {
+        // Streaming content
+        setIsTyping(false)
+        updateLastMessage(data.content)
+      } else if (data.type === 'done') {
+        // Object finished
+        setIsTyping(false)
+        setMessages((prev) => {
+          if (prev.length === 0) return prev
+          const lastMsg = prev[prev.length - 1]
+          if (lastMsg && lastMsg.isStreaming) {
+            // Create new array with new last message object to avoid mutation
+            return [
+              ...prev.slice(0, -1),
+              { ...lastMsg, isStreaming: false }
+            ]
+          }
+          return prev
+        })
+      } else if (data.type === 'error') {
+        addMessage({
+          id: crypto.randomUUID(),
+          content: data.content,
+          role: 'assistant',
+          timestamp: new Date(),
+        })
       }
     }
 
-    socket.onclose = () => {
-      setIsConnected(false)
-      if (import.meta.env.DEV) {
-        console.log('Object chat disconnected')
-      }
-    }
-
-    socket.onerror = (error) => {
-      if (import.meta.env.DEV) {
-        console.error('Object chat WebSocket error:', error)
-      }
-    }
+    openChannel(channel, chattingWithObject.title[lang], handleFrame)
 
     return () => {
-      socket.close()
+      closeChannel(channel)
+      setIsConnected(false)
     }
-  }, [isChatting, chattingWithObject, lang, addMessage, updateLastMessage])
+  }, [isChatting, chattingWithObject, channel, lang, addMessage, updateLastMessage, openChannel, closeChannel])
 
   // Send message handler
   const handleSend = useCallback(() => {
-    if (!inputValue.trim() || !wsRef.current || !isConnected) return
+    if (!inputValue.trim() || !channel || !isConnected) return
+
+    // Send to server
+    if (!sendChannelMessage(channel, inputValue.trim())) return
 
     // Add user message
     addMessage({
@@ -186,11 +171,8 @@ export function ObjectChatModal() {
       role: 'user',
       timestamp: new Date(),
     })
-
-    // Send to server
-    wsRef.current.send(JSON.stringify({ content: inputValue.trim() }))
     setInputValue('')
-  }, [inputValue, isConnected, addMessage])
+  }, [inputValue, channel, isConnected, addMessage, sendChannelMessage])
 
   // Handle key press
   const handleKeyDown = (e: React.KeyboardEvent) => {
@@ -12,8 +12,9 @@ import { motion, AnimatePresence } from 'framer-motion'
 import { X, ExternalLink, MessageCircle, Calendar, Tag, ArrowLeft, Send } from 'lucide-react'
 import ReactMarkdown from 'react-markdown'
 import { useGameStore } from '@/store/gameStore'
+import { useChatStore } from '@/store/chatStore'
 import { cn } from '@/utils'
-import { WS_CHAT_ENDPOINT } from '@/lib/config'
+import type { WebSocketMessage } from '@/lib/schemas'
 import type { ObjectMessage } from '@/types/game'
 
 // Type icon mapping
@@ -74,7 +75,12 @@ export function ObjectDetailPanel() {
   const [inputValue, setInputValue] = useState('')
   const [isConnected, setIsConnected] = useState(false)
   const [isTyping, setIsTyping] = useState(false)
-  const wsRef = useRef<WebSocket | null>(null)
+  // Object chats are channels of the chat store's socket
+  const socketConnected = useChatStore((state) => state.isConnected)
+  const openChannel = useChatStore((state) => state.openChannel)
+  const closeChannel = useChatStore((state) => state.closeChannel)
+  const sendChannelMessage = useChatStore((state) => state.sendChannelMessage)
+  const channel = selectedObject ? `object:${selectedObject.objectPersonaId}` : null
   const messagesEndRef = useRef<HTMLDivElement>(null)
   const inputRef = useRef<HTMLTextAreaElement>(null)
 
@@ -134,125 +140,103 @@ export function ObjectDetailPanel() {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
   }, [messages, isTyping])
 
-  // WebSocket connection for chat mode
+  // A dropped socket closes the channel; the store reopens it on reconnect
   useEffect(() => {
-    if (panelMode !== 'chat' || !selectedObject) {
-      // Clean up when not in chat mode
-      if (wsRef.current) {
-        wsRef.current.close()
-        wsRef.current = null
-      }
+    if (!socketConnected) setIsConnected(false)
+  }, [socketConnected])
+
+  // Object channel on the shared socket for chat mode
+  useEffect(() => {
+    if (panelMode !== 'chat' || !selectedObject || !channel) {
       setIsConnected(false)
       return
     }
 
-    // Build WebSocket URL with object_id parameter
-    const objectTitle = selectedObject.title[lang]
-    const wsUrl = `${WS_CHAT_ENDPOINT}?object_id=${encodeURIComponent(selectedObject.objectPersonaId)}&object_title=${encodeURIComponent(objectTitle)}`
-
-    const socket = new WebSocket(wsUrl)
-    wsRef.current = socket
+    // The welcome is repeated each time the channel is reopened
+    let welcomed = false
 
-    socket.onopen = () => {
-      setIsConnected(true)
-      if (import.meta.env.DEV) {
-        console.log(`Object chat connected: ${selectedObject.objectPersonaId}`)
-      }
-      // Focus input when connected
-      setTimeout(() => inputRef.current?.focus(), 100)
-    }
-
-    socket.onmessage = (event) => {
-      try {
-        const data = JSON.parse(event.data)
-
-        if (data.type === 'system') {
-          // Welcome message from object
-          addMessage({
-            id: crypto.randomUUID(),
-            content: data.content,
-            role: 'assistant',
-            timestamp: new Date(),
-          })
-        } else if (data.type === 'typing') {
-          // Object is typing
-          setIsTyping(true)
-          setMessages((prev) => {
-            const lastMsg = prev[prev.length - 1]
-            if (!lastMsg || lastMsg.role !== 'assistant' || !lastMsg.isStreaming) {
-              return [
-                ...prev,
-                {
-                  id: crypto.randomUUID(),
-                  content: '',
-                  role: 'assistant',
-                  timestamp: new Date(),
-                  isStreaming: true,
-                },
-              ]
-            }
-            return prev
-          })
-        } else if (data.type === 'stream') {
-          // Add to buffer for smooth typewriter effect
-          setIsTyping(false)
-          tokenBufferRef.current += data.content
-        } else if (data.type === 'done') {
-          // Object finished - flush remaining buffer then mark complete
-          setIsTyping(false)
-
-          // Wait for buffer to drain before marking as done
-          const checkBufferAndFinish = () => {
-            if (tokenBufferRef.current.length === 0) {
-              setMessages((prev) => {
-                if (prev.length === 0) return prev
-                const lastMsg = prev[prev.length - 1]
-                if (lastMsg && lastMsg.isStreaming) {
-                  return [
-                    ...prev.slice(0, -1),
-                    { ...lastMsg, isStreaming: false }
-                  ]
-                }
-                return prev
-              })
-            } else {
-              // Buffer not empty yet, check again
-              setTimeout(checkBufferAndFinish, 50)
-            }
-          }
-          checkBufferAndFinish()
-        } else if (data.type === 'error') {
-          addMessage({
-            id: crypto.randomUUID(),
-            content: data.content,
-            role: 'assistant',
-            timestamp: new Date(),
-          })
-        }
-      } catch (err) {
+    const handleFrame = (data: WebSocketMessage) => {
+      if (data.type === 'system') {
+        // Channel open: welcome message from object
+        setIsConnected(true)
         if (import.meta.env.DEV) {
-          console.error('Failed to parse object chat message:', err)
+          console.log(`Object chat opened: ${channel}`)
         }
+        if (welcomed) return
+        welcomed = true
+        addMessage({
+          id: crypto.randomUUID(),
+          content: data.content,
+          role: 'assistant',
+          timestamp: new Date(),
+        })
+        // Focus input when connected
+        setTimeout(() => inputRef.current?.focus(), 100)
+      } else if (data.type === 'typing') {
+        // Object is typing
+        setIsTyping(true)
+        setMessages((prev) => {
+          const lastMsg = prev[prev.length - 1]
+          if (!lastMsg || lastMsg.role !== 'assistant' || !lastMsg.isStreaming) {
+            return [
+              ...prev,
+              {
+                id: crypto.randomUUID(),
+                content: '',
+                role: 'assistant',
+                timestamp: new Date(),
+                isStreaming: true,
+              },
+            ]
+          }
+          return prev
+        })
+      } else if (data.type === 'stream') {
+        // Add to buffer for smooth typewriter effect
+        setIsTyping(false)
+        tokenBufferRef.current += data.content
+      } else if (data.type === 'done') {
+        // Object finished - flush remaining buffer then mark complete
+        setIsTyping(false)
+
+        // Wait for buffer to drain before marking as done
+        const checkBufferAndFinish = () => {
+          if (tokenBufferRef.current.length === 0) {
+            setMessages((prev) => {
+              if (prev.length === 0) return prev
+              const lastMsg = prev[prev.length - 1]
+              if (lastMsg && lastMsg.isStreaming) {
+                return [
+                  ...prev.slice(0, -1),
+                  { ...lastMsg, isStreaming: false }
+                ]
+              }
+              return prev
+            })
+          } else {
+            // Buffer not empty yet, check again
+            setTimeout(checkBufferAndFinish, 50)
+          }
+        }
+        checkBufferAndFinish()
+      } else if (data.type === 'error') {
+        setIsTyping(false)
+        addMessage({
+          id: crypto.randomUUID(),
+          content: data.content,
+          role: 'assistant',
+          timestamp: new Date(),
+        })
       }
     }
 
-    socket.onclose = () => {
-      setIsConnected(false)
-      if (import.meta.env.DEV) {
-        console.log('Object chat disconnected')
-      }
-    }
-
-    socket.onerror = (error) => {
-      if (import.meta.env.DEV) {
-        console.error('Object chat WebSocket error:', error)
-      }
-    }
+    openChannel(channel, selectedObject.title[lang], handleFrame)
 
     return () => {
-      socket.close()
+      closeChannel(channel)
+      setIsConnected(false)
     }
-  }, [panelMode, selectedObject, lang, addMessage])
+  }, [panelMode, selectedObject, channel, lang, addMessage, openChannel, closeChannel])
 
   // Handle ESC key - different behavior based on mode
   useEffect(() => {
@@ -274,7 +258,10 @@ export function ObjectDetailPanel() {
 
   // Send message handler
   const handleSend = useCallback(() => {
-    if (!inputValue.trim() || !wsRef.current || !isConnected) return
+    if (!inputValue.trim() || !channel || !isConnected) return
+
+    // Send to server
+    if (!sendChannelMessage(channel, inputValue.trim())) return
 
     // Add user message
     addMessage({
@@ -283,11 +270,8 @@ export function ObjectDetailPanel() {
       role: 'user',
       timestamp: new Date(),
     })
-
-    // Send to server
-    wsRef.current.send(JSON.stringify({ content: inputValue.trim() }))
     setInputValue('')
-  }, [inputValue, isConnected, addMessage])
+  }, [inputValue, channel, isConnected, addMessage, sendChannelMessage])
 
   // Handle chat input key press
   const handleChatKeyDown = (e: React.KeyboardEvent) => {
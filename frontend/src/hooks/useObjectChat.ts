@@ -1,6 +1,7 @@
 import { useState, useRef, useCallback, useEffect } from 'react'
 import type { TimelineObject, ObjectMessage } from '@/types/game'
-import { WS_CHAT_ENDPOINT } from '@/lib/config'
+import type { WebSocketMessage } from '@/lib/schemas'
+import { useChatStore } from '@/store/chatStore'
 
 // Re-export ObjectMessage as ChatMessage for backward compatibility
 type ChatMessage = ObjectMessage
@@ -23,7 +24,8 @@ interface UseObjectChatReturn {
 }
 
 /**
- * Custom hook for managing WebSocket chat connections with timeline objects.
+ * Custom hook for chatting with timeline objects over the chat store's socket.
+ * Each object is a channel ('object:<objectPersonaId>') of that one connection.
  * This eliminates duplication between ObjectDetailPanel and ObjectChatModal.
  */
 export function useObjectChat(options: UseObjectChatOptions): UseObjectChatReturn {
@@ -34,7 +36,12 @@ export function useObjectChat(options: UseObjectChatOptions): UseObjectChatRetur
   const [isStreaming, setIsStreaming] = useState(false)
   const [currentStreamingContent, setCurrentStreamingContent] = useState('')
 
-  const wsRef = useRef<WebSocket | null>(null)
+  // Object chats are channels of the chat store's socket
+  const socketConnected = useChatStore((state) => state.isConnected)
+  const openChannel = useChatStore((state) => state.openChannel)
+  const closeChannel = useChatStore((state) => state.closeChannel)
+  const sendChannelMessage = useChatStore((state) => state.sendChannelMessage)
+  const channel = object?.objectPersonaId ? `object:${object.objectPersonaId}` : null
   const bufferRef = useRef('')
   const bufferTimerRef = useRef<NodeJS.Timeout | null>(null)
 
@@ -78,10 +85,13 @@ export function useObjectChat(options: UseObjectChatOptions): UseObjectChatRetur
 
   // Send a message
   const sendMessage = useCallback((content: string) => {
-    if (!wsRef.current || wsRef.current.readyState !== WebSocket.OPEN || !content.trim()) {
+    if (!channel || !isConnected || !content.trim()) {
       return
     }
 
+    // Send to server
+    if (!sendChannelMessage(channel, content.trim())) return
+
     // Add user message
     const userMessage: ChatMessage = {
       id: crypto.randomUUID(),
@@ -90,10 +100,7 @@ export function useObjectChat(options: UseObjectChatOptions): UseObjectChatRetur
       timestamp: new Date(),
     }
     addMessage(userMessage)
-
-    // Send to server
-    wsRef.current.send(content.trim())
-  }, [addMessage])
+  }, [channel, isConnected, addMessage, sendChannelMessage])
 
   // Clear messages
   const clearMessages = useCallback(() => {
@@ -106,17 +113,22 @@ export function useObjectChat(options: UseObjectChatOptions): UseObjectChatRetur
     }
   }, [])
 
-  // Disconnect WebSocket
+  // Close the object's channel (the shared socket stays open)
   const disconnect = useCallback(() => {
-    if (wsRef.current) {
-      wsRef.current.close()
-      wsRef.current = null
+    if (channel) {
+      closeChannel(channel)
+      setIsConnected(false)
     }
-  }, [])
+  }, [channel, closeChannel])
 
-  // WebSocket connection effect
+  // A dropped socket closes the channel; the store reopens it on reconnect
   useEffect(() => {
-    if (!object?.objectPersonaId) {
+    if (!socketConnected) setIsConnected(false)
+  }, [socketConnected])
+
+  // Channel effect
+  useEffect(() => {
+    if (!object || !channel) {
       return
     }
 
@@ -126,120 +138,94 @@ export function useObjectChat(options: UseObjectChatOptions): UseObjectChatRetur
       bufferTimerRef.current = null
     }
 
-    // Close existing connection if any
-    if (wsRef.current) {
-      wsRef.current.close()
-    }
-
     // Reset state
     clearMessages()
     setIsStreaming(false)
 
-    // Create WebSocket URL
-    // Use English title for the URL
+    // Use English title for the channel
     const title = typeof object.title === 'string' ? object.title : object.title.en
-    const wsUrl = `${WS_CHAT_ENDPOINT}?object_id=${object.objectPersonaId}&object_title=${encodeURIComponent(title)}`
 
-    const socket = new WebSocket(wsUrl)
-    wsRef.current = socket
-
-    socket.onopen = () => {
-      setIsConnected(true)
-      if (import.meta.env.DEV) {
-        console.log(`Object chat connected: ${object.objectPersonaId}`)
-      }
-      onConnect?.()
-    }
+    // The welcome is repeated each time the channel is reopened
+    let welcomed = false
 
-    socket.onmessage = (event) => {
-      try {
-        const data = JSON.parse(event.data)
-
-        if (data.type === 'system') {
-          // System message (e.g., welcome message)
-          addMessage({
-            id: crypto.randomUUID(),
-            content: data.content,
-            role: 'assistant',
-            timestamp: new Date(),
-          })
-        } else if (data.type === 'typing') {
-          // Start streaming
-          setIsStreaming(true)
-          setCurrentStreamingContent('')
-          bufferRef.current = ''
-
-          // Add placeholder message for streaming
-          addMessage({
-            id: crypto.randomUUID(),
-            content: '',
-            role: 'assistant',
-            timestamp: new Date(),
-            isStreaming: true,
-          })
-        } else if (data.type === 'stream') {
-          // Add to buffer for smooth typewriter effect
-          bufferRef.current += data.content
-          if (!bufferTimerRef.current) {
-            processBuffer()
-          }
-        } else if (data.type === 'done') {
-          // Flush any remaining buffer
-          if (bufferRef.current) {
-            updateLastMessage(bufferRef.current)
-            setCurrentStreamingContent((prev) => prev + bufferRef.current)
-            bufferRef.current = ''
-          }
-
-          // Mark streaming as complete
-          setIsStreaming(false)
-          setMessages((prev) => {
-            if (prev.length === 0) return prev
-            const lastMsg = prev[prev.length - 1]
-            if (!lastMsg.isStreaming) return prev
-
-            return [
-              ...prev.slice(0, -1),
-              { ...lastMsg, isStreaming: false }
-            ]
-          })
-        } else if (data.type === 'error') {
-          addMessage({
-            id: crypto.randomUUID(),
-            content: data.content,
-            role: 'assistant',
-            timestamp: new Date(),
-          })
-        }
-      } catch (err) {
+    const handleFrame = (data: WebSocketMessage) => {
+      if (data.type === 'system') {
+        // Channel open: welcome message
+        setIsConnected(true)
         if (import.meta.env.DEV) {
-          console.error('Failed to parse object chat message:', err)
+          console.log(`Object chat opened: ${channel}`)
+        }
+        if (welcomed) return
+        welcomed = true
+        onConnect?.()
+        addMessage({
+          id: crypto.randomUUID(),
+          content: data.content,
+          role: 'assistant',
+          timestamp: new Date(),
+        })
+      } else if (data.type === 'typing') {
+        // Start streaming
+        setIsStreaming(true)
+        setCurrentStreamingContent('')
+        bufferRef.current = ''
+
+        // Add placeholder message for streaming
+        addMessage({
+          id: crypto.randomUUID(),
+          content: '',
+          role: 'assistant',
+          timestamp: new Date(),
+          isStreaming: true,
+        })
+      } else if (data.type === 'stream') {
+        // Add to buffer for smooth typewriter effect
+        bufferRef.current += data.content
+        if (!bufferTimerRef.current) {
+          processBuffer()
+        }
+      } else if (data.type === 'done') {
+        // Flush any remaining buffer
+        if (bufferRef.current) {
+          updateLastMessage(bufferRef.current)
+          setCurrentStreamingContent((prev) => prev + bufferRef.current)
+          bufferRef.current = ''
         }
-      }
-    }
 
-    socket.onclose = () => {
-      setIsConnected(false)
-      if (import.meta.env.DEV) {
-        console.log('Object chat disconnected')
+        // Mark streaming as complete
+        setIsStreaming(false)
+        setMessages((prev) => {
+          if (prev.length === 0) return prev
+          const lastMsg = prev[prev.length - 1]
+          if (!lastMsg.isStreaming) return prev
+
+          return [
+            ...prev.slice(0, -1),
+            { ...lastMsg, isStreaming: false }
+          ]
+        })
+      } else if (data.type === 'error') {
+        addMessage({
+          id: crypto.randomUUID(),
+          content: data.content,
+          role: 'assistant',
+          timestamp: new Date(),
+        })
       }
-      onDisconnect?.()
     }
 
-    socket.onerror = (error) => {
-      if (import.meta.env.DEV) {
-        console.error('Object chat WebSocket error:', error)
-      }
-    }
+    openChannel(channel, title, handleFrame)
 
     return () => {
-      socket.close()
+      closeChannel(channel)
+      setIsConnected(false)
+      if (welcomed) onDisconnect?.()
       if (bufferTimerRef.current) {
         clearTimeout(bufferTimerRef.current)
         bufferTimerRef.current = null
       }
     }
-  }, [object?.objectPersonaId, object?.title, addMessage, updateLastMessage, processBuffer, clearMessages, onConnect, onDisconnect])
+  }, [object?.objectPersonaId, object?.title, channel, addMessage, updateLastMessage, processBuffer, clearMessages, openChannel, closeChannel, onConnect, onDisconnect])
 
   return {
     messages,
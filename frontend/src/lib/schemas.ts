@@ -12,6 +12,8 @@ export const SystemMessageSchema = z.object({
   type: z.literal('system'),
   content: z.string(),
   session_id: z.string().optional(),
+  channel: z.string().optional(),
+  seq: z.number().optional(),
 })
 
 // Typing indicator
@@ -19,6 +21,8 @@ export const TypingMessageSchema = z.object({
   type: z.literal('typing'),
   persona: z.string().optional(),
   object_id: z.string().optional(),
+  channel: z.string().optional(),
+  seq: z.number().optional(),
 })
 
 // Streaming content
@@ -27,6 +31,8 @@ export const StreamMessageSchema = z.object({
   content: z.string(),
   persona: z.string().optional(),
   object_id: z.string().optional(),
+  channel: z.string().optional(),
+  seq: z.number().optional(),
 })
 
 // Done signal
@@ -35,12 +41,45 @@ export const DoneMessageSchema = z.object({
   persona: z.string().optional(),
   object_id: z.string().optional(),
   content: z.string().optional(),
+  channel: z.string().optional(),
+  seq: z.number().optional(),
 })
 
 // Error message
 export const ErrorMessageSchema = z.object({
   type: z.literal('error'),
   content: z.string(),
+  channel: z.string().optional(),
+  seq: z.number().optional(),
+})
+
+// Heartbeat ping (answer with {"type": "pong"})
+export const PingMessageSchema = z.object({
+  type: z.literal('ping'),
+})
+
+// Waiting for server capacity; the response follows once admitted
+export const QueuedMessageSchema = z.object({
+  type: z.literal('queued'),
+  position: z.number(),
+  eta_seconds: z.number(),
+  channel: z.string().optional(),
+  seq: z.number().optional(),
+})
+
+// Server is restarting: reconnect (content asks to resend a refused message)
+export const ReconnectMessageSchema = z.object({
+  type: z.literal('reconnect'),
+  content: z.string(),
+  seq: z.number().optional(),
+})
+
+// Header of the frames missed while disconnected (sent after reconnecting with last_seq)
+export const ReplayMessageSchema = z.object({
+  type: z.literal('replay'),
+  from_seq: z.number(),
+  to_seq: z.number(),
+  complete: z.boolean(),
 })
 
 // Union of all message types
@@ -50,6 +89,10 @@ export const WebSocketMessageSchema = z.discriminatedUnion('type', [
   StreamMessageSchema,
   DoneMessageSchema,
   ErrorMessageSchema,
+  PingMessageSchema,
+  QueuedMessageSchema,
+  ReconnectMessageSchema,
+  ReplayMessageSchema,
 ])
 
 // Export types derived from schemas
@@ -58,6 +101,10 @@ export type TypingMessage = z.infer<typeof TypingMessageSchema>
 export type StreamMessage = z.infer<typeof StreamMessageSchema>
 export type DoneMessage = z.infer<typeof DoneMessageSchema>
 export type ErrorMessage = z.infer<typeof ErrorMessageSchema>
+export type PingMessage = z.infer<typeof PingMessageSchema>
+export type QueuedMessage = z.infer<typeof QueuedMessageSchema>
+export type ReconnectMessage = z.infer<typeof ReconnectMessageSchema>
+export type ReplayMessage = z.infer<typeof ReplayMessageSchema>
 export type WebSocketMessage = z.infer<typeof WebSocketMessageSchema>
 
 /**
@@ -12,12 +12,13 @@ import { GameCanvas } from '@/components/game/GameCanvas'
 import { TouchJoystick } from '@/components/game/controls/TouchJoystick'
 import { ObjectDetailPanel } from '@/components/game/ObjectDetailPanel'
 import { useGameStore } from '@/store/gameStore'
+import { useChatStore } from '@/store/chatStore'
 import { useKeyboardControls } from '@/hooks/useKeyboardControls'
 import { useObjectInteraction } from '@/hooks/useObjectInteraction'
 import { careerTimeline } from '@/data/careerTimeline'
 
 export default function CareerGame() {
-  useTranslation() // For language detection
+  const { i18n } = useTranslation() // For language detection
   const pressedKeys = useKeyboardControls()
   const [joystickKeys, setJoystickKeys] = useState<Set<string>>(new Set())
 
@@ -29,6 +30,15 @@ export default function CareerGame() {
 
   // Object interaction hook
   const { nearestObject, isNearObject } = useObjectInteraction()
+  const prefetchObject = useChatStore((state) => state.prefetchObject)
+
+  // Warm up the nearest object's chat so its first answer starts sooner
+  useEffect(() => {
+    if (nearestObject) {
+      const lang = i18n.language as 'en' | 'tr'
+      prefetchObject(nearestObject.objectPersonaId, nearestObject.title[lang])
+    }
+  }, [nearestObject, prefetchObject, i18n.language])
 
   // Detect mobile on mount
   useEffect(() => {
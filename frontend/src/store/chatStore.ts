@@ -1,6 +1,6 @@
 import { create } from 'zustand'
 import { WS_CHAT_ENDPOINT, IS_DEV } from '@/lib/config'
-import { parseWebSocketMessage } from '@/lib/schemas'
+import { parseWebSocketMessage, type WebSocketMessage } from '@/lib/schemas'
 
 export type PersonaType = 'engineer' | 'researcher' | 'speaker' | 'educator'
 
@@ -13,6 +13,24 @@ interface Message {
   isStreaming?: boolean
 }
 
+// Position in the server's queue while waiting for capacity
+interface QueueStatus {
+  position: number
+  etaSeconds: number
+}
+
+// Channel of the multi-persona chat; object chats use 'object:<objectPersonaId>'
+const PERSONA_CHANNEL = 'persona-group'
+
+// Session kept across reconnects and shared by tabs, so an answer streams to all of them
+const SESSION_STORAGE_KEY = 'chatSessionId'
+
+export type ChannelListener = (message: WebSocketMessage) => void
+
+// Object channels opened on the shared socket: channel -> title and listener
+// (kept outside the state so reopening after a reconnect needs no re-render)
+const channels = new Map<string, { title: string; listener: ChannelListener }>()
+
 // Buffer item with persona context
 interface BufferItem {
   content: string
@@ -23,10 +41,13 @@ interface ChatState {
   messages: Message[]
   isConnected: boolean
   sessionId: string | null
+  // Sequence number of the last session frame received, sent back to resume
+  lastSeq: number | null
   ws: WebSocket | null
   typingPersona: PersonaType | null
   activePersonas: PersonaType[]
   currentStreamingPersona: PersonaType | null
+  queueStatus: QueueStatus | null
   // Typewriter buffer for smooth streaming - stores content with persona
   typewriterBuffer: BufferItem[]
 
@@ -34,6 +55,10 @@ interface ChatState {
   connect: () => void
   disconnect: () => void
   sendMessage: (content: string) => void
+  prefetchObject: (objectId: string, title: string) => void
+  openChannel: (channel: string, title: string, listener: ChannelListener) => void
+  closeChannel: (channel: string) => void
+  sendChannelMessage: (channel: string, content: string) => boolean
   addMessage: (message: Message) => void
   updateLastMessage: (content: string, persona?: PersonaType) => void
   setStreaming: (isStreaming: boolean, persona?: PersonaType) => void
@@ -47,38 +72,66 @@ interface ChatState {
 export const useChatStore = create<ChatState>((set, get) => ({
   messages: [],
   isConnected: false,
-  sessionId: null,
+  sessionId: localStorage.getItem(SESSION_STORAGE_KEY),
+  lastSeq: null,
   ws: null,
   typingPersona: null,
   activePersonas: ['engineer', 'researcher', 'speaker', 'educator'],
   currentStreamingPersona: null,
+  queueStatus: null,
   typewriterBuffer: [],
 
   connect: () => {
-    const { ws } = get()
+    const { ws, sessionId, lastSeq } = get()
     if (ws) return // Already connected
 
+    // Rejoin the session; with last_seq the server replays the frames missed meanwhile
+    const params = new URLSearchParams()
+    if (sessionId) {
+      params.set('session_id', sessionId)
+      if (lastSeq !== null) params.set('last_seq', String(lastSeq))
+    }
+    const query = params.toString()
+    const url = query ? `${WS_CHAT_ENDPOINT}?${query}` : WS_CHAT_ENDPOINT
+
     if (IS_DEV) {
-      console.log('[ChatStore] Connecting to WebSocket:', WS_CHAT_ENDPOINT)
+      console.log('[ChatStore] Connecting to WebSocket:', url)
     }
 
-    const socket = new WebSocket(WS_CHAT_ENDPOINT)
+    const socket = new WebSocket(url)
 
     socket.onopen = () => {
       set({ isConnected: true, ws: socket })
       if (IS_DEV) {
         console.log('[ChatStore] WebSocket connected!')
       }
+      // Channels are per connection: reopen the ones still in use
+      channels.forEach(({ title }, channel) => {
+        socket.send(JSON.stringify({ type: 'open', channel, title }))
+      })
     }
 
     socket.onmessage = (event) => {
       const message = parseWebSocketMessage(event.data)
       if (!message) return // Invalid message, already logged by parseWebSocketMessage
 
+      if ('seq' in message && message.seq !== undefined) {
+        set({ lastSeq: message.seq })
+      }
+
+      // Object channel frames go to the panel that opened the channel
+      if ('channel' in message && message.channel && message.channel !== PERSONA_CHANNEL) {
+        channels.get(message.channel)?.listener(message)
+        return
+      }
+
       switch (message.type) {
         case 'system':
           // Welcome message
-          set({ sessionId: message.session_id ?? null })
+          if (message.session_id) {
+            localStorage.setItem(SESSION_STORAGE_KEY, message.session_id)
+            set({ sessionId: message.session_id })
+          }
           get().addMessage({
             id: crypto.randomUUID(),
             content: message.content,
@@ -88,7 +141,8 @@ export const useChatStore = create<ChatState>((set, get) => ({
           break
 
         case 'typing': {
-          // Persona is typing
+          // Persona is typing (a queued message has been admitted)
+          set({ queueStatus: null })
           get().setTypingPersona(message.persona as PersonaType | null)
           // Add placeholder message for this persona if not already streaming
           const lastMessage = get().messages[get().messages.length - 1]
@@ -138,6 +192,7 @@ export const useChatStore = create<ChatState>((set, get) => ({
         }
 
         case 'error':
+          set({ queueStatus: null })
           get().addMessage({
             id: crypto.randomUUID(),
             content: message.content,
@@ -145,6 +200,36 @@ export const useChatStore = create<ChatState>((set, get) => ({
             timestamp: new Date(),
           })
           break
+
+        case 'queued':
+          // Server is at capacity: show the position until the answer starts
+          set({ queueStatus: { position: message.position, etaSeconds: message.eta_seconds } })
+          break
+
+        case 'reconnect':
+          // Server is draining for a deploy: move to another instance (onclose reconnects)
+          if (message.content) {
+            get().addMessage({
+              id: crypto.randomUUID(),
+              content: message.content,
+              role: 'assistant',
+              timestamp: new Date(),
+            })
+          }
+          socket.close()
+          break
+
+        case 'replay':
+          // Missed frames follow (an incomplete replay lost the start of the gap)
+          if (IS_DEV) {
+            console.log('[ChatStore] Resuming from seq', message.from_seq, 'complete:', message.complete)
+          }
+          break
+
+        case 'ping':
+          // Heartbeat: the server closes the connection if the pong is late
+          socket.send(JSON.stringify({ type: 'pong' }))
+          break
       }
     }
 
@@ -191,6 +276,41 @@ export const useChatStore = create<ChatState>((set, get) => ({
     ws.send(JSON.stringify({ content }))
   },
 
+  prefetchObject: (objectId: string, title: string) => {
+    // A hint only: never opens a connection just to prefetch
+    const { ws, isConnected } = get()
+    if (!ws || !isConnected) return
+
+    ws.send(JSON.stringify({ type: 'prefetch', object_id: objectId, title }))
+  },
+
+  openChannel: (channel: string, title: string, listener: ChannelListener) => {
+    channels.set(channel, { title, listener })
+    const { ws, isConnected } = get()
+    if (!ws || !isConnected) {
+      // onopen sends the open frame
+      get().connect()
+      return
+    }
+    ws.send(JSON.stringify({ type: 'open', channel, title }))
+  },
+
+  closeChannel: (channel: string) => {
+    if (!channels.delete(channel)) return
+    const { ws, isConnected } = get()
+    if (ws && isConnected) {
+      ws.send(JSON.stringify({ type: 'close', channel }))
+    }
+  },
+
+  sendChannelMessage: (channel: string, content: string) => {
+    const { ws, isConnected } = get()
+    if (!ws || !isConnected || !channels.has(channel)) return false
+
+    ws.send(JSON.stringify({ content, channel }))
+    return true
+  },
+
   addMessage: (message: Message) => {
     set((state) => ({ messages: [...state.messages, message] }))
   },